@@ -8,9 +8,22 @@ import streamlit as st
 import pandas as pd
 import pytz
 from datetime import datetime, timedelta
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-import io
+
+import checkin_rollup
+import perf_metrics
+from checkin_ingest import to_frame
+from checkin_journal import COLUMNS as JOURNAL_COLUMNS, get_journal
+from checkin_export import render_export
+from checkin_search import CheckinSearchIndex
+from checkin_table import render_paged_table, sorted_positions
+from sheet_archive import get_manifest, load_partitions, total_checkins
+from sheet_migrate import get_schema_stamp
+from sheet_ratelimit import get_rate_limiter
+from sheets_client import open_worksheet
+from sheet_sync import get_sheet_sync
+
+perf_metrics.begin_rerun()
+perf_metrics.start_exporter()  # CHECKIN_METRICS_FILE이 있을 때만
 
 # -------------------------------
 # 기본 페이지 설정
@@ -23,66 +36,53 @@ st.caption("구글시트에 누적된 체크인 기록을 조회·필터·다운
 # Google Sheets 연결
 # -------------------------------
 @st.cache_resource(show_spinner=False)
-def _get_gspread_client():
-    # Streamlit Cloud/로컬 공통: secrets.toml로부터 보안 키 로드
-    if "gcp_service_account" not in st.secrets:
-        raise RuntimeError(
-            "secrets.toml에 [gcp_service_account]가 없습니다. "
-            "아래 '⚙️ 운영 팁 / 환경 설정' 섹션을 확인하세요."
-        )
-    raw = dict(st.secrets["gcp_service_account"])
-    # 개행 복원
-    if "private_key" in raw:
-        raw["private_key"] = raw["private_key"].replace("\\n", "\n")
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/drive",
-    ]
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(raw, scope)
-    return gspread.authorize(creds)
-
-def load_sheet(spread_name="체크인기록", worksheet_name="Sheet1") -> pd.DataFrame:
-    client = _get_gspread_client()
-    sh = client.open(spread_name).worksheet(worksheet_name)
-    values = sh.get_all_values()
-    if not values:
-        return pd.DataFrame(columns=["연번", "이름", "근무장소", "근무시간"])
-    header, rows = values[0], values[1:]
-    df = pd.DataFrame(rows, columns=[h.strip() for h in header])
-
-    # 예상 컬럼 보강
-    needed = ["연번", "이름", "근무장소", "근무시간"]
-    for c in needed:
-        if c not in df.columns:
-            df[c] = ""
-
-    # 시간 파싱 (KST)
-    def parse_kst(x):
-        x = str(x).strip()
-        try:
-            dt = pd.to_datetime(x, errors="coerce")
-            if pd.isna(dt):
-                return pd.NaT
-            kst = pytz.timezone("Asia/Seoul")
-            if dt.tzinfo is None:
-                return kst.localize(dt)
-            return dt.astimezone(kst)
-        except Exception:
-            return pd.NaT
-
-    df["근무시간_dt"] = df["근무시간"].apply(parse_kst)
-    df["날짜"] = df["근무시간_dt"].dt.date
-    df["시간"] = df["근무시간_dt"].dt.strftime("%H:%M:%S")
-
-    # 연번 숫자 변환
-    def to_int(x):
-        try:
-            return int(str(x).strip())
-        except Exception:
-            return None
-    df["연번"] = df["연번"].apply(to_int)
-
-    return df
+def _get_worksheet(spread_name="체크인기록", worksheet_name="Sheet1"):
+    # 공용 클라이언트(streamlit_app·체크인 폼과 인증/세션 공유, 지연 인증, open_by_key) + 공용 호출 제한기
+    return open_worksheet(spread_name, worksheet_name)
+
+def get_sync(spread_name="체크인기록", worksheet_name="Sheet1"):
+    """시트별 증분 동기화 엔진 (streamlit_app 관리자 요약과 공용)."""
+    return get_sheet_sync(
+        (spread_name, worksheet_name),
+        lambda: _get_worksheet(spread_name, worksheet_name),
+    )
+
+def get_archive(spread_name="체크인기록", worksheet_name="Sheet1"):
+    """월별 보관 파티션 목록 (streamlit_app과 공용)."""
+    return get_manifest(
+        (spread_name, worksheet_name),
+        lambda: _get_worksheet(spread_name, worksheet_name).spreadsheet,
+    )
+
+def get_stamp(spread_name="체크인기록", worksheet_name="Sheet1"):
+    """sheet_migrate 스키마 도장 (1분 캐시) — 맞으면 증분 동기화에서 행별 시각 정규화 생략."""
+    return get_schema_stamp(
+        (spread_name, worksheet_name),
+        lambda: _get_worksheet(spread_name, worksheet_name).spreadsheet,
+    )
+
+def load_sheet(spread_name="체크인기록", worksheet_name="Sheet1",
+               start_date=None, end_date=None):
+    # 시트의 새 행 + 날짜 범위와 겹치는 보관 파티션만 로컬 색인(SQLite)에 반영한 뒤, 색인에서 범위 조회
+    # → (DataFrame, 검색 색인, 데이터 버전). 데이터가 그대로면 rerun(검색어 입력)마다 다시 만들지 않음
+    # 버전은 조회 전에 1회만 읽어 표/내보내기 캐시 키에도 그대로 사용 (복제 스레드가 그 사이 연번을 채워도
+    # 새 버전 키에 옛 DataFrame 결과가 캐시되지 않음)
+    with perf_metrics.span("df_load", app="admin"):
+        journal = get_journal()
+        load_partitions(journal, get_archive(spread_name, worksheet_name), start_date, end_date)
+        journal.sync_from(get_sync(spread_name, worksheet_name), canonical=get_stamp(spread_name, worksheet_name).matches())
+        version = journal.data_version()
+        df, index = _indexed_frame(version, start_date, end_date)
+        return df, index, version
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _indexed_frame(version, start_date, end_date):
+    df = _build_df(JOURNAL_COLUMNS, get_journal().query(start_date, end_date))
+    return df, CheckinSearchIndex(df)
+
+def _build_df(header, rows) -> pd.DataFrame:
+    # 타입 지정 1회 변환 (고정 형식 시간 파싱 + KST, 연번 Int64, 4열/5열 헤더 정규화)
+    return to_frame(header, rows)
 
 # -------------------------------
 # 사이드바 필터
@@ -96,12 +96,22 @@ with st.sidebar:
     end_date = st.date_input("종료일", value=today)
 
     st.subheader("조건")
-    name_kw = st.text_input("이름(포함 검색)", value="")
+    name_kw = st.text_input("이름(포함 검색)", value="", help="초성 검색 가능: ㅎㄱㄷ → 홍길동")
     place_kw = st.text_input("근무장소(포함 검색)", value="")
     refresh = st.button("🔄 새로고침")
 
-# 새로고침 버튼
+    js = get_journal().status()
+    st.caption(f"시트 미반영: {js['pending']:,}건 · 복제 지연 {js['lag_sec']:.0f}초")
+    ls = get_rate_limiter().status()
+    st.caption(f"Sheets API {ls['calls']:,}회 · 평균 대기 {ls['avg_wait_ms']:.0f}ms · "
+               f"재시도 {ls['retries']}회 · 합쳐진 읽기 {ls['coalesced']}회")
+    perf_metrics.render_panel(st)
+
+# 새로고침 버튼 — 캐시 무효화 후 증분 조회
 if refresh:
+    get_sync().invalidate()
+    get_archive().invalidate()
+    get_stamp().invalidate()
     st.experimental_rerun()
 
 # -------------------------------
@@ -109,45 +119,51 @@ if refresh:
 # -------------------------------
 with st.spinner("구글시트에서 데이터를 가져오는 중..."):
     try:
-        df = load_sheet()
+        df, index, data_ver = load_sheet(start_date=start_date, end_date=end_date)
     except Exception as e:
         st.error("구글시트 연결 또는 데이터 로드 중 오류가 발생했습니다.")
         st.exception(e)
         st.stop()
 
-total_cnt = len(df)
-df_f = df.copy()
+# 지표/추이는 사전 집계 테이블에서 (전체 이력을 다시 세지 않음)
+journal = get_journal()
+total_cnt = total_checkins(journal, get_archive())
 
-# 날짜 필터
-if start_date:
-    df_f = df_f[df_f["날짜"] >= start_date]
-if end_date:
-    df_f = df_f[df_f["날짜"] <= end_date]
-
-# 키워드 필터
-if name_kw.strip():
-    df_f = df_f[df_f["이름"].astype(str).str.contains(name_kw.strip(), na=False)]
-if place_kw.strip():
-    df_f = df_f[df_f["근무장소"].astype(str).str.contains(place_kw.strip(), na=False)]
+# 날짜 범위 ∩ 이름 ∩ 근무장소 — 검색 색인의 행 위치 교집합 (전체 행 mask 없음, 초성 검색 포함)
+df_f = df.iloc[index.search(name_kw, place_kw, start_date, end_date)]
+match_names = index.name.matched_values(name_kw) if name_kw.strip() else None
+match_places = index.place.matched_values(place_kw) if place_kw.strip() else None
+summary = checkin_rollup.summary(journal, start_date, end_date, names=match_names, places=match_places)
 
 # -------------------------------
 # 요약 지표
 # -------------------------------
 col1, col2, col3, col4 = st.columns(4)
 col1.metric("총 체크인", f"{total_cnt:,} 건")
-col2.metric("조회 결과", f"{len(df_f):,} 건")
-col3.metric("인원 수(고유)", f"{df_f['이름'].nunique():,} 명")
-col4.metric("근무장소 수(고유)", f"{df_f['근무장소'].nunique():,} 곳")
+col2.metric("조회 결과", f"{summary['count']:,} 건")
+col3.metric("인원 수(고유)", f"{summary['names']:,} 명")
+col4.metric("근무장소 수(고유)", f"{summary['places']:,} 곳")
 
 st.markdown("---")
 
 # -------------------------------
 # 일자별 추이(간단 차트)
 # -------------------------------
-if not df_f.empty:
-    daily_counts = df_f.groupby("날짜").size().sort_index()
+daily = checkin_rollup.daily_counts(journal, start_date, end_date, names=match_names, places=match_places)
+if daily:
+    daily_counts = pd.Series([c for _, c in daily], index=pd.to_datetime([d for d, _ in daily]), name="체크인")
     st.subheader("📈 일자별 체크인 추이")
     st.line_chart(daily_counts, height=220)
+
+    with st.expander("🏫 근무장소별 첫·마지막 체크인"):
+        st.dataframe(
+            pd.DataFrame(
+                checkin_rollup.school_times(journal, start_date, end_date, places=match_places),
+                columns=["근무장소", "체크인", "근무일수", "첫 체크인", "마지막 체크인"],
+            ),
+            use_container_width=True,
+            hide_index=True,
+        )
 else:
     st.info("선택된 조건에 해당하는 데이터가 없습니다.")
 
@@ -156,24 +172,19 @@ else:
 # -------------------------------
 st.subheader("🗂️ 체크인 내역")
 show_cols = ["연번", "이름", "근무장소", "근무시간", "날짜", "시간"]
-table_df = df_f[show_cols].sort_values(by=["근무시간"], ascending=False)
+table_key = (data_ver, start_date, end_date, name_kw.strip(), place_kw.strip())
 
-st.dataframe(
-    table_df,
-    use_container_width=True,
-    hide_index=True
+# 페이지 단위 표: 정렬 순서는 (데이터 버전, 필터)당 1회, 현재 페이지 행만 브라우저로
+render_paged_table(
+    df_f, key=table_key, sort_by="근무시간", columns=show_cols, st_key="admin_table",
+    use_container_width=True, hide_index=True,
 )
 
-def to_csv_bytes(dataframe: pd.DataFrame) -> bytes:
-    buf = io.StringIO()
-    dataframe.to_csv(buf, index=False, encoding="utf-8-sig")
-    return buf.getvalue().encode("utf-8-sig")
-
-st.download_button(
-    label="⬇️ CSV로 내려받기",
-    data=to_csv_bytes(table_df),
-    file_name=f"kids_guard_checkins_{start_date}_to_{end_date}.csv",
-    mime="text/csv"
+# 내보내기: 버튼을 눌렀을 때만 생성 (CSV/Parquet/Excel), 같은 조건·데이터 버전(연번 채움 포함)이면 캐시 재사용
+render_export(
+    lambda: df_f.iloc[sorted_positions(df_f, table_key, "근무시간")][show_cols],
+    key=table_key,
+    base_name=f"kids_guard_checkins_{start_date}_to_{end_date}",
 )
 
 st.info("필드 기준: 연번 / 이름 / 근무장소 / 근무시간(원본) / 날짜 / 시간")
@@ -186,6 +197,11 @@ with st.expander("⚙️ 운영 팁 / 환경 설정"):
         """
 - **secrets.toml**에 `gcp_service_account` 키가 있어야 합니다.  
 - 스프레드시트 이름과 시트명은 기본값 **체크인기록 / Sheet1**을 사용합니다.  
-- 기록 컬럼은 **[연번, 이름, 근무장소, 근무시간]**을 가정합니다.
+- `[gspread]` 섹션에 `sheet_id`(스프레드시트 키)를 넣으면 이름 검색 없이 바로 엽니다.  
+- 지난 달 기록은 `python sheet_archive.py`로 월별 워크시트(Sheet1_YYYY-MM)에 보관하면 Sheet1이 가벼워집니다.  
+- 기록 컬럼은 **[연번, 이름, 근무장소, 근무시간]**을 가정합니다.  
+- 구 4열/영문 헤더 행은 `python sheet_migrate.py --dry-run`으로 확인 후 `python sheet_migrate.py`로 5열 표준 스키마로 정리할 수 있습니다.
         """
     )
+
+perf_metrics.end_rerun("admin")
@@ -0,0 +1,98 @@
+# bench_ingest.py — 체크인 기록 변환 벤치마크 (구 행 단위 .apply vs checkin_ingest 벡터화)
+# 사용법: python bench_ingest.py [--rows 200000] [--repeat 3]
+# - 구글시트 연결 없이 합성 이력(4열/5열 혼합, 일부 비표준 시간 형식)으로 측정
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytz
+
+from checkin_ingest import COLUMNS, to_frame
+
+SCHOOLS = [f"테스트{i:02d}초등학교" for i in range(1, 27)]
+
+
+def synthetic_rows(n: int, seed=7):
+    """합성 이력: 5열 행 위주 + 4열(특이사항 없음) 행 + 1% 비표준 시간 형식."""
+    rnd = random.Random(seed)
+    start = datetime(2024, 3, 1, 7, 30)
+    rows = []
+    for i in range(n):
+        ts = start + timedelta(minutes=7 * i + rnd.randint(0, 5))
+        ts_s = ts.strftime("%Y-%m-%d %H:%M:%S") if rnd.random() > 0.01 else ts.strftime("%Y/%m/%d %H:%M")
+        row = [str(i + 1), f"대원{rnd.randint(1, 600)}", rnd.choice(SCHOOLS), ts_s]
+        if rnd.random() > 0.3:
+            row.append("" if rnd.random() > 0.1 else "통학로 이상 없음")
+        rows.append(row + [""] * (len(COLUMNS) - len(row)))
+    return rows
+
+
+def legacy_frame(header, rows) -> pd.DataFrame:
+    """변경 전 admin_qr_checkin_only.load_sheet 변환 (행 단위 parse_kst / to_int)."""
+    df = pd.DataFrame(rows, columns=[h.strip() for h in header])
+    for c in ["연번", "이름", "근무장소", "근무시간"]:
+        if c not in df.columns:
+            df[c] = ""
+
+    def parse_kst(x):
+        x = str(x).strip()
+        try:
+            dt = pd.to_datetime(x, errors="coerce")
+            if pd.isna(dt):
+                return pd.NaT
+            kst = pytz.timezone("Asia/Seoul")
+            if dt.tzinfo is None:
+                return kst.localize(dt)
+            return dt.astimezone(kst)
+        except Exception:
+            return pd.NaT
+
+    df["근무시간_dt"] = df["근무시간"].apply(parse_kst)
+    df["날짜"] = df["근무시간_dt"].dt.date
+    df["시간"] = df["근무시간_dt"].dt.strftime("%H:%M:%S")
+
+    def to_int(x):
+        try:
+            return int(str(x).strip())
+        except Exception:
+            return None
+    df["연번"] = df["연번"].apply(to_int)
+    return df
+
+
+def _best(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t)
+    return best, out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="체크인 기록 변환 벤치마크")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-legacy", action="store_true", help="구 변환 생략 (행 수가 클 때)")
+    args = parser.parse_args(argv)
+
+    rows = synthetic_rows(args.rows)
+    print(f"📦 합성 이력 {args.rows:,}행")
+
+    t_new, df_new = _best(lambda: to_frame(COLUMNS, rows), args.repeat)
+    print(f"⚡ checkin_ingest.to_frame : {t_new:8.3f}초  ({args.rows / t_new:,.0f} 행/초)")
+    print(f"   메모리: {df_new.memory_usage(deep=True).sum() / 1e6:,.1f} MB · 시간 파싱 실패 {df_new['근무시간_dt'].isna().sum():,}건")
+
+    if not args.skip_legacy:
+        t_old, df_old = _best(lambda: legacy_frame(COLUMNS, rows), 1)
+        print(f"🐢 구 행 단위 변환        : {t_old:8.3f}초  ({args.rows / t_old:,.0f} 행/초)")
+        print(f"   메모리: {df_old.memory_usage(deep=True).sum() / 1e6:,.1f} MB")
+        same = (df_old["날짜"].astype(str).values == df_new["날짜"].astype(str).values).mean()
+        print(f"📈 속도 {t_old / t_new:,.1f}배 · 날짜 일치율 {same:.2%}")
+
+
+if __name__ == "__main__":
+    main()
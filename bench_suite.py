@@ -0,0 +1,307 @@
+# bench_suite.py — 오프라인 성능 기준치 (QR 렌더링 단계 · URL 생성 · 대시보드 변환/필터) + 회귀 감시
+# 사용법: python bench_suite.py [--sizes 10k,100k,1m] [--qr-count 200] [--repeat 3]
+#                              [--baseline bench_baseline.json] [--save-baseline] [--threshold 0.25]
+# - 구글시트 연결 없이 실행: QR은 임시 폴더에 PNG 저장, 대시보드는 임시 저널(SQLite)에 합성 이력 적재
+#   (합성 이력은 bench_ingest.synthetic_rows — 4열/5열 혼합, 1% 비표준 시간 형식)
+# - QR: make_qr_with_label 단계별(생성 build / RGB 변환 rgb / 캔버스 붙이기 paste / 라벨 label / PNG 인코딩)
+#   시간은 perf_metrics 구간(qr_stage_seconds, qr_png_encode_seconds) 합계로 집계
+# - 대시보드(행 수별): 시트 → 저널 반영(mirror) / 범위 조회(query) / DataFrame 변환(to_frame) /
+#   검색 색인(index) / 이름·근무장소·기간 필터(filter) / 사전 집계 요약(rollup)
+#   = admin_qr_checkin_only.load_sheet · streamlit_app.fetch_all_records_df 경로와 같은 함수
+# - 항목마다 repeat회 중 최솟값(초) · 처리량(건/초) · 최대 메모리(tracemalloc, 시간 측정과 별도 1회)
+# - --save-baseline: 결과를 기준치 JSON으로 저장 / 그 외: 기준치와 비교해 threshold(비율)를 넘게 느려지거나
+#   mem-threshold를 넘게 메모리가 늘면 종료 코드 1 (min-delta-ms / min-delta-mb 미만의 차이는 측정 잡음으로 봄)
+# - 항목별 허용치 = max(threshold, noise-factor × 반복 간 편차) — 편차는 (최대 - 최소) / 최소, 기준치·이번 중 큰 값
+#   (짧은 구간은 실행마다 수십 % 흔들리므로 고정 비율만으로는 오탐). 기준치 저장/비교는 --repeat 3 이상만 허용
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+import perf_metrics
+from bench_ingest import SCHOOLS, synthetic_rows
+
+BASELINE_PATH = "bench_baseline.json"
+MIN_REPEAT = 3  # 기준치 저장/비교에 필요한 최소 반복 (편차 추정)
+QR_STAGES = ["build", "rgb", "paste", "label"]
+SIZE_SUFFIX = {"k": 1_000, "m": 1_000_000}
+
+
+def parse_size(text: str) -> int:
+    """'10k' / '1m' / '2500' → 행 수."""
+    t = text.strip().lower()
+    if t and t[-1] in SIZE_SUFFIX:
+        return int(float(t[:-1]) * SIZE_SUFFIX[t[-1]])
+    return int(t)
+
+
+def size_label(n: int) -> str:
+    if n >= 1_000_000 and n % 1_000_000 == 0:
+        return f"{n // 1_000_000}m"
+    if n >= 1_000 and n % 1_000 == 0:
+        return f"{n // 1_000}k"
+    return str(n)
+
+
+def _spread(times):
+    """반복 간 편차 (최대 - 최소) / 최소 (1회면 0)."""
+    lo = min(times)
+    return (max(times) - lo) / lo if lo > 0 else 0.0
+
+
+def _best(fn, repeat):
+    """repeat회 중 최소 시간(초), 마지막 결과, 반복 간 편차."""
+    times, out = [], None
+    for _ in range(repeat):
+        gc.collect()
+        t = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t)
+    return min(times), out, _spread(times)
+
+
+def _peak_mb(fn):
+    """fn 1회 실행 중 추가로 잡힌 최대 메모리(MB, tracemalloc — numpy 배열 포함, Pillow 이미지 버퍼는 제외)."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return max(0.0, (peak - base) / 1e6)
+
+
+def _result(seconds, ops, peak_mb=None, spread=0.0):
+    r = {"seconds": round(seconds, 6), "ops": ops, "ops_per_sec": round(ops / seconds, 1) if seconds else None,
+         "spread": round(spread, 3)}
+    if peak_mb is not None:
+        r["peak_mb"] = round(peak_mb, 2)
+    return r
+
+
+def _span_totals():
+    """perf_metrics 구간별 (횟수, 합계 초) — 전후 차이로 단계 시간 계산."""
+    out = {}
+    for name, labels, s in perf_metrics.METRICS.spans():
+        out[(name, labels.get("stage", ""))] = (s["count"], (s["avg"] or 0.0) * s["count"])
+    return out
+
+
+# ------------------------------
+# QR 생성기
+# ------------------------------
+def bench_qr(count, repeat):
+    """make_qr_with_label 전체/단계별 + build_checkin_url."""
+    from qr_generator_with_labels import BASE_URL, build_checkin_url, make_qr_with_label
+
+    jobs = [(SCHOOLS[i % len(SCHOOLS)], f"대원{i:04d}", "통학로 이상 없음" if i % 5 == 0 else "")
+            for i in range(count)]
+    results = {}
+
+    url_n = max(count * 50, 10_000)
+    url_jobs = [jobs[i % count] for i in range(url_n)]
+    t, _, sp = _best(lambda: [build_checkin_url(BASE_URL, *j) for j in url_jobs], repeat)
+    results["qr/build_checkin_url"] = _result(t, url_n, _peak_mb(lambda: [build_checkin_url(BASE_URL, *j)
+                                                                       for j in url_jobs[:1000]]), sp)
+
+    urls = [(build_checkin_url(BASE_URL, *j), f"{j[0]} {j[1]}") for j in jobs]
+    with tempfile.TemporaryDirectory(prefix="bench-qr-") as tmp:
+        def render_all():
+            for i, (url, label) in enumerate(urls):
+                make_qr_with_label(url, label, os.path.join(tmp, f"{i}.png"))
+
+        keys = [("qr_stage_seconds", s) for s in QR_STAGES] + [("qr_png_encode_seconds", "")]
+        stage_times = {k: [] for k in keys}
+        totals = []
+        for _ in range(repeat):
+            before = _span_totals()
+            gc.collect()
+            t = time.perf_counter()
+            render_all()
+            totals.append(time.perf_counter() - t)
+            after = _span_totals()
+            for k in keys:
+                stage_times[k].append(after.get(k, (0, 0.0))[1] - before.get(k, (0, 0.0))[1])
+
+        one = urls[:min(count, 20)]
+        peak = _peak_mb(lambda: [make_qr_with_label(u, l, os.path.join(tmp, "peak.png")) for u, l in one])
+        results["qr/make_qr_with_label"] = _result(min(totals), count, peak, _spread(totals))
+        for (name, stage), times in stage_times.items():
+            results[f"qr/{stage or 'png_encode'}"] = _result(min(times), count, spread=_spread(times))
+    return results
+
+
+# ------------------------------
+# 대시보드 변환 / 필터
+# ------------------------------
+def bench_dashboard(n, repeat, tmp):
+    """합성 n행 → 저널 반영 → 범위 조회 → to_frame → 검색 색인 → 필터 / 사전 집계."""
+    import checkin_rollup
+    from checkin_ingest import COLUMNS, to_frame
+    from checkin_journal import CheckinJournal
+    from checkin_search import CheckinSearchIndex
+
+    prefix = f"dash/{size_label(n)}"
+    rows = synthetic_rows(n)
+    journal = CheckinJournal(os.path.join(tmp, f"bench_{n}.db"))
+    results = {}
+
+    # 시트 전체 재동기화와 같은 경로 (replace=True → 매 반복 같은 결과). 1회 먼저 채워 두고 측정
+    # → 모든 반복이 "기존 미러 삭제 + 재삽입"으로 같은 일을 하고, 편차도 다른 항목처럼 기록
+    journal.mirror_sheet(COLUMNS, rows, replace=True)
+    t, _, sp = _best(lambda: journal.mirror_sheet(COLUMNS, rows, replace=True), repeat)
+    results[f"{prefix}/mirror"] = _result(t, n, spread=sp)
+
+    # 조회 기간: 이력 마지막 14일 (관리자 화면 기본값) / 전체
+    last = datetime.strptime(journal.read("SELECT MAX(ts) FROM checkins")[0][0], "%Y-%m-%d %H:%M:%S").date()
+    start, end = last - timedelta(days=14), last
+
+    t, all_rows, sp = _best(lambda: journal.query(), repeat)
+    results[f"{prefix}/query_all"] = _result(t, len(all_rows), _peak_mb(journal.query), sp)
+    t, recent, sp = _best(lambda: journal.query(start, end), repeat)
+    results[f"{prefix}/query_14d"] = _result(t, max(1, len(recent)), spread=sp)
+
+    t, df, sp = _best(lambda: to_frame(COLUMNS, all_rows), repeat)
+    results[f"{prefix}/to_frame"] = _result(t, len(all_rows), _peak_mb(lambda: to_frame(COLUMNS, all_rows)), sp)
+
+    t, index, sp = _best(lambda: CheckinSearchIndex(df), repeat)
+    results[f"{prefix}/index"] = _result(t, len(df), _peak_mb(lambda: CheckinSearchIndex(df)), sp)
+
+    # 필터: 기간만 / 이름 포함 / 초성 / 근무장소 + 기간 → 결과 행 선택까지
+    queries = [("", "", start, end), ("대원1", "", None, None), ("ㄷㅇ", "", None, None),
+               ("", "테스트0", start, end), ("대원2", "테스트1", date(2024, 3, 1), end)]
+
+    def run_filters():
+        return [len(df.iloc[index.search(*q)]) for q in queries]
+
+    t, _, sp = _best(run_filters, repeat)
+    results[f"{prefix}/filter"] = _result(t, len(queries), _peak_mb(run_filters), sp)
+
+    def rollups():
+        checkin_rollup.summary(journal, start, end)
+        checkin_rollup.daily_counts(journal, start, end)
+        checkin_rollup.school_times(journal, start, end)
+
+    t, _, sp = _best(rollups, repeat)
+    results[f"{prefix}/rollup"] = _result(t, 3, spread=sp)
+    journal._conn.close()
+    return results
+
+
+# ------------------------------
+# 기준치 비교
+# ------------------------------
+def tolerance(cur, base, threshold, noise_factor):
+    """항목별 허용 시간 증가 비율 — 반복 간 편차가 큰(짧은) 구간은 그만큼 넓게."""
+    return max(threshold, noise_factor * max(cur.get("spread", 0.0), base.get("spread", 0.0)))
+
+
+def compare(current, baseline, threshold, mem_threshold, min_delta_ms, min_delta_mb, noise_factor=2.0):
+    """기준치 대비 회귀 목록 [(항목, 설명)] — 기준치에 없는 항목은 건너뜀."""
+    regressions = []
+    for key, cur in current.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        # 행 수/건수가 다르면 건당 시간으로 비교
+        cur_per = cur["seconds"] / cur["ops"]
+        base_per = base["seconds"] / base["ops"]
+        tol = tolerance(cur, base, threshold, noise_factor)
+        if cur_per > base_per * (1 + tol) and (cur_per - base_per) * cur["ops"] * 1000 >= min_delta_ms:
+            regressions.append((key, f"시간 {base_per * cur['ops']:.3f}s → {cur['seconds']:.3f}s "
+                                     f"({cur_per / base_per - 1:+.0%}, 허용 +{tol:.0%})"))
+        if "peak_mb" in cur and "peak_mb" in base:
+            if cur["peak_mb"] > base["peak_mb"] * (1 + mem_threshold) and \
+                    cur["peak_mb"] - base["peak_mb"] >= min_delta_mb:
+                regressions.append((key, f"메모리 {base['peak_mb']:.1f}MB → {cur['peak_mb']:.1f}MB"))
+    return regressions
+
+
+def print_results(results, baseline):
+    for key, r in results.items():
+        base = baseline.get(key)
+        diff = ""
+        if base:
+            ratio = (r["seconds"] / r["ops"]) / (base["seconds"] / base["ops"]) - 1
+            diff = f"  (기준 대비 {ratio:+.0%})"
+        mem = f" · {r['peak_mb']:8.1f} MB" if "peak_mb" in r else " " * 14
+        print(f"{key:32s} {r['seconds'] * 1000:10.1f} ms · {r['ops_per_sec'] or 0:14,.0f} 건/초{mem}{diff}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="QR 생성·대시보드 계산 오프라인 벤치마크 (기준치 회귀 감시)")
+    parser.add_argument("--sizes", default="10k,100k,1m", help="대시보드 합성 이력 행 수 (쉼표 구분, 예: 10k,100k,1m)")
+    parser.add_argument("--qr-count", type=int, default=200, help="make_qr_with_label 렌더링 수")
+    parser.add_argument("--repeat", type=int, default=MIN_REPEAT,
+                        help=f"항목별 반복 횟수 (최솟값 사용, 기준치 저장/비교 시 {MIN_REPEAT} 이상)")
+    parser.add_argument("--skip-qr", action="store_true")
+    parser.add_argument("--skip-dashboard", action="store_true")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="기준치 JSON 경로")
+    parser.add_argument("--save-baseline", action="store_true", help="이번 결과를 기준치로 저장 (비교하지 않음)")
+    parser.add_argument("--threshold", type=float, default=0.25, help="허용 시간 증가 비율")
+    parser.add_argument("--mem-threshold", type=float, default=0.25, help="허용 최대 메모리 증가 비율")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="이보다 작은 시간 차이는 무시")
+    parser.add_argument("--min-delta-mb", type=float, default=1.0, help="이보다 작은 메모리 차이는 무시")
+    parser.add_argument("--noise-factor", type=float, default=2.0,
+                        help="항목별 허용치 = max(threshold, 이 값 × 반복 간 편차)")
+    parser.add_argument("--json", help="이번 결과를 따로 저장할 경로")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+    if (args.save_baseline or baseline) and args.repeat < MIN_REPEAT:
+        parser.error(f"기준치 저장/비교에는 --repeat {MIN_REPEAT} 이상이 필요합니다 (반복 간 편차로 허용치를 정함).")
+
+    results = {}
+    if not args.skip_qr:
+        print(f"🔳 QR {args.qr_count}개 렌더링 …")
+        results.update(bench_qr(args.qr_count, args.repeat))
+    if not args.skip_dashboard:
+        with tempfile.TemporaryDirectory(prefix="bench-dash-") as tmp:
+            for n in (parse_size(s) for s in args.sizes.split(",") if s.strip()):
+                print(f"📦 합성 이력 {n:,}행 …")
+                results.update(bench_dashboard(n, args.repeat, tmp))
+
+    print_results(results, baseline)
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "repeat": args.repeat, "qr_count": args.qr_count, "sizes": args.sizes,
+        },
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 기준치 저장 → {os.path.abspath(args.baseline)} ({len(results)}개 항목)")
+        return 0
+    if not baseline:
+        print(f"ℹ️ 기준치 없음 ({args.baseline}) — --save-baseline으로 먼저 저장하세요.")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold, args.mem_threshold,
+                          args.min_delta_ms, args.min_delta_mb, args.noise_factor)
+    for key, why in regressions:
+        print(f"   ⚠️ {key}: {why}")
+    print("✅ 통과" if not regressions else f"❌ 회귀 {len(regressions)}건 (허용 시간 +{args.threshold:.0%} · "
+                                          f"메모리 +{args.mem_threshold:.0%})")
+    return 0 if not regressions else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+# checkin_codes.py — QR 짧은 코드 레지스트리 (학교 코드 / 대원 코드)
+# - 한글 학교명·이름을 URL에 그대로 넣으면 글자당 9바이트(%XX×3) → QR 버전이 커지고 인식이 느림
+# - 압축 모드 URL: ?s=07&g=a3f  (s = 학교 코드 2자리, g = 대원 코드)
+# - 학교 코드는 아래 표로 고정 (순서를 바꾸거나 번호를 재사용하지 말 것 — 이미 인쇄된 QR이 깨짐)
+# - 대원 코드는 QR 생성기가 명단으로부터 발급해 guard_codes.csv에 누적 저장 → 앱이 같은 파일로 해석
+#   (앱 배포 시 guard_codes.csv를 함께 배포해야 g 코드가 이름으로 풀림)
+# - 앱(QR 생성 화면)은 새 대원 코드를 발급하지 않음 — 배포 환경의 파일은 재시작 시 사라지므로
+#   이미 등록된 (학교, 이름, 특이사항)만 g 코드를 쓰고, 나머지는 전체 파라미터 URL로 생성 (known())
+
+import csv
+import hashlib
+import os
+import threading
+
+# 🏫 학교 코드 (streamlit_app.SCHOOL_OPTIONS와 동일 명칭)
+SCHOOL_CODES = {
+    "01": "개원초등학교", "02": "개일초등학교", "03": "개포초등학교", "04": "개현초등학교",
+    "05": "구룡초등학교", "06": "논현초등학교", "07": "대곡초등학교", "08": "대도초등학교",
+    "09": "대모초등학교", "10": "대왕초등학교", "11": "대진초등학교", "12": "대청초등학교",
+    "13": "대치초등학교", "14": "대현초등학교", "15": "도곡초등학교", "16": "도성초등학교",
+    "17": "봉은초등학교", "18": "삼릉초등학교", "19": "세명초등학교", "20": "수서초등학교",
+    "21": "신구초등학교", "22": "압구정초등학교", "23": "양전초등학교", "24": "언북초등학교",
+    "25": "언주초등학교", "26": "율현초등학교",
+}
+SCHOOL_TO_CODE = {v: k for k, v in SCHOOL_CODES.items()}
+
+GUARD_CODES_PATH = os.environ.get(
+    "GUARD_CODES_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "guard_codes.csv")
+)
+GUARD_FIELDS = ["code", "school", "name", "note"]
+_ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def school_code(school: str) -> str:
+    """학교명 → 코드. 표에 없으면 KeyError."""
+    return SCHOOL_TO_CODE[school]
+
+
+def _base36(n: int, width: int) -> str:
+    s = ""
+    for _ in range(width):
+        n, r = divmod(n, 36)
+        s = _ALPHABET[r] + s
+    return s
+
+
+class GuardCodeRegistry:
+    """대원 코드 ↔ (학교, 이름, 특이사항). CSV 파일 1개에 누적."""
+
+    def __init__(self, path=GUARD_CODES_PATH):
+        self.path = path
+        self.by_code = {}
+        self.by_guard = {}   # (school, name) → code
+        if os.path.exists(path):
+            with open(path, encoding="utf-8-sig", newline="") as f:
+                for r in csv.DictReader(f):
+                    if r.get("code"):
+                        self._add(r["code"], r.get("school", ""), r.get("name", ""), r.get("note", ""))
+
+    def _add(self, code, school, name, note=""):
+        self.by_code[code] = {"school": school, "name": name, "note": note}
+        self.by_guard[(school, name)] = code
+
+    def resolve(self, code):
+        """코드 → {"school", "name", "note"} (없으면 None)."""
+        return self.by_code.get(code)
+
+    def known(self, school: str, name: str, note: str = "") -> bool:
+        """(학교, 이름)이 이미 등록돼 있고 특이사항도 같으면 True (새 코드 발급 없이 압축 URL 가능)."""
+        code = self.by_guard.get((school, name))
+        return code is not None and self.by_code[code]["note"] == note
+
+    def assign(self, school: str, name: str, note: str = "") -> str:
+        """(학교, 이름)에 코드 발급. 이미 있으면 기존 코드 재사용 (특이사항만 갱신)."""
+        code = self.by_guard.get((school, name))
+        if code is None:
+            h = int(hashlib.sha1(f"{school}\x1f{name}".encode("utf-8")).hexdigest(), 16)
+            width = 3
+            code = _base36(h, width)
+            while code in self.by_code:  # 충돌 시 한 자리씩 늘림
+                width += 1
+                code = _base36(h, width)
+        self._add(code, school, name, note)
+        return code
+
+    def save(self):
+        with open(self.path, "w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(GUARD_FIELDS)
+            for code, g in sorted(self.by_code.items()):
+                w.writerow([code, g["school"], g["name"], g["note"]])
+
+
+_REGISTRY = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_guard_registry() -> GuardCodeRegistry:
+    """앱용 공용 레지스트리 (프로세스당 1회 로드)."""
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            _REGISTRY = GuardCodeRegistry()
+        return _REGISTRY
+
+
+def resolve_params(qp: dict) -> dict:
+    """쿼리파라미터의 s/g 코드를 school/name/note로 풀어 돌려줌 (기존 키가 있으면 유지)."""
+    out = dict(qp)
+    guard = get_guard_registry().resolve(qp["g"]) if qp.get("g") else None
+    if guard:
+        out.setdefault("school", guard["school"])
+        out.setdefault("name", guard["name"])
+        if guard["note"]:
+            out.setdefault("note", guard["note"])
+    if qp.get("s") in SCHOOL_CODES:
+        out.setdefault("school", SCHOOL_CODES[qp["s"]])
+    return out
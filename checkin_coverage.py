@@ -0,0 +1,194 @@
+# checkin_coverage.py — 학교 × 날짜 × 등하교 시간대 근무 공백 (관리자 요약)
+# - 대원별 근무 구간: 같은 대원·학교·날짜의 체크인을 시간순으로 보고 gap_min 이내로 이어지면 한 구간
+#   구간 = [첫 체크인, 마지막 체크인 + tail_min] (체크인 1건이면 tail_min 동안 근무한 것으로 봄)
+# - 시간대(SLOTS)와 구간의 겹침을 (구간 수 × 시간대 수) 배열 연산 1회로 계산 → (학교, 날짜) groupby-any 로
+#   피벗 → SCHOOL_OPTIONS × 기간 날짜 전체 격자로 reindex (학교별 루프 없음)
+# - 결과는 (저널 데이터 버전, 기간, 설정) 키로 캐시 → 날짜 선택 등 rerun에서는 다시 계산하지 않음
+#   (데이터 버전 = CheckinJournal.data_version() 쓰기 버전, 조회 전에 1회 읽어 공백 목록 표 키에도 그대로 사용)
+# - 원본은 로컬 저널(SQLite)에서 이름/근무장소/근무시간 3열만 범위 조회 (대시보드 DataFrame과 별개)
+
+import numpy as np
+import pandas as pd
+
+from checkin_table import LRUCache, render_paged_table
+
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 등하교 시간대 (라벨, 시작, 끝) — 30분 단위
+SLOTS = (
+    ("등교 07:30", "07:30", "08:00"),
+    ("등교 08:00", "08:00", "08:30"),
+    ("등교 08:30", "08:30", "09:00"),
+    ("하교 12:30", "12:30", "13:00"),
+    ("하교 13:00", "13:00", "13:30"),
+    ("하교 13:30", "13:30", "14:00"),
+    ("하교 14:00", "14:00", "14:30"),
+    ("하교 14:30", "14:30", "15:00"),
+    ("하교 15:00", "15:00", "15:30"),
+    ("하교 15:30", "15:30", "16:00"),
+)
+
+COVERAGE_CACHE = LRUCache(max_items=8)  # (데이터 버전, 기간, 설정) → build_coverage 결과
+
+
+def _minutes(hhmm: str) -> int:
+    h, m = hhmm.split(":")
+    return int(h) * 60 + int(m)
+
+
+def load_checkins(journal, start_d=None, end_d=None) -> pd.DataFrame:
+    """저널에서 [이름, 근무장소, 근무시간_dt] (벽시계 KST, tz 없음) — 시각 해석 불가 행은 제외."""
+    where, args = ["ts GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] *'"], []
+    if start_d:
+        where.append("ts >= ?")
+        args.append(f"{start_d} 00:00:00")
+    if end_d:
+        where.append("ts <= ?")
+        args.append(f"{end_d} 23:59:59")
+    rows = journal.read(f"SELECT name, school, ts FROM checkins WHERE {' AND '.join(where)}", args)
+    df = pd.DataFrame(rows, columns=["이름", "근무장소", "근무시간"])
+    df["근무시간_dt"] = pd.to_datetime(df["근무시간"], format=TS_FORMAT, errors="coerce")
+    return df.dropna(subset=["근무시간_dt"]).drop(columns="근무시간")
+
+
+def shift_spans(df: pd.DataFrame, gap_min=90, tail_min=60) -> pd.DataFrame:
+    """체크인 → 대원별 근무 구간 [이름, 근무장소, 날짜, 시작, 끝, 체크인수] (정렬 + cumsum, 그룹 루프 없음)."""
+    cols = ["이름", "근무장소", "날짜", "시작", "끝", "체크인수"]
+    if df.empty:
+        dtypes = {"이름": object, "근무장소": object, "날짜": "datetime64[ns]", "시작": "datetime64[ns]",
+                  "끝": "datetime64[ns]", "체크인수": "int64"}
+        return pd.DataFrame({c: pd.Series(dtype=dtypes[c]) for c in cols})
+    d = df[["이름", "근무장소", "근무시간_dt"]].copy()
+    d["날짜"] = d["근무시간_dt"].dt.normalize()
+    d = d.sort_values(["이름", "근무장소", "근무시간_dt"], kind="stable")
+    same = (
+        d["이름"].eq(d["이름"].shift())
+        & d["근무장소"].eq(d["근무장소"].shift())
+        & d["날짜"].eq(d["날짜"].shift())
+        & (d["근무시간_dt"].diff() <= pd.Timedelta(minutes=gap_min))
+    )
+    d["span"] = (~same).cumsum()
+    spans = d.groupby("span", sort=False).agg(
+        이름=("이름", "first"), 근무장소=("근무장소", "first"), 날짜=("날짜", "first"),
+        시작=("근무시간_dt", "min"), 끝=("근무시간_dt", "max"), 체크인수=("근무시간_dt", "size"),
+    )
+    spans["끝"] = spans["끝"] + pd.Timedelta(minutes=tail_min)
+    return spans.reset_index(drop=True)[cols]
+
+
+def coverage_matrix(spans: pd.DataFrame, schools, start_d, end_d, slots=SLOTS, weekdays_only=True) -> pd.DataFrame:
+    """(학교, 날짜) × 시간대 bool 행렬 — True = 근무 구간이 그 시간대와 겹침."""
+    labels = [s[0] for s in slots]
+    slot_lo = np.array([_minutes(s[1]) for s in slots])
+    slot_hi = np.array([_minutes(s[2]) for s in slots])
+
+    days = pd.date_range(pd.Timestamp(start_d), pd.Timestamp(end_d), freq="B" if weekdays_only else "D")
+    grid = pd.MultiIndex.from_product([list(schools), days], names=["근무장소", "날짜"])
+    if spans.empty:
+        return pd.DataFrame(False, index=grid, columns=labels)
+
+    # 구간 시작/끝 → 그 날 0시부터의 분 (자정을 넘기는 끝은 그대로 — 다음 날 시간대와는 비교하지 않음)
+    lo = ((spans["시작"] - spans["날짜"]).dt.total_seconds() // 60).to_numpy()[:, None]
+    hi = ((spans["끝"] - spans["날짜"]).dt.total_seconds() // 60).to_numpy()[:, None]
+    hit = (lo < slot_hi[None, :]) & (hi > slot_lo[None, :])
+
+    covered = pd.DataFrame(hit, columns=labels)
+    covered["근무장소"] = spans["근무장소"].to_numpy()
+    covered["날짜"] = spans["날짜"].to_numpy()
+    matrix = covered.groupby(["근무장소", "날짜"], sort=False)[labels].any()
+    return matrix.reindex(grid, fill_value=False)
+
+
+def find_gaps(matrix: pd.DataFrame) -> pd.DataFrame:
+    """공백 시간대 목록 [근무장소, 날짜, 시간대]."""
+    stacked = matrix.stack()
+    gaps = stacked[~stacked].reset_index()
+    gaps.columns = ["근무장소", "날짜", "시간대", "_"]
+    gaps["날짜"] = gaps["날짜"].dt.date
+    return gaps.drop(columns="_")
+
+
+def school_summary(matrix: pd.DataFrame) -> pd.DataFrame:
+    """학교별 [전체 칸, 공백 칸, 공백 일수, 커버율(%)] — 공백 많은 순."""
+    total = matrix.groupby(level="근무장소", sort=False).size() * matrix.shape[1]
+    open_slots = (~matrix).sum(axis=1)
+    out = pd.DataFrame({
+        "전체 칸": total,
+        "공백 칸": open_slots.groupby(level="근무장소", sort=False).sum(),
+        "공백 일수": open_slots.gt(0).groupby(level="근무장소", sort=False).sum(),
+    })
+    out["커버율"] = 100 * (1 - out["공백 칸"] / out["전체 칸"].where(out["전체 칸"] > 0))
+    return out.sort_values(["공백 칸", "전체 칸"], ascending=[False, False]).rename_axis("근무장소").reset_index()
+
+
+def build_coverage(journal, schools, start_d, end_d, gap_min=90, tail_min=60, weekdays_only=True, version=None):
+    """(구간, 행렬, 공백 목록, 학교별 요약) — (데이터 버전, 기간, 설정)당 1회 계산.
+    version: 조회 전에 읽은 journal.data_version() (없으면 여기서 읽음)"""
+    if version is None:
+        version = journal.data_version()
+    key = (version, tuple(schools), str(start_d), str(end_d), gap_min, tail_min, weekdays_only)
+
+    def build():
+        spans = shift_spans(load_checkins(journal, start_d, end_d), gap_min, tail_min)
+        matrix = coverage_matrix(spans, schools, start_d, end_d, weekdays_only=weekdays_only)
+        return spans, matrix, find_gaps(matrix), school_summary(matrix)
+
+    return COVERAGE_CACHE.get_or_build(key, build)
+
+
+# ------------------------------
+# 관리자 요약 화면
+# ------------------------------
+def _style_day(frame: pd.DataFrame):
+    """공백 칸은 빨강, 근무 칸은 초록."""
+    styler = frame.style
+    paint = getattr(styler, "map", None) or styler.applymap  # pandas 2.1 미만은 applymap
+    return paint(lambda v: "background-color: #d1e7dd" if v else "background-color: #f8d7da") \
+        .format(lambda v: "✓" if v else "공백")
+
+
+def render_coverage(journal, schools, start_d, end_d, st_key="coverage"):
+    """학교별 공백 요약 + 날짜별 학교 × 시간대 표(공백 강조) + 대원 근무 구간."""
+    import streamlit as st
+
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        gap_min = st.number_input("같은 근무로 볼 체크인 간격(분)", 15, 240, 90, step=15, key=f"{st_key}_gap")
+    with c2:
+        tail_min = st.number_input("마지막 체크인 후 근무 시간(분)", 0, 180, 60, step=15, key=f"{st_key}_tail")
+    with c3:
+        weekdays_only = st.checkbox("평일만", value=True, key=f"{st_key}_weekdays")
+
+    version = journal.data_version()
+    spans, matrix, gaps, summary = build_coverage(journal, schools, start_d, end_d, gap_min, tail_min,
+                                                  weekdays_only, version=version)
+    if matrix.empty:
+        st.info("선택한 기간에 대상 날짜가 없습니다.")
+        return
+
+    total_open = int(summary["공백 칸"].sum())
+    st.caption(f"공백 {total_open:,}칸 / 전체 {int(summary['전체 칸'].sum()):,}칸 · "
+               f"공백이 있었던 학교 {int((summary['공백 칸'] > 0).sum())}/{len(summary)}곳")
+    st.dataframe(summary, use_container_width=True, hide_index=True,
+                 column_config={"커버율": st.column_config.ProgressColumn("커버율", min_value=0, max_value=100,
+                                                                          format="%.0f%%")})
+
+    days = [d.date() for d in matrix.index.get_level_values("날짜").unique()]
+    day_key = f"{st_key}_day"
+    if st.session_state.get(day_key) not in days:  # 기간이 바뀌면 마지막 날짜로
+        st.session_state[day_key] = days[-1]
+    day = st.select_slider("날짜", options=days, key=day_key)
+    day_ts = pd.Timestamp(day)
+    st.dataframe(_style_day(matrix.xs(day_ts, level="날짜")), use_container_width=True)
+
+    day_spans = spans[spans["날짜"] == day_ts]
+    with st.expander(f"{day} 대원별 근무 구간 ({len(day_spans):,}건)"):
+        st.dataframe(
+            day_spans.assign(시작=day_spans["시작"].dt.strftime("%H:%M"), 끝=day_spans["끝"].dt.strftime("%H:%M"))
+            .drop(columns="날짜").sort_values(["근무장소", "시작"]),
+            use_container_width=True, hide_index=True,
+        )
+    with st.expander(f"전체 공백 목록 ({len(gaps):,}칸)"):
+        render_paged_table(gaps, key=(version, str(start_d), str(end_d), gap_min, tail_min, weekdays_only),
+                           st_key=f"{st_key}_gaps", use_container_width=True, hide_index=True)
+
@@ -0,0 +1,177 @@
+# checkin_dedup.py — 중복 체크인 억제 (연타 / QR 재스캔)
+# - 메모리 색인: 정규화한 (이름, 근무장소) → 마지막 체크인
+#   클라이언트가 nonce(쿼리파라미터 ?nonce=)를 보내면 (nonce, 이름, 근무장소)만으로 비교
+#   → 같은 nonce 재제출만 중복, 다른 nonce는 새 체크인 (공유된 ?nonce= 주소도 다른 대원은 막지 않음)
+#   window_sec 안의 반복 제출은 시트에 쓰지 않고 이전 기록으로 응답 (연번·쿼터·대시보드 건수 보호)
+# - 시간 버킷(bucket_sec) 단위로 보관 → 오래된 버킷을 통째로 버림 (TTL 만료, 항목별 스캔 없음)
+# - 프로세스 공용 (streamlit_app / checkin_form 공통). 재시작하면 비워짐 — 과거 중복은 아래 일괄 정리로
+# - 기존 시트 중복 일괄 정리: python checkin_dedup.py [--window-min 5] [--dry-run]
+#   같은 (이름, 근무장소)가 window 안에 다시 기록된 행을 batch_update 1회로 삭제 (첫 행만 남김)
+
+import argparse
+import os
+import re
+import threading
+import time
+import unicodedata
+from datetime import datetime
+
+from checkin_journal import normalize_ts
+
+DEFAULT_WINDOW_SEC = float(os.environ.get("CHECKIN_DEDUP_WINDOW_SEC", "300"))
+
+
+def normalize_guard(name, school):
+    """(이름, 근무장소) 비교 키: NFC 정규화 + 공백 제거 + 소문자."""
+    def norm(s):
+        s = unicodedata.normalize("NFC", str(s or ""))
+        return re.sub(r"\s+", "", s).casefold()
+    return norm(name), norm(school)
+
+
+def _key(name, school, nonce=None):
+    """색인 키: nonce가 있으면 (nonce, 이름, 근무장소), 없으면 (이름, 근무장소)."""
+    guard = normalize_guard(name, school)
+    if nonce:
+        return ("n", str(nonce)) + guard
+    return ("g",) + guard
+
+
+class DuplicateSuppressor:
+    """TTL 만료 시간 버킷 색인.
+
+    window_sec: 이 시간(초) 안의 같은 대원·장소(nonce가 있으면 같은 nonce) 재제출은 중복으로 처리
+    bucket_sec: 버킷 폭 — 만료는 버킷 단위 (최대 bucket_sec만큼 더 오래 보관)
+    """
+
+    def __init__(self, window_sec=DEFAULT_WINDOW_SEC, bucket_sec=60.0):
+        self.window_sec = window_sec
+        self.bucket_sec = bucket_sec
+        self._lock = threading.Lock()
+        self._buckets = {}   # bucket 번호 → {키: (시각, ack)}
+
+        # 상태 표시용
+        self.accepted = 0
+        self.suppressed = 0
+
+    def _evict(self, now):
+        oldest = int((now - self.window_sec) // self.bucket_sec)
+        for b in [b for b in self._buckets if b < oldest]:
+            del self._buckets[b]
+
+    def _lookup(self, key, now):
+        for b in sorted(self._buckets, reverse=True):
+            hit = self._buckets[b].get(key)
+            if hit is not None and now - hit[0] <= self.window_sec:
+                return hit
+        return None
+
+    def claim(self, name, school, nonce=None, ack=None, now=None):
+        """처음이면 등록 후 None, 중복이면 이전 ack 반환 (ack: 기록 시각 등 응답에 쓸 값)."""
+        now = time.time() if now is None else now
+        key = _key(name, school, nonce)
+        with self._lock:
+            self._evict(now)
+            hit = self._lookup(key, now)
+            if hit is not None:
+                self.suppressed += 1
+                return hit[1]
+            self._buckets.setdefault(int(now // self.bucket_sec), {})[key] = (now, ack)
+            self.accepted += 1
+            return None
+
+    def release(self, name, school, nonce=None):
+        """기록 실패 시 등록 취소 → 재시도가 중복으로 막히지 않게."""
+        key = _key(name, school, nonce)
+        with self._lock:
+            for bucket in self._buckets.values():
+                bucket.pop(key, None)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "entries": sum(len(b) for b in self._buckets.values()),
+                "accepted": self.accepted,
+                "suppressed": self.suppressed,
+                "window_sec": self.window_sec,
+            }
+
+
+_SUPPRESSOR = None
+_SUPPRESSOR_LOCK = threading.Lock()
+
+
+def get_suppressor() -> DuplicateSuppressor:
+    global _SUPPRESSOR
+    with _SUPPRESSOR_LOCK:
+        if _SUPPRESSOR is None:
+            _SUPPRESSOR = DuplicateSuppressor()
+        return _SUPPRESSOR
+
+
+# ------------------------------
+# 기존 시트 중복 일괄 정리 (1회성)
+# ------------------------------
+def find_duplicates(header, rows, window_sec=DEFAULT_WINDOW_SEC):
+    """같은 (이름, 근무장소)가 마지막으로 남긴 행으로부터 window_sec 안에 다시 나온 행 번호(0-based) 목록."""
+    col = {h.strip(): i for i, h in enumerate(header)}
+    name_i = col.get("이름", col.get("name"))
+    school_i = col.get("근무장소", col.get("school"))
+    ts_i = col.get("근무시간", col.get("timestamp_kst"))
+    if name_i is None or ts_i is None:
+        raise RuntimeError(f"헤더에 이름/근무시간 열이 없습니다: {header}")
+
+    def cell(r, i):
+        return r[i] if i is not None and i < len(r) else ""
+
+    parsed = []
+    for i, r in enumerate(rows):
+        try:
+            t = datetime.strptime(normalize_ts(cell(r, ts_i)), "%Y-%m-%d %H:%M:%S").timestamp()
+        except ValueError:
+            continue  # 시각을 알 수 없는 행은 건드리지 않음
+        parsed.append((t, i, normalize_guard(cell(r, name_i), cell(r, school_i))))
+    parsed.sort()
+
+    kept = {}   # 키 → 남긴 행의 시각
+    dups = []
+    for t, i, key in parsed:
+        last = kept.get(key)
+        if last is not None and t - last <= window_sec:
+            dups.append(i)
+        else:
+            kept[key] = t
+    return sorted(dups)
+
+
+def dedupe_sheet(sh, worksheet_name="Sheet1", window_sec=DEFAULT_WINDOW_SEC, dry_run=False, log=print):
+    """시트의 중복 행을 찾아 삭제 (dry_run이면 개수만). 삭제(예정) 행 번호 목록 반환."""
+    from sheet_archive import delete_data_rows
+
+    ws = sh.worksheet(worksheet_name)
+    values = ws.get_all_values()
+    if len(values) < 2:
+        return []
+    dups = find_duplicates(values[0], values[1:], window_sec)
+    log(f"🔁 {worksheet_name}: {len(values) - 1:,}행 중 중복 {len(dups):,}행 (기준 {window_sec / 60:g}분)")
+    if dups and not dry_run:
+        delete_data_rows(sh, ws, dups)
+        log(f"🧹 {len(dups):,}행 삭제")
+    return dups
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="체크인기록 중복 행 일괄 정리")
+    parser.add_argument("--spreadsheet", default="체크인기록")
+    parser.add_argument("--worksheet", default="Sheet1")
+    parser.add_argument("--window-min", type=float, default=DEFAULT_WINDOW_SEC / 60)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    from sheets_client import open_spreadsheet
+
+    dedupe_sheet(open_spreadsheet(args.spreadsheet), args.worksheet, args.window_min * 60, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
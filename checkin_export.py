@@ -0,0 +1,151 @@
+# checkin_export.py — 체크인 기록 내보내기 (CSV / Parquet / Excel), 요청할 때만 생성
+# - 대시보드 rerun마다 CSV를 만들지 않음: "내보내기" 버튼을 눌렀을 때만 생성 → 다운로드 버튼 표시
+# - CSV: 행 묶음(chunk) 단위로 BytesIO 1개에 바로 기록 (BOM은 맨 앞에 1회, 헤더도 1회)
+#   → StringIO 전체 문자열 + encode 전체 복사 같은 중복 사본 없음
+# - Parquet(pyarrow) / Excel(openpyxl 또는 xlsxwriter)은 설치돼 있을 때만 선택지에 표시
+# - 결과 바이트는 (형식, 데이터 버전, 필터) 키로 LRU 캐시 → 같은 조건 재다운로드는 즉시
+#   (데이터 버전 = CheckinJournal.data_version() 쓰기 버전 → 연번이 채워지면 새 파일로 다시 생성)
+
+import importlib.util
+import io
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+BOM = "\ufeff".encode("utf-8")
+
+# 형식 → (표시 이름, MIME, 확장자)
+FORMATS = {
+    "csv": ("CSV", "text/csv", ".csv"),
+    "parquet": ("Parquet", "application/vnd.apache.parquet", ".parquet"),
+    "xlsx": ("Excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ".xlsx"),
+}
+
+
+def _has(module):
+    return importlib.util.find_spec(module) is not None
+
+
+def available_formats():
+    """현재 환경에서 만들 수 있는 형식 (CSV는 항상)."""
+    out = ["csv"]
+    if _has("pyarrow") or _has("fastparquet"):
+        out.append("parquet")
+    if _has("xlsxwriter") or _has("openpyxl"):
+        out.append("xlsx")
+    return out
+
+
+def write_csv(df: pd.DataFrame, out, chunk_rows=20_000):
+    """df → out(바이너리 파일 객체)에 UTF-8 BOM CSV를 chunk_rows 행씩 기록."""
+    out.write(BOM)
+    for start in range(0, max(len(df), 1), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        out.write(chunk.to_csv(index=False, header=start == 0, lineterminator="\n").encode("utf-8"))
+
+
+def _excel_frame(df: pd.DataFrame) -> pd.DataFrame:
+    # Excel은 시간대 정보를 저장할 수 없음 → KST 벽시계 시각으로
+    tz_cols = [c for c in df.columns if isinstance(df[c].dtype, pd.DatetimeTZDtype)]
+    if not tz_cols:
+        return df
+    return df.assign(**{c: df[c].dt.tz_localize(None) for c in tz_cols})
+
+
+def to_bytes(df: pd.DataFrame, fmt: str) -> bytes:
+    """df → 지정 형식 파일 바이트."""
+    buf = io.BytesIO()
+    if fmt == "csv":
+        write_csv(df, buf)
+    elif fmt == "parquet":
+        df.to_parquet(buf, index=False)
+    elif fmt == "xlsx":
+        engine = "xlsxwriter" if _has("xlsxwriter") else "openpyxl"
+        with pd.ExcelWriter(buf, engine=engine) as xw:
+            _excel_frame(df).to_excel(xw, index=False, sheet_name="체크인기록")
+    else:
+        raise ValueError(f"알 수 없는 형식: {fmt}")
+    return buf.getvalue()
+
+
+class ExportCache:
+    """(형식, 데이터 버전, 필터) → 파일 바이트. 항목 수·총 바이트 기준으로 오래된 것부터 제거."""
+
+    def __init__(self, max_items=16, max_bytes=128 * 1024 * 1024):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def get(self, key):
+        with self._lock:
+            data = self._data.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data: bytes):
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._data[key] = data
+            self._bytes += len(data)
+            while self._data and (len(self._data) > self.max_items or self._bytes > self.max_bytes):
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {"items": len(self._data), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+
+EXPORT_CACHE = ExportCache()
+
+
+def export_bytes(build_frame, fmt: str, key) -> bytes:
+    """캐시 우선. 없으면 build_frame()으로 DataFrame을 만들어 변환 후 저장."""
+    cache_key = (fmt,) + tuple(key)
+    data = EXPORT_CACHE.get(cache_key)
+    if data is None:
+        data = to_bytes(build_frame(), fmt)
+        EXPORT_CACHE.put(cache_key, data)
+    return data
+
+
+def render_export(build_frame, key, base_name, st_key="export"):
+    """대시보드용 내보내기 UI: 형식 선택 + [내보내기] 클릭 시에만 생성 → 다운로드 버튼.
+    build_frame: 내보낼 DataFrame을 돌려주는 함수 (클릭했을 때만 호출)
+    key: (데이터 버전, 필터...) — 같은 키면 캐시된 파일 재사용.
+    데이터 버전은 build_frame이 돌려줄 데이터를 조회하기 전에 읽은 CheckinJournal.data_version()"""
+    import streamlit as st
+
+    fmts = available_formats()
+    c1, c2 = st.columns([1, 3])
+    with c1:
+        fmt = st.selectbox("형식", fmts, format_func=lambda f: FORMATS[f][0], key=f"{st_key}_fmt")
+    with c2:
+        st.write("")
+        requested = st.button("⬇️ 내보내기", key=f"{st_key}_make")
+    if requested or (fmt,) + tuple(key) in EXPORT_CACHE:
+        label, mime, ext = FORMATS[fmt]
+        with st.spinner(f"{label} 파일 만드는 중..."):
+            data = export_bytes(build_frame, fmt, key)
+        st.download_button(
+            f"{label} 내려받기 ({len(data) / 1024:,.0f}KB)",
+            data=data, file_name=f"{base_name}{ext}", mime=mime, key=f"{st_key}_dl",
+        )
+    missing = [FORMATS[f][0] for f in FORMATS if f not in fmts]
+    if missing:
+        st.caption(f"{', '.join(missing)} 내보내기는 pyarrow / openpyxl 설치 시 사용 가능")
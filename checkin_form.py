@@ -1,6 +1,9 @@
 import streamlit as st
+import perf_metrics
 from log_to_sheet import log_checkin
 
+perf_metrics.begin_rerun()
+
 st.set_page_config(page_title="체크인 폼")
 
 st.title("✅ 아동안전지킴이 체크인 폼")
@@ -22,7 +25,11 @@ else:
 # ✅ 체크인 버튼
 if st.button("📌 체크인"):
     if name and school:
-        log_checkin(name, school)
-        st.success("🎉 체크인이 성공적으로 기록되었습니다!")
+        if log_checkin(name, school, nonce=st.query_params.get("nonce")):
+            st.success("🎉 체크인이 성공적으로 기록되었습니다!")
+        else:
+            st.success("🎉 이미 체크인되었습니다. (중복 제출은 기록하지 않습니다)")
     else:
         st.error("⚠️ 이름과 학교를 모두 입력해주세요.")
+
+perf_metrics.end_rerun("checkin_form")
@@ -0,0 +1,95 @@
+# checkin_ingest.py — 시트/저널 원본 값 → 타입이 정해진 체크인 DataFrame (벡터화 1회 변환)
+# - 근무시간: 고정 형식('%Y-%m-%d %H:%M:%S')으로 한 번에 파싱 + KST 지정 (형식이 다른 행만 개별 파싱)
+# - 연번: nullable 정수(Int64) / 이름·근무장소: category
+# - 구 4열([연번, 이름, 근무장소, 근무시간]) · 신 5열(+특이사항) · 구 영문 헤더를 모두 같은 열로 정규화
+# - admin_qr_checkin_only.py / streamlit_app.py 관리자 요약 공용
+
+import pandas as pd
+
+import perf_metrics
+
+KST = "Asia/Seoul"
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+COLUMNS = ["연번", "이름", "근무장소", "근무시간", "특이사항"]
+
+# 구 영문 헤더 → 표준 헤더
+HEADER_ALIASES = {
+    "seq": "연번",
+    "name": "이름",
+    "school": "근무장소",
+    "timestamp_kst": "근무시간",
+    "note": "특이사항",
+}
+
+# streamlit_app 관리자 요약 표시용 영문 열 이름
+ENGLISH_COLUMNS = {
+    "연번": "seq",
+    "이름": "name",
+    "근무장소": "school",
+    "근무시간_dt": "timestamp_kst",
+    "특이사항": "note",
+}
+
+
+def normalize_header(header):
+    """헤더 공백 제거 + 구 영문 헤더를 표준 헤더로."""
+    return [HEADER_ALIASES.get(str(h).strip(), str(h).strip()) for h in header]
+
+
+def _parse_one(x):
+    """고정 형식이 아닌 값만 개별 파싱 (tz 포함 문자열은 KST 벽시계 시각으로)."""
+    try:
+        t = pd.to_datetime(x, errors="coerce")
+    except Exception:
+        return pd.NaT
+    if pd.isna(t):
+        return pd.NaT
+    if t.tzinfo is not None:
+        t = t.tz_convert(KST).tz_localize(None)
+    return t
+
+
+def parse_kst(values: pd.Series) -> pd.Series:
+    """문자열 열 → tz-aware(KST) datetime 열. 대부분의 행은 고정 형식 벡터 파싱."""
+    s = values.astype(str).str.strip()
+    dt = pd.to_datetime(s, format=TS_FORMAT, errors="coerce")
+    miss = dt.isna() & s.ne("") & s.ne("nan")
+    if miss.any():
+        dt = dt.astype("datetime64[ns]")
+        dt.loc[miss] = pd.to_datetime(s[miss].map(_parse_one), errors="coerce")
+    return dt.dt.tz_localize(KST, ambiguous="NaT", nonexistent="NaT")
+
+
+def to_frame(header, rows) -> pd.DataFrame:
+    """원본 값(header, rows) → 타입 지정 DataFrame.
+    열: 연번(Int64), 이름/근무장소(category), 근무시간(원문), 특이사항, 근무시간_dt(KST), 날짜, 시간"""
+    with perf_metrics.span("df_parse"):
+        return _to_frame(header, rows)
+
+
+def _to_frame(header, rows) -> pd.DataFrame:
+    header = normalize_header(header) if header else list(COLUMNS)
+    df = pd.DataFrame(rows, columns=header)
+    df = df.loc[:, ~df.columns.duplicated()]
+
+    # 구 4열 스키마 등 빠진 열 보강
+    for c in COLUMNS:
+        if c not in df.columns:
+            df[c] = ""
+
+    df["연번"] = pd.to_numeric(df["연번"].astype(str).str.strip(), errors="coerce").astype("Int64")
+    df["이름"] = df["이름"].astype(str).str.strip().astype("category")
+    df["근무장소"] = df["근무장소"].astype(str).str.strip().astype("category")
+    df["근무시간"] = df["근무시간"].astype(str).str.strip()
+    df["특이사항"] = df["특이사항"].fillna("").astype(str)
+
+    df["근무시간_dt"] = parse_kst(df["근무시간"])
+    df["날짜"] = df["근무시간_dt"].dt.date
+    # strftime보다 빠름 (time 객체 문자열은 항상 'HH:MM:SS' — 초 단위 기록이므로)
+    df["시간"] = df["근무시간_dt"].dt.time.astype(str).where(df["근무시간_dt"].notna())
+    return df
+
+
+def to_english(df: pd.DataFrame) -> pd.DataFrame:
+    """streamlit_app 관리자 요약용 열 이름(seq/name/school/timestamp_kst/note)."""
+    return df[list(ENGLISH_COLUMNS)].rename(columns=ENGLISH_COLUMNS)
@@ -0,0 +1,322 @@
+# checkin_journal.py — 로컬 체크인 저널 (SQLite WAL) + 시트 복제 상태
+# - 체크인은 먼저 로컬 SQLite에 커밋(수 ms) → 이후 쓰기 큐가 "체크인기록" 시트로 비동기 복제
+# - row_key = (이름, 근무장소, 근무시간) 해시 → 재전송/재시작 시에도 같은 행은 한 번만 반영(멱등)
+# - 복제 완료 전(replicated_at IS NULL) 행은 재시작 시 다시 큐에 넣음 (at-least-once)
+# - 시트의 기존 행도 증분 동기화로 가져와 같은 테이블에 색인 → 관리자 화면은 로컬에서 범위 조회
+# - 대시보드 지표용 사전 집계 테이블은 checkin_rollup.py (같은 DB, 트리거로 증분 유지)
+# - 월별 보관 파티션(sheet_archive.py)에서 가져온 행은 source='archive' — 시트 전체 재동기화 때 지우지 않음
+# - sheet_migrate.py로 정리된(스키마 도장이 맞는) 시트는 canonical=True → 행별 시각 정규화 생략
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from checkin_rollup import install as install_rollups
+
+DEFAULT_PATH = os.environ.get("CHECKIN_JOURNAL_PATH", "checkin_journal.db")
+COLUMNS = ["연번", "이름", "근무장소", "근무시간", "특이사항"]
+
+# 시트 헤더(신/구) → 저널 컬럼
+_HEADER_MAP = {
+    "연번": "seq", "seq": "seq",
+    "이름": "name", "name": "name",
+    "근무장소": "school", "school": "school",
+    "근무시간": "ts", "timestamp_kst": "ts",
+    "특이사항": "note", "note": "note",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkins (
+    row_key       TEXT PRIMARY KEY,
+    seq           INTEGER,
+    name          TEXT NOT NULL,
+    school        TEXT NOT NULL,
+    ts            TEXT NOT NULL,   -- 'YYYY-MM-DD HH:MM:SS' (KST)
+    note          TEXT NOT NULL DEFAULT '',
+    source        TEXT NOT NULL,   -- 'local' | 'sheet' | 'archive'
+    created_at    REAL NOT NULL,
+    replicated_at REAL             -- NULL = 시트 미반영
+);
+CREATE INDEX IF NOT EXISTS idx_checkins_ts ON checkins(ts);
+CREATE INDEX IF NOT EXISTS idx_checkins_school_ts ON checkins(school, ts);
+CREATE INDEX IF NOT EXISTS idx_checkins_name_ts ON checkins(name, ts);
+CREATE INDEX IF NOT EXISTS idx_checkins_pending ON checkins(created_at) WHERE replicated_at IS NULL;
+CREATE TABLE IF NOT EXISTS journal_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def row_key(name, school, ts) -> str:
+    """행 멱등 키 — 같은 사람·장소·시각이면 같은 키."""
+    raw = f"{str(name).strip()}\x1f{str(school).strip()}\x1f{str(ts).strip()}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+
+def normalize_ts(ts) -> str:
+    """시각 문자열을 'YYYY-MM-DD HH:MM:SS'로 (해석 불가 시 원문 유지)."""
+    s = str(ts).strip()
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y/%m/%d %H:%M:%S", "%Y/%m/%d %H:%M", "%Y-%m-%dT%H:%M:%S"):
+        try:
+            return datetime.strptime(s, fmt).strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            continue
+    return s
+
+
+def _to_int(x):
+    try:
+        return int(str(x).strip())
+    except Exception:
+        return None
+
+
+class CheckinJournal:
+    """체크인 로컬 저널. 스레드 간 공유 가능 (내부 lock)."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        install_rollups(self)
+        self.mirrored_version = None  # 마지막으로 가져온 시트 동기화 버전
+        row = self._conn.execute("SELECT value FROM journal_meta WHERE key = 'hot_start'").fetchone()
+        self._hot_start = row[0] if row else None
+        self.replication_started = False
+
+    @property
+    def hot_start(self):
+        """'YYYY-MM-DD' — 이 날짜 이전은 보관 파티션 소관 (sheet_archive가 설정).
+        DB에 저장 → 재시작 직후 첫 전체 재동기화(replace)도 보관된 달의 행을 지우지 않음."""
+        return self._hot_start
+
+    @hot_start.setter
+    def hot_start(self, value):
+        if value == self._hot_start:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO journal_meta(key, value) VALUES ('hot_start', ?)", (value,)
+            )
+            self._hot_start = value
+
+    # ------------------------------
+    # 쓰기
+    # ------------------------------
+    def _bump_version(self):
+        """쓰기 버전 +1 (lock 안에서 호출) — 행 추가/삭제뿐 아니라 연번 채움·복제 표시도 반영.
+        DB에 저장 → 같은 파일을 여는 다른 프로세스(관리자 페이지)도 바뀐 것을 봄."""
+        self._conn.execute(
+            "INSERT INTO journal_meta(key, value) VALUES ('data_version', 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+        )
+
+    def append(self, name, school, ts, note="") -> str:
+        """로컬 커밋 후 row_key 반환. 같은 키가 이미 있으면 무시."""
+        key = row_key(name, school, ts)
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO checkins(row_key, name, school, ts, note, source, created_at) "
+                "VALUES (?, ?, ?, ?, ?, 'local', ?)",
+                (key, str(name).strip(), str(school).strip(), normalize_ts(ts), str(note).strip(), time.time()),
+            )
+            if cur.rowcount:
+                self._bump_version()
+        return key
+
+    def mark_replicated(self, flushed):
+        """flushed: [(row_key, 연번), ...] — 시트 반영 완료 표시."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "UPDATE checkins SET seq = ?, replicated_at = ? WHERE row_key = ?",
+                [(seq, now, key) for key, seq in flushed if key],
+            )
+            self._bump_version()
+            self._conn.execute("COMMIT")
+
+    def pending(self, limit=None):
+        """시트 미반영 행 [(row_key, [이름, 근무장소, 근무시간, 특이사항]), ...] (기록 순)."""
+        sql = ("SELECT row_key, name, school, ts, note FROM checkins "
+               "WHERE replicated_at IS NULL ORDER BY created_at")
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            return [(r[0], list(r[1:])) for r in self._conn.execute(sql)]
+
+    def mirror_sheet(self, header, rows, replace=False, source="sheet", canonical=False):
+        """시트 행을 색인에 반영. 로컬 미반영 행과 키가 같으면 복제 완료로 표시.
+        replace=True: 시트 전체 재동기화 — 기존 시트 미러를 지우고 다시 채움
+        (미반영 로컬 행과 hot_start 이전 보관 파티션 행은 유지).
+        canonical=True: 근무시간이 이미 표준 형식 (마이그레이션 완료 시트) — normalize_ts 생략."""
+        idx = {_HEADER_MAP[h]: i for i, h in enumerate(header) if h in _HEADER_MAP}
+        if "name" not in idx or "ts" not in idx:
+            return 0
+
+        def get(r, col):
+            i = idx.get(col)
+            return r[i] if i is not None and i < len(r) else ""
+
+        norm_ts = (lambda s: str(s).strip()) if canonical else normalize_ts
+        now = time.time()
+        params = []
+        for r in rows:
+            name, school, ts = get(r, "name"), get(r, "school"), get(r, "ts")
+            if not str(name).strip() and not str(ts).strip():
+                continue
+            params.append((
+                row_key(name, school, ts), _to_int(get(r, "seq")), str(name).strip(), str(school).strip(),
+                norm_ts(ts), str(get(r, "note")).strip(), source, now, now,
+            ))
+        with self._lock:
+            self._conn.execute("BEGIN")
+            if replace and self.hot_start:
+                self._conn.execute(
+                    "DELETE FROM checkins WHERE replicated_at IS NOT NULL AND source != 'archive' AND ts >= ?",
+                    (self.hot_start,),
+                )
+            elif replace:
+                self._conn.execute("DELETE FROM checkins WHERE replicated_at IS NOT NULL AND source != 'archive'")
+            self._conn.executemany(
+                "INSERT INTO checkins(row_key, seq, name, school, ts, note, source, created_at, replicated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(row_key) DO UPDATE SET "
+                "seq = COALESCE(excluded.seq, checkins.seq), replicated_at = excluded.replicated_at, "
+                "source = CASE WHEN excluded.source = 'archive' THEN 'archive' ELSE checkins.source END",
+                params,
+            )
+            if params or replace:
+                self._bump_version()
+            self._conn.execute("COMMIT")
+        return len(params)
+
+    def sync_from(self, sync, canonical=False):
+        """SheetDeltaSync의 새 행만 색인에 반영 (전체 재동기화 시 미러 교체).
+        canonical: 시트 스키마 도장이 맞음 (sheet_migrate.get_schema_stamp(...).matches())."""
+        header, rows = sync.refresh()
+        gen, n = sync.version
+        last = self.mirrored_version
+        if last is not None and last[0] == gen:
+            if n > last[1]:
+                self.mirror_sheet(header, rows[last[1]:n], canonical=canonical)
+        else:
+            self.mirror_sheet(header, rows[:n], replace=True, canonical=canonical)
+        self.mirrored_version = (gen, n)
+
+    # ------------------------------
+    # 조회
+    # ------------------------------
+    def query(self, start_date=None, end_date=None, school=None, name=None):
+        """근무시간 범위 조회 (색인 사용). COLUMNS 순서의 행 목록 반환."""
+        where, args = [], []
+        if start_date:
+            where.append("ts >= ?")
+            args.append(f"{start_date} 00:00:00")
+        if end_date:
+            where.append("ts <= ?")
+            args.append(f"{end_date} 23:59:59")
+        if school:
+            where.append("school = ?")
+            args.append(school)
+        if name:
+            where.append("name = ?")
+            args.append(name)
+        sql = "SELECT seq, name, school, ts, note FROM checkins"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY ts"
+        with self._lock:
+            return [["" if v is None else v for v in r] for r in self._conn.execute(sql, args)]
+
+    def read(self, sql, args=()):
+        """읽기 전용 SQL 실행 → 행 목록 (집계 조회용)."""
+        with self._lock:
+            return self._conn.execute(sql, args).fetchall()
+
+    def execute(self, sql, args=()):
+        """단일 쓰기 SQL 실행 (보관 파티션 적재 기록 등)."""
+        with self._lock:
+            self._conn.execute(sql, args)
+
+    def script(self, sql):
+        """여러 문장 SQL 실행 (스키마/집계 재계산용)."""
+        with self._lock:
+            self._conn.executescript(sql)
+
+    def data_version(self) -> int:
+        """색인 데이터 버전 — append / mark_replicated / mirror_sheet(sync_from, 보관 적재 포함)마다 증가
+        (검색 색인·정렬·내보내기 캐시 키). 연번만 채워져도 바뀜."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM journal_meta WHERE key = 'data_version'").fetchone()
+        return int(row[0]) if row else 0
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM checkins").fetchone()[0]
+
+    def date_bounds(self):
+        """(가장 이른 날짜, 가장 늦은 날짜) 'YYYY-MM-DD' 문자열 — 기록 없으면 (None, None)."""
+        with self._lock:
+            lo, hi = self._conn.execute(
+                "SELECT MIN(ts), MAX(ts) FROM checkins WHERE ts GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'"
+            ).fetchone()
+        return (lo[:10] if lo else None, hi[:10] if hi else None)
+
+    def status(self) -> dict:
+        """복제 지연: 미반영 건수 / 가장 오래된 미반영 행의 경과 시간(초)."""
+        with self._lock:
+            cnt, oldest = self._conn.execute(
+                "SELECT COUNT(*), MIN(created_at) FROM checkins WHERE replicated_at IS NULL"
+            ).fetchone()
+        return {
+            "pending": cnt,
+            "lag_sec": round(time.time() - oldest, 1) if oldest else 0.0,
+        }
+
+
+# ------------------------------
+# 복제 연결 (쓰기 큐 ↔ 저널)
+# ------------------------------
+def start_replication(journal, queue, sync=None):
+    """재시작 복구: 미반영 행을 큐에 다시 넣음.
+    sync가 있으면 먼저 시트를 미러링해 이미 반영된 행(키 일치)은 건너뜀 → 중복 없음.
+    저널당 1회만 — 같은 프로세스의 다른 진입점(streamlit_app / log_to_sheet)이 다시 부르면
+    아직 큐에 있는 행을 또 넣게 되므로 무시."""
+    with journal._lock:
+        if journal.replication_started:
+            return 0
+        journal.replication_started = True
+    pending = journal.pending()
+    if pending and sync is not None:
+        try:
+            journal.sync_from(sync)
+            pending = journal.pending()
+        except Exception:
+            pass  # 시트 확인 실패 시에도 일단 재전송 (큐가 꼬리 확인으로 중복 방지)
+    for key, row in pending:
+        queue.submit(row, key=key)
+    return len(pending)
+
+
+# ------------------------------
+# 프로세스 공용 레지스트리
+# ------------------------------
+_JOURNALS = {}
+_JOURNALS_LOCK = threading.Lock()
+
+
+def get_journal(path=DEFAULT_PATH) -> CheckinJournal:
+    with _JOURNALS_LOCK:
+        j = _JOURNALS.get(path)
+        if j is None:
+            j = CheckinJournal(path)
+            _JOURNALS[path] = j
+        return j
@@ -0,0 +1,149 @@
+# checkin_rollup.py — 대시보드 지표용 사전 집계 (로컬 저널 SQLite 안에서 증분 유지)
+# - rollup_school_day: 일자 × 근무장소별 체크인 수 / 첫·마지막 체크인 시각
+# - rollup_guard_day : 일자 × 근무장소 × 이름별 체크인 수 (일자별 고유 인원, 이름 조건 집계용)
+# - checkins 테이블 INSERT/DELETE 트리거가 해당 일자 칸만 갱신 → 이력을 다시 훑지 않음
+# - 지표/일자별 추이/기간 합계는 집계 테이블만 조회 → 이력이 몇 년이 쌓여도 조회 비용은 (일수 × 학교 수) 수준
+
+_DAY_GLOB = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*"
+
+ROLLUP_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS rollup_school_day (
+    day      TEXT NOT NULL,
+    school   TEXT NOT NULL,
+    cnt      INTEGER NOT NULL,
+    first_ts TEXT,
+    last_ts  TEXT,
+    PRIMARY KEY (day, school)
+);
+CREATE TABLE IF NOT EXISTS rollup_guard_day (
+    day    TEXT NOT NULL,
+    school TEXT NOT NULL,
+    name   TEXT NOT NULL,
+    cnt    INTEGER NOT NULL,
+    PRIMARY KEY (day, school, name)
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_rollup_insert AFTER INSERT ON checkins
+WHEN NEW.ts GLOB '{_DAY_GLOB}'
+BEGIN
+    INSERT INTO rollup_school_day(day, school, cnt, first_ts, last_ts)
+    VALUES (substr(NEW.ts, 1, 10), NEW.school, 1, NEW.ts, NEW.ts)
+    ON CONFLICT(day, school) DO UPDATE SET
+        cnt = cnt + 1,
+        first_ts = min(first_ts, excluded.first_ts),
+        last_ts = max(last_ts, excluded.last_ts);
+    INSERT INTO rollup_guard_day(day, school, name, cnt)
+    VALUES (substr(NEW.ts, 1, 10), NEW.school, NEW.name, 1)
+    ON CONFLICT(day, school, name) DO UPDATE SET cnt = cnt + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rollup_delete AFTER DELETE ON checkins
+WHEN OLD.ts GLOB '{_DAY_GLOB}'
+BEGIN
+    UPDATE rollup_school_day SET
+        cnt = cnt - 1,
+        first_ts = (SELECT MIN(ts) FROM checkins
+                    WHERE school = OLD.school AND ts >= substr(OLD.ts, 1, 10) AND ts < substr(OLD.ts, 1, 10) || 'z'),
+        last_ts = (SELECT MAX(ts) FROM checkins
+                   WHERE school = OLD.school AND ts >= substr(OLD.ts, 1, 10) AND ts < substr(OLD.ts, 1, 10) || 'z')
+    WHERE day = substr(OLD.ts, 1, 10) AND school = OLD.school;
+    DELETE FROM rollup_school_day WHERE day = substr(OLD.ts, 1, 10) AND school = OLD.school AND cnt <= 0;
+    UPDATE rollup_guard_day SET cnt = cnt - 1
+    WHERE day = substr(OLD.ts, 1, 10) AND school = OLD.school AND name = OLD.name;
+    DELETE FROM rollup_guard_day
+    WHERE day = substr(OLD.ts, 1, 10) AND school = OLD.school AND name = OLD.name AND cnt <= 0;
+END;
+"""
+
+_REBUILD = f"""
+DELETE FROM rollup_school_day;
+DELETE FROM rollup_guard_day;
+INSERT INTO rollup_school_day(day, school, cnt, first_ts, last_ts)
+    SELECT substr(ts, 1, 10), school, COUNT(*), MIN(ts), MAX(ts)
+    FROM checkins WHERE ts GLOB '{_DAY_GLOB}' GROUP BY 1, 2;
+INSERT INTO rollup_guard_day(day, school, name, cnt)
+    SELECT substr(ts, 1, 10), school, name, COUNT(*)
+    FROM checkins WHERE ts GLOB '{_DAY_GLOB}' GROUP BY 1, 2, 3;
+"""
+
+
+def install(journal):
+    """저널 DB에 집계 테이블/트리거 생성. 처음 만들 때만 기존 이력으로 1회 채움."""
+    fresh = not journal.read("SELECT name FROM sqlite_master WHERE name = 'rollup_school_day'")
+    journal.script(ROLLUP_SCHEMA)
+    if fresh:
+        journal.script(_REBUILD)
+
+
+def rebuild(journal):
+    """관리자용: 집계 테이블을 이력에서 다시 계산."""
+    journal.script(_REBUILD)
+
+
+def _where(start_date, end_date, name_kw="", place_kw="", names=None, places=None):
+    where, args = ["1 = 1"], []
+    if start_date:
+        where.append("day >= ?")
+        args.append(str(start_date))
+    if end_date:
+        where.append("day <= ?")
+        args.append(str(end_date))
+    if name_kw:
+        where.append("instr(name, ?) > 0")
+        args.append(name_kw)
+    if place_kw:
+        where.append("instr(school, ?) > 0")
+        args.append(place_kw)
+    # 검색 색인(checkin_search)이 고른 값 목록 — 초성 검색 등 instr로 표현할 수 없는 조건
+    if names is not None:
+        where.append(f"name IN ({','.join('?' * len(names)) or 'NULL'})")
+        args.extend(names)
+    if places is not None:
+        where.append(f"school IN ({','.join('?' * len(places)) or 'NULL'})")
+        args.extend(places)
+    return " AND ".join(where), args
+
+
+def _table(name_kw, names=None):
+    # 이름 조건이 있으면 이름 단위 집계, 없으면 더 작은 학교 단위 집계 사용
+    return "rollup_guard_day" if name_kw or names is not None else "rollup_school_day"
+
+
+def total(journal) -> int:
+    """전체 체크인 수 (시각이 올바른 행)."""
+    return journal.read("SELECT COALESCE(SUM(cnt), 0) FROM rollup_school_day")[0][0]
+
+
+def summary(journal, start_date=None, end_date=None, name_kw="", place_kw="", names=None, places=None) -> dict:
+    """기간(+이름/근무장소 포함 검색, 또는 names/places 값 목록) 합계: 체크인 수 / 고유 인원 / 고유 근무장소."""
+    where, args = _where(start_date, end_date, name_kw, place_kw, names, places)
+    cnt, n_places = journal.read(
+        f"SELECT COALESCE(SUM(cnt), 0), COUNT(DISTINCT school) FROM {_table(name_kw, names)} WHERE {where}", args
+    )[0]
+    n_names = journal.read(f"SELECT COUNT(DISTINCT name) FROM rollup_guard_day WHERE {where}", args)[0][0]
+    return {"count": cnt, "names": n_names, "places": n_places}
+
+
+def daily_counts(journal, start_date=None, end_date=None, name_kw="", place_kw="", names=None, places=None):
+    """일자별 체크인 수 [(day, cnt), ...] (일자 오름차순)."""
+    where, args = _where(start_date, end_date, name_kw, place_kw, names, places)
+    return journal.read(
+        f"SELECT day, SUM(cnt) FROM {_table(name_kw, names)} WHERE {where} GROUP BY day ORDER BY day", args
+    )
+
+
+def daily_guards(journal, start_date=None, end_date=None):
+    """일자별 고유 인원 수 [(day, 명), ...]."""
+    where, args = _where(start_date, end_date)
+    return journal.read(
+        f"SELECT day, COUNT(DISTINCT name) FROM rollup_guard_day WHERE {where} GROUP BY day ORDER BY day", args
+    )
+
+
+def school_times(journal, start_date=None, end_date=None, place_kw="", places=None):
+    """근무장소별 기간 합계: [(근무장소, 체크인 수, 근무일수, 첫 체크인, 마지막 체크인), ...]."""
+    where, args = _where(start_date, end_date, place_kw=place_kw, places=places)
+    return journal.read(
+        f"SELECT school, SUM(cnt), COUNT(*), MIN(first_ts), MAX(last_ts) FROM rollup_school_day "
+        f"WHERE {where} GROUP BY school ORDER BY school", args
+    )
@@ -0,0 +1,131 @@
+# checkin_search.py — 관리자 대시보드 이름/근무장소 검색 색인 (초성 검색 포함)
+# - 데이터 버전별로 1회 구축 → 키 입력마다 rerun 되어도 전체 행을 다시 훑지 않음
+# - 이름/근무장소는 category 열 → 고유값(카테고리)만 색인: 1·2글자 n-gram → 카테고리 번호 postings
+#   검색어 n-gram postings 교집합으로 후보를 좁힌 뒤 포함 여부만 확인
+# - 초성 검색: 검색어에 초성(ㄱ~ㅎ)이 있고 완성형 글자가 없으면 "ㅎㄱㄷ" → 홍길동 (초성 문자열 색인 사용)
+# - 행 위치: 카테고리별 행 구간(정렬된 위치 배열) + 날짜 정렬 순서 → 이름 ∩ 근무장소 ∩ 날짜 범위는
+#   위치 배열 교집합 (전체 행 boolean mask 없음)
+
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+_HANGUL_BASE = 0xAC00
+_HANGUL_LAST = 0xD7A3
+_CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_CHOSEONG_SET = set(_CHOSEONG)
+
+
+def choseong(s: str) -> str:
+    """한글 음절 → 초성 (그 외 글자는 그대로). '홍길동' → 'ㅎㄱㄷ'."""
+    out = []
+    for ch in str(s):
+        code = ord(ch)
+        if _HANGUL_BASE <= code <= _HANGUL_LAST:
+            out.append(_CHOSEONG[(code - _HANGUL_BASE) // 588])
+        else:
+            out.append(ch)
+    return "".join(out)
+
+
+def is_choseong_query(q: str) -> bool:
+    """초성이 하나 이상 있고 완성형 한글이 없으면 초성 검색 ('ㄷㅇ1' → 대원1)."""
+    return any(ch in _CHOSEONG_SET for ch in q) and not any(
+        _HANGUL_BASE <= ord(ch) <= _HANGUL_LAST for ch in q)
+
+
+def _normalize(s) -> str:
+    return str(s).replace(" ", "").casefold()
+
+
+def _grams(s: str):
+    grams = set(s)
+    grams.update(s[i:i + 2] for i in range(len(s) - 1))
+    return grams
+
+
+class FieldIndex:
+    """category 열 1개의 검색 색인."""
+
+    def __init__(self, column: pd.Series):
+        col = column.astype("category")
+        self.values = [str(v) for v in col.cat.categories]
+        codes = col.cat.codes.to_numpy()
+
+        self._text = [_normalize(v) for v in self.values]
+        self._cho = [choseong(t) for t in self._text]
+        self._postings = defaultdict(set)      # n-gram → 카테고리 번호
+        self._cho_postings = defaultdict(set)
+        for i, (t, c) in enumerate(zip(self._text, self._cho)):
+            for g in _grams(t):
+                self._postings[g].add(i)
+            for g in _grams(c):
+                self._cho_postings[g].add(i)
+
+        # 카테고리별 행 위치: 코드 기준 안정 정렬 → 카테고리 i의 행 = _order[_starts[i]:_starts[i + 1]]
+        self._order = np.argsort(codes, kind="stable")
+        self._starts = np.searchsorted(codes[self._order], np.arange(len(self.values) + 1))
+
+    def match(self, query: str):
+        """검색어를 포함하는(또는 초성이 일치하는) 카테고리 번호 목록."""
+        q = _normalize(query)
+        if not q:
+            return list(range(len(self.values)))
+        cho = is_choseong_query(q)
+        postings, targets = (self._cho_postings, self._cho) if cho else (self._postings, self._text)
+        grams = [q[i:i + 2] for i in range(len(q) - 1)] or [q]
+        cands = None
+        for g in sorted(grams, key=lambda g: len(postings.get(g, ()))):
+            cands = set(postings.get(g, ())) if cands is None else cands & postings.get(g, set())
+            if not cands:
+                return []
+        return sorted(i for i in cands if q in targets[i])
+
+    def matched_values(self, query: str):
+        return [self.values[i] for i in self.match(query)]
+
+    def rows(self, cats) -> np.ndarray:
+        """카테고리 번호들의 행 위치 (오름차순)."""
+        if not len(cats):
+            return np.empty(0, dtype=np.int64)
+        parts = [self._order[self._starts[i]:self._starts[i + 1]] for i in cats]
+        return np.sort(np.concatenate(parts))
+
+
+class CheckinSearchIndex:
+    """to_frame() 결과 DataFrame용 검색 색인 (이름 / 근무장소 / 날짜)."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.n = len(df)
+        self.name = FieldIndex(df["이름"])
+        self.place = FieldIndex(df["근무장소"])
+        # 날짜 정렬 순서 (날짜 없는 행은 맨 뒤 → 범위 검색에서 제외)
+        days = pd.to_datetime(df["날짜"], errors="coerce").to_numpy(dtype="datetime64[D]")
+        self._day_order = np.argsort(days, kind="stable")
+        self._days_sorted = days[self._day_order]
+
+    def _date_rows(self, start_date=None, end_date=None):
+        lo = np.searchsorted(self._days_sorted, np.datetime64(start_date, "D")) if start_date else 0
+        valid_end = np.searchsorted(self._days_sorted, np.datetime64("NaT"), side="left")
+        hi = np.searchsorted(self._days_sorted, np.datetime64(end_date, "D"), side="right") if end_date else valid_end
+        return np.sort(self._day_order[lo:min(hi, valid_end)])
+
+    def search(self, name_kw="", place_kw="", start_date=None, end_date=None) -> np.ndarray:
+        """조건을 모두 만족하는 행 위치 (오름차순). 조건이 없으면 전체."""
+        sets = []
+        if name_kw.strip():
+            sets.append(self.name.rows(self.name.match(name_kw)))
+        if place_kw.strip():
+            sets.append(self.place.rows(self.place.match(place_kw)))
+        if start_date or end_date:
+            sets.append(self._date_rows(start_date, end_date))
+        if not sets:
+            return np.arange(self.n)
+        sets.sort(key=len)  # 작은 집합부터 교집합
+        out = sets[0]
+        for s in sets[1:]:
+            if not len(out):
+                break
+            out = np.intersect1d(out, s, assume_unique=True)
+        return out
@@ -0,0 +1,118 @@
+# checkin_table.py — 대용량 체크인 내역 표: 페이지 단위로 잘라서 표시
+# - st.dataframe(전체 이력)은 rerun마다 모든 행을 브라우저로 보냄 → 오래된 PC에서 화면이 무거워짐
+# - 정렬 순서(행 위치 배열)를 (데이터 버전, 필터) 키로 1회만 계산해 캐시 → rerun·페이지 이동은 정렬 없이
+#   현재 페이지 구간의 행만 골라(iloc) 직렬화
+# - 페이지 크기 선택 + 페이지 번호 이동(이전/다음/직접 입력), 건수는 항상 전체 결과 기준
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+PAGE_SIZES = (50, 100, 200, 500)
+
+
+class LRUCache:
+    """키 → 계산 결과 (항목 수 기준 LRU). 오래된 키부터 제거.
+    정렬 순서(ORDER_CACHE)와 근무 공백 결과(checkin_coverage.COVERAGE_CACHE)가 공용으로 사용."""
+
+    def __init__(self, max_items=16):
+        self.max_items = max_items
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key, build):
+        """key가 있으면 캐시 값, 없으면 build() 결과를 저장해 반환."""
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+        value = build()
+        with self._lock:
+            self._data[key] = value
+            while len(self._data) > self.max_items:
+                self._data.popitem(last=False)
+        return value
+
+    def status(self) -> dict:
+        with self._lock:
+            return {"items": len(self._data), "hits": self.hits, "misses": self.misses}
+
+
+ORDER_CACHE = LRUCache()  # (데이터 버전, 필터, 정렬 열) → 정렬된 행 위치 배열
+
+
+def sort_order(df: pd.DataFrame, by=None, ascending=False) -> np.ndarray:
+    """df를 by 열로 정렬했을 때의 행 위치 (안정 정렬, 빈 값은 맨 뒤). by가 없으면 원래 순서."""
+    if not by or by not in df.columns:
+        return np.arange(len(df))
+    col = df[by].reset_index(drop=True)
+    return col.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+
+
+def sorted_positions(df, key, sort_by=None, ascending=False) -> np.ndarray:
+    """캐시된 정렬 순서 (같은 key·정렬 조건이면 다시 정렬하지 않음)."""
+    return ORDER_CACHE.get_or_build((tuple(key), sort_by, ascending), lambda: sort_order(df, sort_by, ascending))
+
+
+def page_bounds(total, page_size, page):
+    """(시작, 끝, 전체 페이지 수) — page는 1부터, 범위를 벗어나면 양 끝으로."""
+    pages = max(1, -(-total // page_size))
+    page = min(max(int(page), 1), pages)
+    start = (page - 1) * page_size
+    return start, min(start + page_size, total), pages
+
+
+def page_frame(df, order, page_size, page, columns=None) -> pd.DataFrame:
+    """정렬 순서 중 해당 페이지 구간의 행만 꺼낸 DataFrame."""
+    start, stop, _ = page_bounds(len(order), page_size, page)
+    out = df.iloc[order[start:stop]]
+    return out[columns] if columns else out
+
+
+def render_paged_table(df, key, sort_by=None, ascending=False, columns=None, st_key="table", **dataframe_kwargs):
+    """페이지 단위 표 UI.
+    key: (데이터 버전, 필터...) — 같은 키면 캐시된 정렬 순서 재사용, 키가 바뀌면 1페이지로
+    데이터 버전은 df를 조회하기 전에 읽은 CheckinJournal.data_version() (연번 채움에도 바뀌는 쓰기 버전)"""
+    import streamlit as st
+
+    order = sorted_positions(df, key, sort_by, ascending)
+    total = len(order)
+
+    size_key, page_key, last_key = f"{st_key}_size", f"{st_key}_page", f"{st_key}_key"
+    page_size = st.session_state.get(size_key, PAGE_SIZES[0])
+    _, _, pages = page_bounds(total, page_size, 1)
+    # 조건(키)이 바뀌면 1페이지, 페이지 수가 줄었으면 마지막 페이지로 (위젯 생성 전에 맞춰 둠)
+    if st.session_state.get(last_key) != key:
+        st.session_state[last_key] = key
+        st.session_state[page_key] = 1
+    elif st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+
+    def _step(delta):
+        st.session_state[page_key] = min(max(st.session_state.get(page_key, 1) + delta, 1), pages)
+
+    c1, c2, c3, c4 = st.columns([2, 2, 1, 1])
+    with c1:
+        st.selectbox("페이지당 행 수", PAGE_SIZES, key=size_key)
+    with c2:
+        page = st.number_input("페이지 이동", min_value=1, max_value=pages, step=1, key=page_key)
+    with c3:
+        st.write("")
+        st.button("◀ 이전", key=f"{st_key}_prev", on_click=_step, args=(-1,), disabled=page <= 1)
+    with c4:
+        st.write("")
+        st.button("다음 ▶", key=f"{st_key}_next", on_click=_step, args=(1,), disabled=page >= pages)
+
+    start, stop, _ = page_bounds(total, page_size, page)
+    st.dataframe(page_frame(df, order, page_size, page, columns), **dataframe_kwargs)
+    if total:
+        st.caption(f"전체 {total:,}건 중 {start + 1:,}–{stop:,}번째 · {page:,}/{pages:,} 페이지")
+    else:
+        st.caption("표시할 기록이 없습니다.")
@@ -0,0 +1,368 @@
+# fake_sheets.py — 메모리 속 구글시트 대역 (부하 테스트 / 오프라인 실행용)
+# - 우리 코드가 쓰는 gspread 호출만 구현: row_values, col_values, get, get_all_values, get_all_records,
+#   append_row(s), update, batch_update, insert_row, delete_row(s), Spreadsheet.worksheet/add_worksheet/batch_update,
+#   Client.open(_by_key)
+# - 호출마다 지연(latency ± jitter), 분당 쿼터(읽기/쓰기 따로, 넘으면 429), 무작위 429 주입
+# - response_loss_rate: 쓰기는 반영됐지만 응답이 500으로 유실된 상황 (쓰기 큐의 꼬리 확인 경로 시험)
+# - 오류는 실제와 같은 gspread.exceptions.APIError → sheet_ratelimit의 재시도/백오프가 그대로 동작
+# - 연결: sheets_client.use_sheets_client(SheetsClient(client=FakeClient(backend)))
+
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+
+import gspread
+import requests
+
+from sheet_schema import col_letter
+
+_A1_RE = re.compile(r"^(?:[^!]*!)?([A-Z]*)(\d*)(?::([A-Z]*)(\d*))?$")
+
+
+def _col_index(letters: str) -> int:
+    """A → 1, E → 5, AA → 27"""
+    n = 0
+    for ch in letters:
+        n = n * 26 + ord(ch) - 64
+    return n
+
+
+def parse_a1(rng):
+    """'A5:E', 'A1:E1', 'A7' → (시작행, 시작열, 끝행|None, 끝열|None) — 1-base, None은 끝까지."""
+    m = _A1_RE.match(str(rng).strip().upper())
+    if not m:
+        raise ValueError(f"지원하지 않는 범위 형식: {rng}")
+    c1, r1, c2, r2 = m.groups()
+    r1 = int(r1) if r1 else 1
+    c1 = _col_index(c1) if c1 else 1
+    if c2 is None and r2 is None:
+        return r1, c1, r1, c1
+    return r1, c1, (int(r2) if r2 else None), (_col_index(c2) if c2 else None)
+
+
+def api_error(code, message, retry_after=None):
+    """gspread가 실제 응답에서 만드는 것과 같은 APIError."""
+    resp = requests.Response()
+    resp.status_code = code
+    resp._content = json.dumps({"error": {"code": code, "message": message, "status": "FAKE"}}).encode()
+    if retry_after is not None:
+        resp.headers["Retry-After"] = str(retry_after)
+    return gspread.exceptions.APIError(resp)
+
+
+class FakeSheetsBackend:
+    """가짜 시트 서버 — 모든 스프레드시트가 지연/쿼터/오류 설정과 호출 통계를 공유.
+
+    latency / jitter: 호출당 지연(초) = latency + uniform(0, jitter)
+    read_per_min / write_per_min: 분당 쿼터 (넘으면 429, None이면 무제한)
+    error_rate: 쿼터와 무관하게 429를 돌려줄 확률 (요청은 처리되지 않음)
+    response_loss_rate: 쓰기가 반영된 뒤 응답만 500으로 잃을 확률
+    """
+
+    def __init__(self, latency=0.15, jitter=0.1, read_per_min=300, write_per_min=300,
+                 error_rate=0.0, response_loss_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.read_per_min = read_per_min
+        self.write_per_min = write_per_min
+        self.error_rate = error_rate
+        self.response_loss_rate = response_loss_rate
+        self._rnd = random.Random(seed)
+        self._lock = threading.RLock()
+        self._windows = {"read": deque(), "write": deque()}
+        self.spreadsheets = {}   # 키 → FakeSpreadsheet
+
+        # 통계
+        self.calls = Counter()        # 메서드 → 처리된 호출 수
+        self.throttled = 0            # 쿼터 초과 429
+        self.injected = 0             # 무작위 주입 429
+        self.lost_responses = 0       # 반영 후 응답 유실(500)
+
+    def create(self, title, key=None) -> "FakeSpreadsheet":
+        with self._lock:
+            key = key or f"fake-{len(self.spreadsheets) + 1:04d}"
+            sh = FakeSpreadsheet(self, key, title)
+            self.spreadsheets[key] = sh
+            return sh
+
+    def call(self, method, fn, write=False):
+        """지연 → 429 판정 → fn 실행(잠금 하) → 응답 유실 판정."""
+        delay = self.latency + (self._rnd.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        kind = "write" if write else "read"
+        limit = self.write_per_min if write else self.read_per_min
+        with self._lock:
+            if self.error_rate and self._rnd.random() < self.error_rate:
+                self.injected += 1
+                raise api_error(429, f"주입된 오류 ({method})")
+            window = self._windows[kind]
+            now = time.monotonic()
+            while window and now - window[0] >= 60.0:
+                window.popleft()
+            if limit is not None and len(window) >= limit:
+                self.throttled += 1
+                raise api_error(429, f"Quota exceeded ({kind} {limit}/min)", retry_after=round(60.0 - (now - window[0]), 1))
+            window.append(now)
+            self.calls[method] += 1
+            out = fn()
+            if write and self.response_loss_rate and self._rnd.random() < self.response_loss_rate:
+                self.lost_responses += 1
+                raise api_error(500, f"응답 유실 ({method}, 반영됨)")
+            return out
+
+    def stats(self) -> dict:
+        with self._lock:
+            reads = sum(n for m, n in self.calls.items() if m in _READS)
+            return {
+                "calls": sum(self.calls.values()),
+                "reads": reads,
+                "writes": sum(self.calls.values()) - reads,
+                "by_method": dict(self.calls),
+                "throttled": self.throttled,
+                "injected": self.injected,
+                "lost_responses": self.lost_responses,
+            }
+
+
+_READS = {"open", "open_by_key", "worksheet", "worksheets", "row_values", "col_values", "get",
+          "get_all_values", "get_all_records"}
+
+
+class FakeWorksheet:
+    """메모리 2차원 목록 워크시트 (값은 모두 문자열로 저장, 빈 꼬리 칸은 잘라서 반환)."""
+
+    def __init__(self, spreadsheet, sheet_id, title):
+        self.spreadsheet = spreadsheet
+        self.id = sheet_id
+        self.title = title
+        self._backend = spreadsheet._backend
+        self._rows = []           # 행 목록 (가변 길이)
+        self.append_times = []    # 행 인덱스(0-base) → append 반영 시각 (부하 테스트 지연 측정용)
+
+    def __repr__(self):
+        return f"<FakeWorksheet {self.title!r} rows={len(self._rows)}>"
+
+    # ---------- 내부 ----------
+    @staticmethod
+    def _trim(row):
+        row = ["" if v is None else str(v) for v in row]
+        while row and row[-1] == "":
+            row.pop()
+        return row
+
+    def _last_filled(self):
+        n = len(self._rows)
+        while n and not any(self._rows[n - 1]):
+            n -= 1
+        return n
+
+    def _stamp(self, start, count):
+        now = time.monotonic()
+        if len(self.append_times) < start:
+            self.append_times += [None] * (start - len(self.append_times))
+        self.append_times[start:start + count] = [now] * count
+
+    def _write(self, r1, c1, values):
+        for i, vals in enumerate(values):
+            r = r1 - 1 + i
+            while len(self._rows) <= r:
+                self._rows.append([])
+            row = self._rows[r]
+            need = c1 - 1 + len(vals)
+            if len(row) < need:
+                row += [""] * (need - len(row))
+            row[c1 - 1:need] = ["" if v is None else str(v) for v in vals]
+            self._rows[r] = self._trim(row)
+
+    def _range(self, rng):
+        r1, c1, r2, c2 = parse_a1(rng)
+        r2 = self._last_filled() if r2 is None else min(r2, len(self._rows))
+        out = []
+        for row in self._rows[r1 - 1:r2]:
+            out.append(self._trim(row[c1 - 1:c2] if c2 is not None else row[c1 - 1:]))
+        while out and not out[-1]:
+            out.pop()
+        return out
+
+    def _updated_range(self, start, count, width):
+        return f"{self.title}!A{start}:{col_letter(max(width, 1))}{start + count - 1}"
+
+    # ---------- 읽기 ----------
+    def row_values(self, row, **kwargs):
+        return self._backend.call("row_values",
+                                  lambda: self._trim(self._rows[row - 1]) if row <= len(self._rows) else [])
+
+    def col_values(self, col, **kwargs):
+        def run():
+            vals = [r[col - 1] if len(r) >= col else "" for r in self._rows[:self._last_filled()]]
+            while vals and vals[-1] == "":
+                vals.pop()
+            return vals
+        return self._backend.call("col_values", run)
+
+    def get(self, range_name=None, **kwargs):
+        return self._backend.call("get", lambda: self._range(range_name or "A1:"))
+
+    def get_all_values(self, **kwargs):
+        return self._backend.call("get_all_values",
+                                  lambda: [self._trim(r) for r in self._rows[:self._last_filled()]])
+
+    def get_all_records(self, head=1, **kwargs):
+        def run():
+            values = self._rows[:self._last_filled()]
+            if len(values) < head:
+                return []
+            keys = values[head - 1]
+            return [{k: (r[i] if i < len(r) else "") for i, k in enumerate(keys)} for r in values[head:]]
+        return self._backend.call("get_all_records", run)
+
+    # ---------- 쓰기 ----------
+    def append_rows(self, values, value_input_option="RAW", **kwargs):
+        def run():
+            start = self._last_filled() + 1
+            self._write(start, 1, values)
+            self._stamp(start - 1, len(values))
+            width = max((len(v) for v in values), default=1)
+            return {"updates": {"updatedRange": self._updated_range(start, len(values), width),
+                                "updatedRows": len(values)}}
+        return self._backend.call("append_rows", run, write=True)
+
+    def append_row(self, values, value_input_option="RAW", **kwargs):
+        def run():
+            start = self._last_filled() + 1
+            self._write(start, 1, [values])
+            self._stamp(start - 1, 1)
+            return {"updates": {"updatedRange": self._updated_range(start, 1, len(values)), "updatedRows": 1}}
+        return self._backend.call("append_row", run, write=True)
+
+    def update(self, *args, values=None, range_name=None, **kwargs):
+        # gspread 6: update(values, range_name) / 구 호출 update("A1:E1", [[...]]) 모두 허용
+        if args and isinstance(args[0], str):
+            range_name, args = args[0], args[1:]
+        if args and values is None:
+            values = args[0]
+        r1, c1, _, _ = parse_a1(range_name or "A1")
+
+        def run():
+            self._write(r1, c1, values or [])
+            return {"updatedRange": range_name}
+        return self._backend.call("update", run, write=True)
+
+    def batch_update(self, data, value_input_option="RAW", **kwargs):
+        """여러 범위 값 기록 (values:batchUpdate 1회)."""
+        def run():
+            for item in data:
+                r1, c1, _, _ = parse_a1(item["range"])
+                self._write(r1, c1, item["values"])
+            return {"totalUpdatedRanges": len(data)}
+        return self._backend.call("batch_update", run, write=True)
+
+    def insert_row(self, values, index=1, **kwargs):
+        def run():
+            self._rows.insert(index - 1, self._trim(values))
+            if len(self.append_times) >= index:
+                self.append_times.insert(index - 1, None)
+        return self._backend.call("insert_row", run, write=True)
+
+    def delete_rows(self, start_index, end_index=None, **kwargs):
+        end_index = end_index or start_index
+
+        def run():
+            del self._rows[start_index - 1:end_index]
+            del self.append_times[start_index - 1:end_index]
+        return self._backend.call("delete_rows", run, write=True)
+
+    def delete_row(self, index, **kwargs):
+        return self.delete_rows(index)
+
+    # ---------- 부하 테스트 검증용 (API 호출로 세지 않음) ----------
+    def snapshot(self):
+        with self._backend._lock:
+            return [list(r) for r in self._rows[:self._last_filled()]]
+
+
+class FakeSpreadsheet:
+    def __init__(self, backend, key, title):
+        self._backend = backend
+        self.id = key
+        self.title = title
+        self._sheets = []
+        self._next_sheet_id = 0
+
+    def __repr__(self):
+        return f"<FakeSpreadsheet {self.title!r} id={self.id}>"
+
+    def _add(self, title):
+        ws = FakeWorksheet(self, self._next_sheet_id, title)
+        self._next_sheet_id += 1
+        self._sheets.append(ws)
+        return ws
+
+    def sheet(self, title="Sheet1") -> FakeWorksheet:
+        """API 호출 없이 워크시트 준비 (부하 테스트 초기 데이터/검증용)."""
+        with self._backend._lock:
+            for ws in self._sheets:
+                if ws.title == title:
+                    return ws
+            return self._add(title)
+
+    def worksheet(self, title):
+        def run():
+            for ws in self._sheets:
+                if ws.title == title:
+                    return ws
+            raise gspread.WorksheetNotFound(title)
+        return self._backend.call("worksheet", run)
+
+    def worksheets(self, **kwargs):
+        return self._backend.call("worksheets", lambda: list(self._sheets))
+
+    def add_worksheet(self, title, rows=1000, cols=26, **kwargs):
+        def run():
+            if any(ws.title == title for ws in self._sheets):
+                raise api_error(400, f'A sheet with the name "{title}" already exists.')
+            return self._add(title)
+        return self._backend.call("add_worksheet", run, write=True)
+
+    def batch_update(self, body):
+        """deleteDimension(ROWS) 요청만 지원 (sheet_archive.delete_data_rows)."""
+        def run():
+            for req in body.get("requests", []):
+                rng = req.get("deleteDimension", {}).get("range")
+                if not rng or rng.get("dimension") != "ROWS":
+                    raise api_error(400, f"지원하지 않는 batch_update 요청: {req}")
+                ws = next(w for w in self._sheets if w.id == rng["sheetId"])
+                del ws._rows[rng["startIndex"]:rng["endIndex"]]
+                del ws.append_times[rng["startIndex"]:rng["endIndex"]]
+            return {"replies": [{} for _ in body.get("requests", [])]}
+        return self._backend.call("batch_update", run, write=True)
+
+
+class FakeClient:
+    """gspread.Client 대역 — open(이름) / open_by_key(키). 없는 이름은 새로 만듦(create_missing)."""
+
+    def __init__(self, backend=None, create_missing=True):
+        self.backend = backend or FakeSheetsBackend()
+        self.create_missing = create_missing
+
+    def open(self, title, **kwargs):
+        def run():
+            for sh in self.backend.spreadsheets.values():
+                if sh.title == title:
+                    return sh
+            if not self.create_missing:
+                raise gspread.SpreadsheetNotFound(title)
+            return self.backend.create(title)
+        return self.backend.call("open", run)
+
+    def open_by_key(self, key):
+        def run():
+            sh = self.backend.spreadsheets.get(key)
+            if sh is None:
+                raise gspread.SpreadsheetNotFound(key)
+            return sh
+        return self.backend.call("open_by_key", run)
@@ -0,0 +1,219 @@
+# load_test.py — 아침 출근 시간대 체크인 부하 테스트 (구글시트 없이, fake_sheets 메모리 백엔드)
+# 사용법: python load_test.py [--guards 300] [--concurrency 64] [--ramp-sec 20] [--via-log-checkin 0.3]
+#                            [--latency 0.15] [--error-rate 0.02] [--response-loss-rate 0.01] [--json out.json]
+# - 대원 N명이 SCHOOL_OPTIONS 26개 학교에 나뉘어 ramp-sec 동안 동시에 제출
+#   (streamlit_app.append_checkin_ordered / log_to_sheet.log_checkin — 실제 쓰기 경로 그대로: 중복 억제 → 저널 → 쓰기 큐 → 제한기 → 시트)
+# - 보고: 제출 지연 p50/p95/p99, 시트 반영까지 지연, 체크인당 API 호출 수, 연번 중복, 유실(누락) 기록, 중복 기록
+# - 연번 중복/유실/중복 기록이 하나라도 있으면 종료 코드 1 → 쓰기 경로 변경 전후 비교용
+# - 저널은 임시 디렉터리에 만들고 끝나면 지움 (운영 checkin_journal.db는 건드리지 않음)
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+SPREADSHEET = "체크인기록"
+
+
+def percentile(values, p):
+    """정렬 후 최근접 순위 백분위 (값이 없으면 None)."""
+    if not values:
+        return None
+    s = sorted(values)
+    return s[min(len(s) - 1, max(0, int(round(p / 100 * len(s))) - 1))]
+
+
+def _ms(values):
+    return {f"p{p}": round(percentile(values, p) * 1000, 1) if values else None for p in (50, 95, 99)}
+
+
+def connect_fake(backend, existing_rows=0):
+    """가짜 백엔드를 프로세스 공용 SheetsClient로 연결. 기존 이력 existing_rows행을 미리 채움."""
+    from fake_sheets import FakeClient
+    from sheets_client import SheetsClient, use_sheets_client
+
+    sh = backend.create(SPREADSHEET)
+    ws = sh.sheet("Sheet1")
+    if existing_rows:
+        ws._write(1, 1, [["연번", "이름", "근무장소", "근무시간", "특이사항"]])
+        ws._write(2, 1, [[str(i + 1), f"기존대원{i % 400:03d}", "개원초등학교", "2025-03-01 08:00:00", ""]
+                         for i in range(existing_rows)])
+    use_sheets_client(SheetsClient(client=FakeClient(backend), load_keys=lambda: {SPREADSHEET: sh.id}))
+    return ws
+
+
+def load_app_modules():
+    """streamlit_app / log_to_sheet를 스크립트 컨텍스트 없이(bare mode) import — 체크인 화면 기본값으로 1회 실행됨."""
+    os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")  # bare mode 경고(missing ScriptRunContext) 숨김
+    import log_to_sheet
+    import streamlit_app
+
+    streamlit_app.warm_sheets_client().join()  # 인증·헤더 검증·저널 복구는 측정 전에
+    return streamlit_app, log_to_sheet
+
+
+def run(args):
+    from fake_sheets import FakeSheetsBackend
+
+    backend = FakeSheetsBackend(
+        latency=args.latency, jitter=args.jitter,
+        read_per_min=args.read_quota, write_per_min=args.write_quota,
+        error_rate=args.error_rate, response_loss_rate=args.response_loss_rate, seed=args.seed,
+    )
+    ws = connect_fake(backend, args.existing_rows)
+    app, legacy = load_app_modules()
+    schools = app.SCHOOL_OPTIONS
+    queue = app.get_checkin_queue()
+
+    rnd = random.Random(args.seed)
+    guards = []
+    for i in range(args.guards):
+        via_legacy = rnd.random() < args.via_log_checkin
+        rescan = rnd.random() < args.rescan_rate
+        guards.append((f"부하대원{i:04d}", schools[i % len(schools)], rnd.uniform(0, args.ramp_sec), via_legacy, rescan))
+
+    lock = threading.Lock()
+    submit_sec = []
+    submitted_at = {}     # (이름, 학교) → 첫 제출 시각 (monotonic)
+    accepted = Counter()  # (이름, 학교) → 기록 수락 횟수
+    suppressed = 0
+    errors = Counter()
+    base = Counter(backend.stats()["by_method"])
+    t0 = time.monotonic()
+
+    def submit(name, school, via_legacy):
+        t = time.monotonic()
+        try:
+            if via_legacy:
+                ok = legacy.log_checkin(name, school)
+            else:
+                ts = datetime.now(app.SEOUL_TZ).strftime("%Y-%m-%d %H:%M:%S")
+                ok = app.append_checkin_ordered(name, school, ts, "부하 테스트") is None
+        except Exception as e:
+            with lock:
+                errors[type(e).__name__] += 1
+            return
+        dt = time.monotonic() - t
+        with lock:
+            submit_sec.append(dt)
+            submitted_at.setdefault((name, school), t)
+            if ok:
+                accepted[(name, school)] += 1
+            else:
+                nonlocal suppressed
+                suppressed += 1
+
+    def guard(name, school, at, via_legacy, rescan):
+        delay = t0 + at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        submit(name, school, via_legacy)
+        if rescan:  # 연타/QR 재스캔 — 중복 억제되어야 함
+            submit(name, school, via_legacy)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(lambda g: guard(*g), guards))
+    submit_wall = time.monotonic() - t0
+    drained = queue.flush(timeout=args.drain_timeout)
+    wall = time.monotonic() - t0
+
+    # ---------- 검증 (API 호출로 세지 않는 스냅샷) ----------
+    values = ws.snapshot()
+    header = [h.strip() for h in values[0]] if values else []
+    rows = values[1:]
+    idx = {h: i for i, h in enumerate(header)}
+    seqs = Counter(r[0] for r in rows if r and r[0])
+    written = Counter()
+    replicate_sec = []
+    for n, r in enumerate(rows, start=1):
+        key = (r[idx["이름"]] if len(r) > idx["이름"] else "", r[idx["근무장소"]] if len(r) > idx["근무장소"] else "")
+        if key not in accepted:
+            continue
+        written[key] += 1
+        at = ws.append_times[n] if n < len(ws.append_times) else None
+        if at is not None and written[key] == 1:
+            replicate_sec.append(at - submitted_at[key])
+
+    n_accepted = sum(accepted.values())
+    stats = backend.stats()
+    by_method = Counter(stats["by_method"])
+    by_method.subtract(base)
+    calls = sum(by_method.values())
+    report = {
+        "guards": args.guards,
+        "submissions": len(submit_sec) + sum(errors.values()),
+        "accepted": n_accepted,
+        "suppressed": suppressed,
+        "errors": dict(errors),
+        "submit_wall_sec": round(submit_wall, 2),
+        "wall_sec": round(wall, 2),
+        "drained": drained,
+        "submit_latency_ms": _ms(submit_sec),
+        "replication_latency_ms": _ms(replicate_sec),
+        "api_calls": calls,
+        "api_calls_per_checkin": round(calls / n_accepted, 3) if n_accepted else None,
+        "api_by_method": {m: n for m, n in by_method.items() if n},
+        "throttled_429": stats["throttled"],
+        "injected_429": stats["injected"],
+        "lost_responses": stats["lost_responses"],
+        "duplicate_seq": sum(c - 1 for c in seqs.values() if c > 1),
+        "lost_writes": sum(1 for k in accepted if written[k] == 0),
+        "duplicate_rows": sum(c - 1 for c in written.values() if c > 1),
+        "queue": queue.status(),
+    }
+    return report
+
+
+def print_report(rep):
+    s, r = rep["submit_latency_ms"], rep["replication_latency_ms"]
+    print(f"👮 대원 {rep['guards']}명 · 제출 {rep['submissions']}건 (기록 {rep['accepted']} · 중복 억제 {rep['suppressed']}"
+          f" · 오류 {sum(rep['errors'].values())})")
+    print(f"⏱️ 제출 지연   p50 {s['p50']}ms · p95 {s['p95']}ms · p99 {s['p99']}ms")
+    print(f"📤 시트 반영   p50 {r['p50']}ms · p95 {r['p95']}ms · p99 {r['p99']}ms "
+          f"(전체 {rep['wall_sec']}초, 대기열 비움 {'완료' if rep['drained'] else '시간 초과'})")
+    print(f"📞 API 호출 {rep['api_calls']}회 · 체크인당 {rep['api_calls_per_checkin']}회 · "
+          f"429 {rep['throttled_429'] + rep['injected_429']}회(쿼터 {rep['throttled_429']}) · 응답 유실 {rep['lost_responses']}회")
+    print(f"   메서드별: {', '.join(f'{m} {n}' for m, n in sorted(rep['api_by_method'].items()))}")
+    print(f"🔢 연번 중복 {rep['duplicate_seq']}건 · 유실 기록 {rep['lost_writes']}건 · 중복 기록 {rep['duplicate_rows']}건")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="체크인 쓰기 경로 부하 테스트 (가짜 시트 백엔드)")
+    parser.add_argument("--guards", type=int, default=300, help="동시에 체크인하는 대원 수")
+    parser.add_argument("--concurrency", type=int, default=64, help="동시 제출 스레드 수 (세션 수)")
+    parser.add_argument("--ramp-sec", type=float, default=20.0, help="제출이 몰리는 구간 길이(초)")
+    parser.add_argument("--via-log-checkin", type=float, default=0.3, help="log_to_sheet.log_checkin 경로 비율")
+    parser.add_argument("--rescan-rate", type=float, default=0.05, help="같은 대원이 바로 다시 제출하는 비율")
+    parser.add_argument("--existing-rows", type=int, default=1000, help="시트에 미리 있는 이력 행 수")
+    parser.add_argument("--latency", type=float, default=0.15, help="API 호출당 기본 지연(초)")
+    parser.add_argument("--jitter", type=float, default=0.1, help="API 지연 추가 무작위 폭(초)")
+    parser.add_argument("--read-quota", type=int, default=300, help="가짜 서버 분당 읽기 쿼터")
+    parser.add_argument("--write-quota", type=int, default=300, help="가짜 서버 분당 쓰기 쿼터")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="무작위 429 비율")
+    parser.add_argument("--response-loss-rate", type=float, default=0.0, help="쓰기 반영 후 응답 유실(500) 비율")
+    parser.add_argument("--drain-timeout", type=float, default=120.0, help="제출 후 대기열을 비우는 최대 시간(초)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장 (변경 전후 비교용)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="checkin-load-") as tmp:
+        os.environ["CHECKIN_JOURNAL_PATH"] = os.path.join(tmp, "checkin_journal.db")
+        rep = run(args)
+    print_report(rep)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rep, f, ensure_ascii=False, indent=2)
+    ok = rep["drained"] and not (rep["duplicate_seq"] or rep["lost_writes"] or rep["duplicate_rows"])
+    print("✅ 통과" if ok else "❌ 연번 중복/유실/중복 기록 발생")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
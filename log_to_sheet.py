@@ -1,31 +1,62 @@
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 from datetime import datetime, timedelta
 import pytz
 import streamlit as st
 
-# 🔐 인증 키 로딩 및 복원
-raw_secrets = dict(st.secrets["gcp_service_account"])
-raw_secrets["private_key"] = raw_secrets["private_key"].replace("\\n", "\n")
+import perf_metrics
 
-scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-credentials = ServiceAccountCredentials.from_json_keyfile_dict(raw_secrets, scope)
-client = gspread.authorize(credentials)
+from checkin_dedup import get_suppressor
+from checkin_journal import get_journal, row_key, start_replication
+from sheet_schema import get_schema_guard
+from sheet_sync import get_sheet_sync, invalidate as invalidate_sheet_sync
+from sheet_writer import get_write_queue
 
-sheet = client.open("체크인기록").worksheet("Sheet1")
+# 🔐 워크시트 — 공용 클라이언트가 첫 체크인 때 인증 (import 시점에는 연결하지 않음)
+@st.cache_resource(show_spinner=False)
+def _sheet():
+    from sheets_client import open_worksheet  # gspread는 첫 기록 때 로드
+
+    return open_worksheet("체크인기록", "Sheet1")
+
+# ✅ 헤더 검사 — 워크시트당 1회만 조회, 이후 캐시
+#    streamlit_app과 같은 5열 표준 스키마 (같은 공용 큐를 쓰므로 헤더 기준도 같아야 함)
+EXPECTED_HEADER = ["연번", "이름", "근무장소", "근무시간", "특이사항"]
+
+def _header_guard():
+    return get_schema_guard(("체크인기록", "Sheet1"), _sheet, EXPECTED_HEADER)
 
-# ✅ 헤더 검사
 def check_header():
-    expected = ["연번", "이름", "근무장소", "근무시간"]
-    actual = sheet.row_values(1)
-    if actual != expected:
-        sheet.delete_row(1)
-        sheet.insert_row(expected, index=1)
+    return _header_guard().ensure()
+
+# ✅ 공용 쓰기 큐 (연번 할당기 포함) — 로컬 저널 → 시트 복제
+def _on_flushed(flushed):
+    get_journal().mark_replicated(flushed)
+    invalidate_sheet_sync(("체크인기록", "Sheet1"))
+
+def _seq_epoch():
+    # sheet_migrate 스키마 도장이 바뀌면 연번 할당기가 A열을 다시 읽음 (복제 스레드에서만 호출)
+    from sheet_migrate import migration_epoch
 
-# ✅ 연번 계산
+    return migration_epoch(("체크인기록", "Sheet1"), lambda: _sheet().spreadsheet)()
+
+def _write_queue():
+    return get_write_queue(
+        ("체크인기록", "Sheet1"), _sheet,
+        schema_guard=_header_guard(),
+        on_flushed=_on_flushed,
+        row_key=lambda r: row_key(*r[:3]),
+        seq_epoch=_seq_epoch,
+    )
+
+# ✅ 로컬 저널 — 프로세스 시작 시 1회 미반영 행 복구
+@st.cache_resource(show_spinner=False)
+def _journal():
+    journal = get_journal()
+    start_replication(journal, _write_queue(), get_sheet_sync(("체크인기록", "Sheet1"), _sheet))
+    return journal
+
+# ✅ 연번 계산 — 캐시된 HWM 기준 다음 연번 (시트 전체 조회 없음)
 def get_next_serial_number():
-    all_data = sheet.get_all_values()
-    return len(all_data)  # 헤더 포함
+    return _write_queue().allocator.peek()
 
 # ✅ 시간 함수 (KST 기준)
 def get_kst_now():
@@ -36,11 +67,23 @@ def get_kst_now():
         return (datetime.utcnow() + timedelta(hours=9)).strftime("%Y-%m-%d %H:%M:%S")
 
 # ✅ 체크인 함수 (checkin_form.py에서 호출)
-def log_checkin(name, school):
-    check_header()
-    serial = get_next_serial_number()
+#    로컬 저널에 먼저 커밋 → 공용 쓰기 큐가 시트로 복제 (연번은 flush 시점에 블록 단위로 발급)
+#    헤더 검증은 복제 시점에 1회(캐시)만 수행
+#    중복 억제 창 안의 재제출(연타/재스캔)은 기록하지 않고 False 반환
+#    제출 시간은 perf_metrics(checkin_submit{entry="log_to_sheet"})에 기록
+def log_checkin(name, school, nonce=None):
     now = get_kst_now()
+    dedup = get_suppressor()
+    if dedup.claim(name, school, nonce, ack=now) is not None:
+        perf_metrics.inc("checkins_suppressed_total", entry="log_to_sheet")
+        return False
 
-    new_row = [serial, name, school, now]
-    if len(new_row) == 4:
-        sheet.append_row(new_row, value_input_option="RAW")
+    new_row = [name, school, now, ""]  # [이름, 근무장소, 근무시간, 특이사항] — 5열 표준 스키마
+    try:
+        with perf_metrics.span("checkin_submit", entry="log_to_sheet"):
+            key = _journal().append(name, school, now)
+            _write_queue().submit(new_row, key=key)
+    except Exception:
+        dedup.release(name, school, nonce)
+        raise
+    return True
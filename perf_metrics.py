@@ -0,0 +1,296 @@
+# perf_metrics.py — 체크인 경로 계측 (프로세스 공용, 메모리 상한 있음)
+# - span(name, **labels): 구간 시간 측정 → 누적 히스토그램(고정 버킷) + 최근 샘플 링 버퍼(p50/p95)
+#   Sheets 호출(sheet_ratelimit, 메서드별), 인증/스프레드시트 열기(sheets_client), DataFrame 로드/변환, QR 렌더링
+# - inc(name, **labels): 카운터 (캐시 적중/실패 등) / hit_ratios(): 캐시별 적중률
+# - begin_rerun() / end_rerun(page): 스크립트 실행(rerun) 1회 동안 이 스레드가 보낸 Sheets API 호출 수
+# - 시계열(이름+라벨 조합)은 max_series개까지만 — 넘으면 버림(metrics_dropped_series_total)
+# - prometheus(): Prometheus 텍스트 형식 덤프. 환경변수 CHECKIN_METRICS_FILE이 있으면
+#   export_interval초마다 그 파일에 원자적으로 기록 (node_exporter textfile collector용)
+# - 관리자 사이드바 패널: render_panel(st.sidebar)
+# - 체크인 경로에서 import되므로 표준 라이브러리만 사용
+
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+PREFIX = "kidsguard_"
+# 초 단위 버킷 (Prometheus 기본값 + Sheets 지연 구간)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CALL_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34)   # rerun당 API 호출 수
+EXPORT_PATH = os.environ.get("CHECKIN_METRICS_FILE")
+
+
+def _percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+class Histogram:
+    """고정 버킷 누적 히스토그램 + 최근 window개 샘플 (rolling 백분위)."""
+
+    __slots__ = ("bounds", "counts", "sum", "count", "max", "recent")
+
+    def __init__(self, bounds=BUCKETS, window=256):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # 마지막 칸 = +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, v):
+        self.counts[bisect.bisect_left(self.bounds, v)] += 1
+        self.sum += v
+        self.count += 1
+        self.max = max(self.max, v)
+        self.recent.append(v)
+
+    def summary(self) -> dict:
+        recent = sorted(self.recent)
+        return {
+            "count": self.count,
+            "avg": self.sum / self.count if self.count else None,
+            "p50": _percentile(recent, 50),
+            "p95": _percentile(recent, 95),
+            "max": self.max,
+        }
+
+
+class Metrics:
+    """카운터/히스토그램 저장소 (스레드 안전).
+
+    max_series: 이름+라벨 조합 최대 개수 (메모리 상한)
+    window: 히스토그램별 최근 샘플 수 (rolling 백분위용)
+    """
+
+    def __init__(self, max_series=400, window=256):
+        self.max_series = max_series
+        self.window = window
+        self._lock = threading.Lock()
+        self._counters = {}     # (name, labels) → 값
+        self._hists = {}        # (name, labels) → Histogram
+        self._collectors = []   # () → [(name, labels, 값)] 게이지
+        self._local = threading.local()
+        self.dropped = 0
+        self.started_at = time.time()
+
+    # ------------------------------
+    # 기록
+    # ------------------------------
+    def _room(self, table, key):
+        if key in table:
+            return True
+        if len(self._counters) + len(self._hists) >= self.max_series:
+            self.dropped += 1
+            return False
+        return True
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if self._room(self._counters, key):
+                self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, bounds=BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            h = self._hists.get(key)
+            if h is None:
+                if not self._room(self._hists, key):
+                    return
+                h = self._hists[key] = Histogram(bounds, self.window)
+            h.observe(value)
+
+    @contextmanager
+    def span(self, name, **labels):
+        """with span("sheets_call", method="append_rows"): ... → {name}_seconds 히스토그램. 예외도 시간은 기록."""
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(f"{name}_seconds", time.perf_counter() - t, **labels)
+
+    def count_api_call(self):
+        """Sheets API 호출 1회 (현재 스레드의 rerun 집계에 더함)."""
+        n = getattr(self._local, "api_calls", None)
+        if n is not None:
+            self._local.api_calls = n + 1
+
+    def begin_rerun(self):
+        self._local.api_calls = 0
+
+    def end_rerun(self, page):
+        """이번 rerun 동안 이 스레드의 Sheets 호출 수를 기록하고 반환."""
+        n = getattr(self._local, "api_calls", None)
+        if n is None:
+            return None
+        self._local.api_calls = None
+        self.observe("sheets_calls_per_rerun", n, bounds=CALL_BUCKETS, page=page)
+        return n
+
+    def register(self, collector):
+        """게이지 수집 함수 등록 (덤프 시점에 호출). collector() → [(name, labels_dict, 값), ...]."""
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    # ------------------------------
+    # 조회 / 내보내기
+    # ------------------------------
+    def _gauges(self):
+        with self._lock:
+            collectors = list(self._collectors)
+        out = {}
+        for c in collectors:
+            try:
+                for name, labels, v in c():
+                    out[(name, tuple(sorted(labels.items())))] = v
+            except Exception:
+                continue  # 수집 실패한 게이지는 이번 덤프에서 생략
+        return out
+
+    def spans(self):
+        """[(이름, 라벨 dict, 요약 dict)] — 사이드바 표시용."""
+        with self._lock:
+            return [(name, dict(labels), h.summary()) for (name, labels), h in sorted(self._hists.items())]
+
+    def hit_ratios(self) -> dict:
+        """cache_requests_total{cache, result=hit|miss} → {cache: (적중, 전체)}."""
+        out = {}
+        with self._lock:
+            items = list(self._counters.items())
+        for (name, labels), v in items:
+            if name != "cache_requests_total":
+                continue
+            d = dict(labels)
+            hit, total = out.get(d.get("cache"), (0, 0))
+            out[d.get("cache")] = (hit + (v if d.get("result") == "hit" else 0), total + v)
+        return out
+
+    def prometheus(self) -> str:
+        """Prometheus 텍스트 노출 형식."""
+        def esc(v):
+            return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+        def fmt(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+        with self._lock:
+            counters = sorted(self._counters.items())
+            hists = sorted((k, (h.bounds, list(h.counts), h.sum, h.count)) for k, h in self._hists.items())
+            dropped = self.dropped
+        gauges = sorted(self._gauges().items())
+
+        lines, typed = [], set()
+
+        def type_line(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), v in counters:
+            type_line(PREFIX + name, "counter")
+            lines.append(f"{PREFIX}{name}{fmt(labels)} {v}")
+        for (name, labels), (bounds, counts, total, n) in hists:
+            full = PREFIX + name
+            type_line(full, "histogram")
+            acc = 0
+            for le, c in zip(list(bounds) + ["+Inf"], counts):
+                acc += c
+                lines.append(f"{full}_bucket{fmt(labels, [('le', le)])} {acc}")
+            lines.append(f"{full}_sum{fmt(labels)} {total:.6f}")
+            lines.append(f"{full}_count{fmt(labels)} {n}")
+        for (name, labels), v in gauges:
+            type_line(PREFIX + name, "gauge")
+            lines.append(f"{PREFIX}{name}{fmt(labels)} {v}")
+        type_line(PREFIX + "metrics_dropped_series_total", "counter")
+        lines.append(f"{PREFIX}metrics_dropped_series_total {dropped}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """덤프를 임시 파일에 쓴 뒤 교체 (수집기가 쓰다 만 파일을 읽지 않도록)."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+
+
+# ------------------------------
+# 프로세스 공용 인스턴스
+# ------------------------------
+METRICS = Metrics()
+_EXPORTER = None
+_EXPORTER_LOCK = threading.Lock()
+
+span = METRICS.span
+inc = METRICS.inc
+observe = METRICS.observe
+begin_rerun = METRICS.begin_rerun
+end_rerun = METRICS.end_rerun
+register = METRICS.register
+
+
+def cache_result(cache, hit):
+    """캐시 조회 결과 1건 (적중률 계산용)."""
+    METRICS.inc("cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+
+def start_exporter(path=EXPORT_PATH, export_interval=15.0):
+    """path가 있으면 백그라운드에서 주기적으로 textfile 기록 (프로세스당 1회)."""
+    global _EXPORTER
+    if not path:
+        return None
+    with _EXPORTER_LOCK:
+        if _EXPORTER is None:
+            def loop():
+                while True:
+                    try:
+                        METRICS.write_textfile(path)
+                    except Exception:
+                        pass  # 다음 주기에 다시 시도
+                    time.sleep(export_interval)
+            _EXPORTER = threading.Thread(target=loop, name="metrics-textfile", daemon=True)
+            _EXPORTER.start()
+        return _EXPORTER
+
+
+# ------------------------------
+# 관리자 사이드바 패널
+# ------------------------------
+def _label_text(labels):
+    return ", ".join(f"{k}={v}" for k, v in labels.items())
+
+
+def render_panel(container, metrics=METRICS):
+    """container(st.sidebar 등)에 구간별 지연 / rerun당 API 호출 / 캐시 적중률 + Prometheus 덤프 다운로드."""
+    def ms(v):
+        return "-" if v is None else f"{v * 1000:,.0f}"
+
+    box = container.expander("성능 지표")
+    rows = []
+    for name, labels, s in metrics.spans():
+        if name == "sheets_calls_per_rerun":
+            box.caption(
+                f"rerun당 Sheets 호출({labels.get('page', '')}): 중앙값 {s['p50']:.0f} · 최대 {s['max']:.0f} "
+                f"({s['count']:,}회 실행)"
+            )
+            continue
+        rows.append({
+            "구간": name.removesuffix("_seconds"), "라벨": _label_text(labels), "횟수": s["count"],
+            "p50(ms)": ms(s["p50"]), "p95(ms)": ms(s["p95"]), "최대(ms)": ms(s["max"]),
+        })
+    if rows:
+        box.dataframe(rows, use_container_width=True, hide_index=True)
+    else:
+        box.caption("아직 측정된 구간이 없습니다.")
+    for cache, (hit, total) in sorted(metrics.hit_ratios().items()):
+        box.caption(f"캐시 {cache}: 적중 {hit:,}/{total:,} ({hit / total:.0%})" if total else f"캐시 {cache}: -")
+    box.download_button(
+        "Prometheus 텍스트 내려받기", data=metrics.prometheus(),
+        file_name="kidsguard_metrics.prom", mime="text/plain",
+    )
@@ -1,12 +1,26 @@
 # qr_generator_with_labels.py — 아동안전지킴이 전용 QR 생성기 (라벨 포함)
 # 생성 규격: ?page=대원 체크인&school=...&name=...&note=...
+# 압축 규격(--compact): ?s=07&g=a3f  (학교/대원 짧은 코드 — checkin_codes.py 레지스트리)
+# 사용법: python qr_generator_with_labels.py [--roster 명단.csv] [--compact] [--workers N] [--force]
 
+import argparse
+import csv
+import hashlib
+import io
 import os
+import threading
+import zipfile
 import qrcode
+from collections import OrderedDict
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image, ImageDraw, ImageFont
 from urllib.parse import urlencode, urlparse, urlunparse, parse_qsl
 from datetime import datetime
 
+import perf_metrics
+from checkin_codes import GuardCodeRegistry, school_code
+
 # 🔗 Streamlit 앱 기본 URL (배포 주소) — 실제 주소 고정
 BASE_URL = "https://kids-guard-qr-stygvpcrmtgek4s4zrpbee.streamlit.app"
 
@@ -27,7 +41,8 @@ PRESET_NOTE = ""   # 예: "통학로 이상 없음"
 # 📂 출력 폴더
 OUTPUT_DIR = "qr_codes"
 
-# 🖋️ 폰트 설정 (Windows: 맑은 고딕 / 환경별 폴백)
+# 🖋️ 폰트 설정 (Windows: 맑은 고딕 / 환경별 폴백) — 크기별 1회만 로드
+@lru_cache(maxsize=8)
 def _load_font(size=20):
     try:
         return ImageFont.truetype("malgun.ttf", size)
@@ -60,6 +75,23 @@ def build_checkin_url(base_url: str, school: str, name: str = "", note: str = ""
     link = urlunparse((parsed.scheme, parsed.netloc, parsed.path, parsed.params, new_q, parsed.fragment))
     return link
 
+def build_compact_url(base_url: str, school: str, name: str = "", note: str = "", registry=None) -> str:
+    """
+    짧은 코드 URL 생성: ?s=<학교코드>[&g=<대원코드>]
+    이름/특이사항은 URL에 넣지 않고 레지스트리(guard_codes.csv)에 저장 → 앱이 코드로 해석.
+    """
+    params = {"s": school_code(school)}
+    if name:
+        if registry is None:
+            raise ValueError("이름이 있는 압축 URL에는 GuardCodeRegistry가 필요합니다.")
+        params["g"] = registry.assign(school, name, note)
+
+    parsed = urlparse(base_url)
+    existing_q = dict(parse_qsl(parsed.query))
+    existing_q.update(params)
+    new_q = urlencode(existing_q, doseq=False, encoding="utf-8")
+    return urlunparse((parsed.scheme, parsed.netloc, parsed.path, parsed.params, new_q, parsed.fragment))
+
 def sanitize_filename(text: str) -> str:
     """파일명 안전화(Windows 예약문자 제거, 공백→_ 치환)."""
     bad = '<>:"/\\|?*'
@@ -67,63 +99,308 @@ def sanitize_filename(text: str) -> str:
         text = text.replace(ch, "")
     return text.replace(" ", "_")
 
+def render_qr_with_label(url: str, label_text: str, box_size=10, border=4,
+                         font=None, fit_size=None):
+    """URL로 QR 생성하고 하단에 라벨 텍스트를 그린 이미지. (Image, QR 버전, 모듈 수) 반환.
+    font: 라벨 폰트 (기본 FONT). fit_size=(w, h): 라벨 포함 이 크기 안에 들어가도록 box_size 자동 결정."""
+    font = font or FONT
+    label_pad = 44 if font is FONT else int(getattr(font, "size", 20) * 2.2)  # 라벨 영역
+
+    # 단계별 구간 시간(qr_stage_seconds{stage=...}) — bench_suite.py가 단계별 기준치로 사용
+    with perf_metrics.span("qr_stage", stage="build"):
+        qr = qrcode.QRCode(
+            version=1,
+            error_correction=qrcode.constants.ERROR_CORRECT_H,
+            box_size=box_size,
+            border=border,
+        )
+        qr.add_data(url)
+        qr.make(fit=True)
+        if fit_size:
+            # 모듈이 정수 픽셀이 되도록 box_size를 계산 (리샘플링 없이 선명하게)
+            span = qr.modules_count + 2 * border
+            qr.box_size = max(1, min(fit_size[0] // span, (fit_size[1] - label_pad) // span))
+        qr_img = qr.make_image(fill_color="black", back_color="white")
+    with perf_metrics.span("qr_stage", stage="rgb"):
+        qr_img = qr_img.convert("RGB")
+
+    with perf_metrics.span("qr_stage", stage="paste"):
+        w, h = qr_img.size
+        canvas = Image.new("RGB", (w, h + label_pad), "white")
+        canvas.paste(qr_img, (0, 0))
+
+    with perf_metrics.span("qr_stage", stage="label"):
+        draw = ImageDraw.Draw(canvas)
+        bbox = draw.textbbox((0, 0), label_text, font=font)  # Pillow 8.0+
+        tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
+        draw.text(((w - tw) / 2, h + (label_pad - th) / 2), label_text, font=font, fill="black")
+    return canvas, qr.version, qr.modules_count
+
 def make_qr_with_label(url: str, label_text: str, out_path: str, box_size=10, border=4):
-    """URL로 QR 생성하고 하단에 라벨(학교명) 텍스트를 그려 PNG 저장."""
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_H,
-        box_size=box_size,
-        border=border,
-    )
-    qr.add_data(url)
-    qr.make(fit=True)
-    qr_img = qr.make_image(fill_color="black", back_color="white").convert("RGB")
-
-    w, h = qr_img.size
-    label_pad = 44  # 라벨 영역
-    canvas = Image.new("RGB", (w, h + label_pad), "white")
-    canvas.paste(qr_img, (0, 0))
-
-    draw = ImageDraw.Draw(canvas)
-    bbox = draw.textbbox((0, 0), label_text, font=FONT)  # Pillow 8.0+
-    tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
-    draw.text(((w - tw) / 2, h + (label_pad - th) / 2), label_text, font=FONT, fill="black")
-
-    canvas.save(out_path, "PNG")
-
-def main():
-    # 출력 폴더 초기화(기존 파일 제거)
-    if os.path.exists(OUTPUT_DIR):
-        for f in os.listdir(OUTPUT_DIR):
-            try:
-                os.remove(os.path.join(OUTPUT_DIR, f))
-            except Exception:
-                pass
+    """URL로 QR 생성하고 하단에 라벨(학교명) 텍스트를 그려 PNG 저장. (QR 버전, 모듈 수) 반환."""
+    canvas, version, modules = render_qr_with_label(url, label_text, box_size, border)
+    with perf_metrics.span("qr_png_encode"):
+        canvas.save(out_path, "PNG")
+    return version, modules
+
+# ------------------------------
+# 앱 내 즉석 생성용 PNG 바이트 LRU 캐시
+# ------------------------------
+class PngLRUCache:
+    """(url, label, box_size, border) → PNG 바이트. 항목 수·총 바이트 기준으로 오래된 것부터 제거."""
+
+    def __init__(self, max_items=512, max_bytes=64 * 1024 * 1024):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            png = self._data.get(key)
+            if png is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return png
+
+    def put(self, key, png: bytes):
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._data[key] = png
+            self._bytes += len(png)
+            while self._data and (len(self._data) > self.max_items or self._bytes > self.max_bytes):
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {"items": len(self._data), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+PNG_CACHE = PngLRUCache()
+
+def qr_png_bytes(url: str, label_text: str, box_size=10, border=4) -> bytes:
+    """라벨 포함 QR PNG 바이트 (캐시 우선, 없으면 렌더링 후 저장)."""
+    key = (url, label_text, box_size, border)
+    png = PNG_CACHE.get(key)
+    perf_metrics.cache_result("qr_png", png is not None)
+    if png is None:
+        with perf_metrics.span("qr_render"):
+            canvas, _, _ = render_qr_with_label(url, label_text, box_size, border)
+        with perf_metrics.span("qr_png_encode"):
+            buf = io.BytesIO()
+            canvas.save(buf, "PNG")
+            png = buf.getvalue()
+        PNG_CACHE.put(key, png)
+    return png
+
+def zip_png_bytes(items) -> bytes:
+    """[(파일명, PNG 바이트), ...] → ZIP 바이트. PNG는 이미 압축돼 있으므로 무압축 저장."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_STORED) as zf:
+        for filename, png in items:
+            zf.writestr(filename, png)
+    return buf.getvalue()
+
+# ------------------------------
+# 인쇄용 A4 시트 합성 (PNG 개별 저장 없이 페이지 캔버스에 바로 배치)
+# ------------------------------
+A4_MM = (210, 297)
+
+def _mm_to_px(mm: float, dpi: int) -> int:
+    return int(round(mm / 25.4 * dpi))
+
+def iter_sheet_pages(jobs, cols=3, rows=4, dpi=300, margin_mm=10, border=4):
+    """작업 목록 → A4 페이지 이미지 생성기. 한 번에 한 페이지만 메모리에 유지."""
+    page_w, page_h = _mm_to_px(A4_MM[0], dpi), _mm_to_px(A4_MM[1], dpi)
+    margin = _mm_to_px(margin_mm, dpi)
+    cell_w = (page_w - 2 * margin) // cols
+    cell_h = (page_h - 2 * margin) // rows
+    font = _load_font(max(12, dpi // 8))  # 약 3mm 높이 라벨
+    per_page = cols * rows
+
+    page = None
+    for i, job in enumerate(jobs):
+        slot = i % per_page
+        if slot == 0:
+            if page is not None:
+                yield page
+            page = Image.new("RGB", (page_w, page_h), "white")
+        img, _, _ = render_qr_with_label(job["url"], job["label"], border=border,
+                                         font=font, fit_size=(cell_w, cell_h))
+        r, c = divmod(slot, cols)
+        x = margin + c * cell_w + (cell_w - img.width) // 2
+        y = margin + r * cell_h + (cell_h - img.height) // 2
+        page.paste(img, (x, y))
+    if page is not None:
+        yield page
+
+def write_sheets(pages, out_path: str, dpi=300) -> int:
+    """페이지 이미지들을 PDF 1개(.pdf) 또는 페이지별 PNG(그 외)로 저장. 저장한 페이지 수 반환.
+    PDF는 페이지를 받는 즉시 1비트로 변환해 파일에 이어 붙임 → RGB 캔버스는 렌더링 중인 한두 장만 메모리에 남음
+    (여러 장을 모아 save_all로 쓰면 모은 만큼 메모리가 늘어남)."""
+    stem, ext = os.path.splitext(out_path)
+    count = 0
+    if ext.lower() != ".pdf":
+        for page in pages:
+            count += 1
+            page.save(f"{stem}_{count:03d}.png", "PNG", dpi=(dpi, dpi))
+        return count
+
+    for page in pages:
+        # 흑백 전용 → 1비트로 저장 (RGB는 JPEG 압축돼 모듈 경계가 번지고 용량도 큼)
+        page.convert("1", dither=Image.Dither.NONE).save(out_path, "PDF", resolution=dpi, append=count > 0)
+        count += 1
+    return count
+
+# ------------------------------
+# 배치 생성 (명단 입력 · 병렬 렌더링 · 변경분만 재생성)
+# ------------------------------
+RENDER_VERSION = "label44-h"  # 렌더링 방식이 바뀌면 올려서 전체 재생성
+MANIFEST_NAME = "qr_manifest.csv"
+MANIFEST_FIELDS = ["generated_at", "school", "name", "note", "file", "hash", "qr_version", "modules", "url"]
+
+def load_roster(path: str):
+    """명단 CSV(school,name,note) → [(school, name, note), ...]. 헤더 행 필수, name/note는 비워도 됨."""
+    roster = []
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for r in csv.DictReader(f):
+            school = (r.get("school") or "").strip()
+            if school:
+                roster.append((school, (r.get("name") or "").strip(), (r.get("note") or "").strip()))
+    return roster
+
+def default_roster():
+    """명단이 없을 때: SCHOOLS × PRESET_* (기존 동작)."""
+    return [(school, PRESET_NAME, PRESET_NOTE) for school in SCHOOLS]
+
+def plan_job(school: str, name: str, note: str, box_size=10, border=4, registry=None) -> dict:
+    """명단 1행 → 렌더링 작업(URL/라벨/파일명/해시). registry가 있으면 압축 URL."""
+    if registry is not None:
+        url = build_compact_url(BASE_URL, school, name, note, registry)
     else:
-        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        url = build_checkin_url(BASE_URL, school, name, note)
+    label = f"{school} {name}" if name else school
+    safe = sanitize_filename(school) + (f"_{sanitize_filename(name)}" if name else "")
+    key = "\x1f".join([RENDER_VERSION, url, label, str(box_size), str(border)])
+    return {
+        "school": school, "name": name, "note": note, "url": url, "label": label,
+        "file": f"{safe}_QR.png", "box_size": box_size, "border": border,
+        "hash": hashlib.sha1(key.encode("utf-8")).hexdigest()[:16],
+    }
 
-    print(f"🔗 BASE_URL = {BASE_URL}")
-    print(f"🏷️ PRESET name='{PRESET_NAME}', note='{PRESET_NOTE}'")
-    print(f"📁 출력 경로: {os.path.abspath(OUTPUT_DIR)}")
+def _render_job(args):
+    """프로세스 풀 작업 단위 (피클 가능한 튜플 인자)."""
+    url, label, out_path, box_size, border = args
+    version, modules = make_qr_with_label(url, label, out_path, box_size=box_size, border=border)
+    return out_path, version, modules
+
+def _read_manifest(path: str) -> dict:
+    """기존 manifest → {file: row}. 없거나 구 형식이면 빈 dict (전체 재생성)."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8", newline="") as f:
+        return {r["file"]: r for r in csv.DictReader(f) if r.get("file") and r.get("hash")}
 
-    # 생성 내역 CSV
-    manifest_path = os.path.join(OUTPUT_DIR, "qr_manifest.csv")
-    with open(manifest_path, "w", encoding="utf-8") as mf:
-        mf.write("generated_at,school,url\n")
+def generate_batch(roster, out_dir=OUTPUT_DIR, workers=None, force=False, box_size=10, border=4,
+                   registry=None):
+    """명단 전체 QR 생성. 해시가 같고 파일이 있으면 건너뜀. (생성 수, 건너뜀 수, 삭제 수) 반환.
+    force=True면 건너뛰지 않고 전부 다시 생성 (명단에서 빠진 이전 출력물 정리는 그대로).
+    registry(GuardCodeRegistry)를 주면 압축 URL(?s=..&g=..)로 생성."""
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    previous = _read_manifest(manifest_path)
 
-    for school in SCHOOLS:
-        url = build_checkin_url(BASE_URL, school, PRESET_NAME, PRESET_NOTE)
-        print(url)  # 콘솔 확인
-        safe_school = sanitize_filename(school)
-        filename = f"{OUTPUT_DIR}/{safe_school}_QR.png"
-        make_qr_with_label(url, school, filename)
+    jobs, seen = [], set()
+    for school, name, note in roster:
+        job = plan_job(school, name, note, box_size, border, registry)
+        if job["file"] in seen:
+            print(f"⚠️ 중복 항목 건너뜀: {job['label']}")
+            continue
+        seen.add(job["file"])
+        jobs.append(job)
 
-        with open(manifest_path, "a", encoding="utf-8") as mf:
-            mf.write(f"{datetime.now().isoformat(timespec='seconds')},{school},{url}\n")
+    todo, now = [], datetime.now().isoformat(timespec="seconds")
+    for job in jobs:
+        prev = previous.get(job["file"])
+        out_path = os.path.join(out_dir, job["file"])
+        if not force and prev and prev["hash"] == job["hash"] and os.path.exists(out_path):
+            job["generated_at"] = prev.get("generated_at", now)
+            job["qr_version"], job["modules"] = prev.get("qr_version", ""), prev.get("modules", "")
+        else:
+            job["generated_at"] = now
+            todo.append(job)
 
-        print(f"✅ {school} QR 생성 완료 → {filename}")
+    if todo:
+        args = [(j["url"], j["label"], os.path.join(out_dir, j["file"]), j["box_size"], j["border"]) for j in todo]
+        chunksize = max(1, len(args) // ((workers or os.cpu_count() or 1) * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for job, (out_path, version, modules) in zip(todo, pool.map(_render_job, args, chunksize=chunksize)):
+                job["qr_version"], job["modules"] = version, modules
+                print(f"✅ {os.path.basename(out_path)} (QR v{version}, {modules}×{modules})")
 
-    print("🎉 모든 학교 QR 코드 생성 완료")
+    # 명단에서 빠진 이전 출력물 정리
+    removed = 0
+    for file in set(previous) - seen:
+        try:
+            os.remove(os.path.join(out_dir, file))
+            removed += 1
+        except OSError:
+            pass
+
+    # 생성 내역 CSV — 한 번에 버퍼링해서 기록
+    with open(manifest_path, "w", encoding="utf-8", newline="") as mf:
+        writer = csv.DictWriter(mf, fieldnames=MANIFEST_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(jobs)
+
+    return len(todo), len(jobs) - len(todo), removed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="아동안전지킴이 QR 일괄 생성")
+    parser.add_argument("--roster", help="명단 CSV (school,name,note). 없으면 SCHOOLS × PRESET_* 사용")
+    parser.add_argument("--out", default=OUTPUT_DIR, help="출력 폴더")
+    parser.add_argument("--workers", type=int, default=None, help="렌더링 프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--force", action="store_true", help="변경 여부와 관계없이 전부 다시 생성")
+    parser.add_argument("--compact", action="store_true", help="짧은 코드 URL(?s=..&g=..)로 생성")
+    parser.add_argument("--sheet", help="인쇄용 A4 시트로 합성해 저장 (예: qr_sheets.pdf / qr_sheet.png)")
+    parser.add_argument("--grid", default="3x4", help="시트 1장 배치 (열x행, 기본 3x4)")
+    parser.add_argument("--dpi", type=int, default=300, help="시트 해상도 (기본 300)")
+    args = parser.parse_args(argv)
+
+    roster = load_roster(args.roster) if args.roster else default_roster()
+
+    print(f"🔗 BASE_URL = {BASE_URL}")
+    if args.roster:
+        print(f"🏷️ 명단 {args.roster}: {len(roster)}건")
+    else:
+        print(f"🏷️ PRESET name='{PRESET_NAME}', note='{PRESET_NOTE}' × {len(roster)}개 학교")
+    print(f"📁 출력 경로: {os.path.abspath(args.out)}")
+
+    registry = GuardCodeRegistry() if args.compact else None
+    if args.sheet:
+        cols, rows = (int(x) for x in args.grid.lower().split("x"))
+        jobs = (plan_job(school, name, note, registry=registry) for school, name, note in roster)
+        pages = write_sheets(iter_sheet_pages(jobs, cols, rows, dpi=args.dpi), args.sheet, dpi=args.dpi)
+        if registry is not None:
+            registry.save()
+        print(f"🖨️ 인쇄용 시트 {pages}장 저장 → {os.path.abspath(args.sheet)}")
+        return
+
+    made, skipped, removed = generate_batch(
+        roster, args.out, workers=args.workers, force=args.force, registry=registry
+    )
+    if registry is not None:
+        registry.save()
+        print(f"🗂️ 대원 코드 레지스트리 저장: {registry.path} (앱과 함께 배포)")
+    print(f"🎉 QR 생성 완료 — 새로 생성 {made} · 변경 없음 {skipped} · 삭제 {removed}")
+    print(f"📐 QR 버전/모듈 수는 {os.path.join(args.out, MANIFEST_NAME)}의 qr_version/modules 열 참고")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,326 @@
+# sheet_archive.py — 체크인기록 월별 보관 파티션 + 파티션 목록(manifest)
+# - 닫힌 달(이번 달 이전)의 행을 같은 스프레드시트의 월별 워크시트 "Sheet1_YYYY-MM"로 옮기고 Sheet1에서 삭제
+#   → 체크인 쓰기/증분 동기화가 다루는 Sheet1은 최근 기록만 유지 (전체 재동기화 비용이 이력 길이와 무관)
+# - 파티션 목록 워크시트 "보관목록": [파티션, 워크시트, 시작일, 종료일, 행수, 보관시각]
+# - 대시보드는 조회 날짜 범위와 겹치는 파티션만 로컬 저널에 1회 적재 (파티션 가지치기)
+#   → 최근 14일 조회는 Sheet1(현재 파티션)만 읽음
+# - 보관 실행: python sheet_archive.py [--keep-months 0] [--dry-run]
+#   Sheet1 행을 지우므로 체크인이 없는 시간대에 실행 권장.
+#   중간에 끊겨도 다시 실행하면 이미 옮긴 행(파티션에 있는 row_key, 개수만큼)은 건너뛰고 이어서 처리.
+#   같은 이름·장소·시각의 행이 Sheet1에 여러 개면 모두 옮김 (파티션에 이미 있는 개수만큼만 건너뜀).
+
+import argparse
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+import gspread
+import pytz
+
+import checkin_rollup
+from checkin_journal import normalize_ts, row_key
+from sheets_client import open_spreadsheet
+
+KST = pytz.timezone("Asia/Seoul")
+MANIFEST_SHEET = "보관목록"
+MANIFEST_HEADER = ["파티션", "워크시트", "시작일", "종료일", "행수", "보관시각"]
+
+_LOADED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archive_loaded (
+    partition TEXT PRIMARY KEY,
+    rows      INTEGER NOT NULL,
+    loaded_at REAL NOT NULL
+);
+"""
+
+
+def partition_of(ts):
+    """근무시간 → 파티션 'YYYY-MM' (해석 불가 시 None)."""
+    s = normalize_ts(ts)
+    try:
+        datetime.strptime(s[:10], "%Y-%m-%d")
+    except ValueError:
+        return None
+    return s[:7]
+
+
+def partition_title(worksheet_name, part):
+    return f"{worksheet_name}_{part}"
+
+
+def _next_month(part):
+    y, m = int(part[:4]), int(part[5:7])
+    return f"{y + m // 12:04d}-{m % 12 + 1:02d}"
+
+
+def _shift_month(part, months):
+    y, m = int(part[:4]), int(part[5:7]) - 1 - months
+    return f"{y + m // 12:04d}-{m % 12 + 1:02d}"
+
+
+class ArchiveManifest:
+    """보관 파티션 목록 (워크시트 "보관목록"). 읽기는 ttl초 캐시 → 대시보드 rerun마다 API 호출 없음.
+
+    get_spreadsheet: gspread Spreadsheet를 돌려주는 함수
+    worksheet_name: 보관 대상 워크시트 (파티션 이름 접두어)
+    """
+
+    def __init__(self, get_spreadsheet, worksheet_name="Sheet1", ttl=600.0):
+        self._get_spreadsheet = get_spreadsheet
+        self.worksheet_name = worksheet_name
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._parts = None
+        self._read_at = 0.0
+
+    def invalidate(self):
+        self._parts = None
+
+    def spreadsheet(self):
+        return self._get_spreadsheet()
+
+    def partitions(self):
+        """[{"partition", "worksheet", "start", "end", "rows"}, ...] (파티션 오름차순)."""
+        with self._lock:
+            if self._parts is None or time.monotonic() - self._read_at >= self.ttl:
+                self._parts = self._read()
+                self._read_at = time.monotonic()
+            return list(self._parts)
+
+    def _read(self):
+        try:
+            values = self.spreadsheet().worksheet(MANIFEST_SHEET).get_all_values()
+        except gspread.WorksheetNotFound:
+            return []
+        prefix = self.worksheet_name + "_"
+        parts = []
+        for r in values[1:]:
+            r = list(r) + [""] * (len(MANIFEST_HEADER) - len(r))
+            if not r[0] or not r[1].startswith(prefix):
+                continue
+            parts.append({
+                "partition": r[0], "worksheet": r[1], "start": r[2], "end": r[3],
+                "rows": int(r[4]) if str(r[4]).strip().isdigit() else 0,
+            })
+        return sorted(parts, key=lambda p: p["partition"])
+
+    def hot_start(self):
+        """현재 파티션(Sheet1) 시작일 'YYYY-MM-01' — 보관 파티션이 없으면 None."""
+        parts = self.partitions()
+        return f"{_next_month(parts[-1]['partition'])}-01" if parts else None
+
+    def prune(self, start_date=None, end_date=None):
+        """조회 범위 [start_date, end_date]와 겹치는 보관 파티션만."""
+        lo = str(start_date) if start_date else "0000-00-00"
+        hi = str(end_date) if end_date else "9999-99-99"
+        return [p for p in self.partitions() if p["start"] <= hi and p["end"] >= lo]
+
+    def first_date(self):
+        parts = self.partitions()
+        return min(p["start"] for p in parts) if parts else None
+
+    def archived_rows(self) -> int:
+        return sum(p["rows"] for p in self.partitions())
+
+
+# ------------------------------
+# 대시보드: 파티션 가지치기 적재
+# ------------------------------
+def attach_hot_start(journal, manifest) -> bool:
+    """저널에 현재 파티션 시작일 설정 — 전체 재동기화(replace) 전에 호출.
+    목록을 못 읽으면 False (저널에 저장된 이전 값 유지)."""
+    try:
+        journal.hot_start = manifest.hot_start()
+        return True
+    except Exception:
+        return False
+
+
+def load_partitions(journal, manifest, start_date=None, end_date=None) -> int:
+    """조회 범위와 겹치는 보관 파티션 중 아직 저널에 없는 것만 읽어 적재. 읽은 파티션 수 반환."""
+    journal.hot_start = manifest.hot_start()
+    wanted = manifest.prune(start_date, end_date)
+    if not wanted:
+        return 0
+    journal.script(_LOADED_SCHEMA)
+    loaded = dict(journal.read("SELECT partition, rows FROM archive_loaded"))
+    sh = None
+    n = 0
+    for p in wanted:
+        if loaded.get(p["partition"]) == p["rows"]:
+            continue
+        sh = sh or manifest.spreadsheet()
+        values = sh.worksheet(p["worksheet"]).get_all_values()
+        if values:
+            journal.mirror_sheet([h.strip() for h in values[0]], values[1:], source="archive")
+        journal.execute(
+            "INSERT OR REPLACE INTO archive_loaded(partition, rows, loaded_at) VALUES (?, ?, ?)",
+            (p["partition"], p["rows"], time.time()),
+        )
+        n += 1
+    return n
+
+
+def total_checkins(journal, manifest) -> int:
+    """전체 체크인 수 = 현재 파티션(로컬 집계) + 보관 파티션(목록의 행수) — 파티션을 읽지 않음."""
+    hot = manifest.hot_start()
+    if not hot:
+        return checkin_rollup.total(journal)
+    return checkin_rollup.summary(journal, start_date=hot)["count"] + manifest.archived_rows()
+
+
+# ------------------------------
+# 보관(압축) 실행
+# ------------------------------
+def _runs_desc(indices):
+    """정렬된 0-based 데이터 행 번호 → 연속 구간 [(start, end_exclusive), ...] (뒤쪽 구간부터)."""
+    runs = []
+    for i in sorted(indices):
+        if runs and runs[-1][1] == i:
+            runs[-1][1] = i + 1
+        else:
+            runs.append([i, i + 1])
+    return [tuple(r) for r in reversed(runs)]
+
+
+def delete_data_rows(sh, ws, indices):
+    """데이터 행(0-based, 헤더 제외)들을 batch_update 1회로 삭제.
+    뒤쪽 구간부터 지워야 앞 구간 행 번호가 변하지 않음."""
+    if not indices:
+        return
+    sh.batch_update({"requests": [
+        {"deleteDimension": {"range": {
+            "sheetId": ws.id, "dimension": "ROWS", "startIndex": start + 1, "endIndex": end + 1,
+        }}}
+        for start, end in _runs_desc(indices)
+    ]})
+
+
+def compact(sh, worksheet_name="Sheet1", keep_months=0, dry_run=False, today=None, log=print):
+    """닫힌 달의 행을 월별 파티션으로 옮기고 Sheet1에서 한 번의 batch_update로 삭제.
+    keep_months: 이번 달 외에 Sheet1에 더 남겨 둘 지난 달 수. 파티션별 결과 목록 반환."""
+    today = today or datetime.now(KST).date()
+    cutoff = _shift_month(today.strftime("%Y-%m"), keep_months)  # 이 달 이전만 보관
+
+    ws = sh.worksheet(worksheet_name)
+    values = ws.get_all_values()
+    if len(values) < 2:
+        log("보관할 행이 없습니다.")
+        return []
+    header, rows = values[0], values[1:]
+    col = {h.strip(): i for i, h in enumerate(header)}
+    ts_i = col.get("근무시간", col.get("timestamp_kst"))
+    name_i = col.get("이름", col.get("name"))
+    school_i = col.get("근무장소", col.get("school"))
+    seq_i = col.get("연번", col.get("seq"))
+    if ts_i is None or name_i is None:
+        raise RuntimeError(f"헤더에 근무시간/이름 열이 없습니다: {header}")
+
+    def cell(r, i):
+        return r[i] if i is not None and i < len(r) else ""
+
+    def key(r):
+        return row_key(cell(r, name_i), cell(r, school_i), normalize_ts(cell(r, ts_i)))
+
+    groups = {}
+    for i, r in enumerate(rows):
+        part = partition_of(cell(r, ts_i))
+        if part and part < cutoff:
+            groups.setdefault(part, []).append(i)
+    if not groups:
+        log(f"{cutoff} 이전 행이 없습니다.")
+        return []
+
+    results = []
+    for part in sorted(groups):
+        title = partition_title(worksheet_name, part)
+        try:
+            aws = sh.worksheet(title)
+            existing = aws.get_all_values()[1:]
+        except gspread.WorksheetNotFound:
+            aws, existing = None, []
+        # 이어서 실행할 때만 건너뜀: 파티션에 이미 있는 키는 그 개수만큼 (Sheet1 안의 같은 키 행끼리는 비교하지 않음)
+        archived = Counter(key(r) for r in existing)
+        new, skipped = [], 0
+        for i in groups[part]:
+            r = list(rows[i]) + [""] * (len(header) - len(rows[i]))
+            k = key(r)
+            if archived[k] > 0:
+                archived[k] -= 1
+                skipped += 1
+                continue
+            if seq_i is not None and str(r[seq_i]).strip().isdigit():
+                r[seq_i] = int(r[seq_i])  # RAW 기록이라 숫자 연번은 숫자로 유지
+            new.append(r)
+        days = [normalize_ts(cell(r, ts_i))[:10] for r in existing + new]
+        results.append({
+            "partition": part, "worksheet": title, "start": min(days), "end": max(days),
+            "rows": len(existing) + len(new), "moved": len(new), "already_archived": skipped,
+            "source_rows": groups[part],
+        })
+        log(f"📦 {part}: Sheet1 {len(groups[part]):,}행 → {title} (신규 {len(new):,}행, 이미 보관 {skipped:,}행, "
+            f"누적 {len(existing) + len(new):,}행)")
+        if dry_run:
+            continue
+        if aws is None:
+            aws = sh.add_worksheet(title=title, rows=len(new) + 10, cols=len(header))
+            aws.update(values=[header] + new, range_name="A1", value_input_option="RAW")
+        elif new:
+            aws.append_rows(new, value_input_option="RAW")
+
+    if dry_run:
+        log("🔎 dry-run: 시트를 변경하지 않았습니다.")
+        return results
+
+    # 파티션 목록 갱신 (기존 목록과 병합 후 한 번에 기록)
+    try:
+        mws = sh.worksheet(MANIFEST_SHEET)
+        current = mws.get_all_values()[1:]
+    except gspread.WorksheetNotFound:
+        mws = sh.add_worksheet(title=MANIFEST_SHEET, rows=100, cols=len(MANIFEST_HEADER))
+        current = []
+    stamp = datetime.now(KST).strftime("%Y-%m-%d %H:%M:%S")
+    merged = {r[1]: r for r in current if len(r) > 1 and r[1]}
+    for res in results:
+        merged[res["worksheet"]] = [res["partition"], res["worksheet"], res["start"], res["end"], res["rows"], stamp]
+    mws.update(values=[MANIFEST_HEADER] + sorted(merged.values(), key=lambda r: (r[1], r[0])),
+               range_name="A1", value_input_option="RAW")
+
+    moved = [i for res in results for i in res["source_rows"]]
+    delete_data_rows(sh, ws, moved)
+    log(f"🧹 Sheet1에서 {len(moved):,}행 삭제 (남은 행 {len(rows) - len(moved):,})")
+    return results
+
+
+# ------------------------------
+# 프로세스 공용 레지스트리
+# ------------------------------
+_MANIFESTS = {}
+_MANIFESTS_LOCK = threading.Lock()
+
+
+def get_manifest(key, get_spreadsheet, **kwargs) -> ArchiveManifest:
+    """key = (스프레드시트 이름, 워크시트 이름)별 파티션 목록 (프로세스 공용)."""
+    with _MANIFESTS_LOCK:
+        m = _MANIFESTS.get(key)
+        if m is None:
+            m = ArchiveManifest(get_spreadsheet, worksheet_name=key[1], **kwargs)
+            _MANIFESTS[key] = m
+        return m
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="체크인기록 닫힌 달 행을 월별 파티션으로 보관")
+    parser.add_argument("--spreadsheet", default="체크인기록")
+    parser.add_argument("--worksheet", default="Sheet1")
+    parser.add_argument("--keep-months", type=int, default=0, help="이번 달 외에 Sheet1에 남길 지난 달 수")
+    parser.add_argument("--dry-run", action="store_true", help="옮길 행만 집계하고 시트는 변경하지 않음")
+    args = parser.parse_args(argv)
+
+    results = compact(open_spreadsheet(args.spreadsheet), args.worksheet, args.keep_months, args.dry_run)
+    print(f"✅ 파티션 {len(results)}개 처리")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+# sheet_migrate.py — 체크인기록 구 행(4열 / 영문 헤더)을 5열 표준 스키마로 일괄 정리 (1회성) + 스키마 버전 도장
+# - 헤더 → [연번, 이름, 근무장소, 근무시간, 특이사항] (seq/name/school/timestamp_kst/note 등 구 헤더는 이름으로 매핑)
+# - 특이사항 빈칸 채움, 근무시간 'YYYY-MM-DD HH:MM:SS'로 통일 (해석 불가 값은 그대로 두고 집계만)
+# - 연번: 기본은 빈칸·숫자 아님·중복만 최대 연번 뒤로 새 번호 부여 / --renumber면 시트 순서대로 1..N 재부여(빈 번호 제거)
+# - 바뀐 행 구간만 Worksheet.batch_update(여러 범위를 API 1회)로 chunk_rows행씩 기록
+# - 진행 위치는 워크시트 "스키마"([워크시트, 버전, 진행행, 전체행, 모드, 갱신시각])에 매 chunk 기록 → --resume으로 이어서
+#   (다시 처음부터 실행해도 이미 정리된 행은 바뀌지 않으므로 결과는 같음)
+# - 끝나면 버전(sheet_schema.schema_version) 도장 → 대시보드 증분 동기화가 행별 시각 정규화를 생략
+#   (get_schema_stamp(...).matches() → CheckinJournal.sync_from(canonical=True))
+# - 사용법: python sheet_migrate.py [--dry-run] [--resume] [--renumber] [--chunk-rows 10000]
+#   연번을 바꾸므로 체크인이 없는 시간대에 실행 권장. 로컬 저널(CHECKIN_JOURNAL_PATH)에 시트 미반영 행이 있으면
+#   실행하지 않음(--force로 무시). 실행 중인 앱의 연번 할당기는 도장 갱신시각(migration_epoch)이 바뀐 것을 보고
+#   A열을 다시 읽음 → 재시작 없이 새 최대 연번 뒤로 발급
+
+import argparse
+import os
+import threading
+import time
+from datetime import datetime
+
+import gspread
+import pytz
+
+from checkin_journal import normalize_ts
+from sheet_schema import col_letter, schema_version
+from sheets_client import open_spreadsheet
+
+KST = pytz.timezone("Asia/Seoul")
+CANONICAL_HEADER = ["연번", "이름", "근무장소", "근무시간", "특이사항"]
+CANONICAL_VERSION = schema_version(CANONICAL_HEADER)
+SCHEMA_SHEET = "스키마"
+SCHEMA_HEADER = ["워크시트", "버전", "진행행", "전체행", "모드", "갱신시각"]
+
+# 구/영문 헤더 → 표준 열 번호
+_ALIASES = {
+    "연번": 0, "seq": 0,
+    "이름": 1, "name": 1,
+    "근무장소": 2, "school": 2,
+    "근무시간": 3, "timestamp_kst": 3,
+    "특이사항": 4, "note": 4,
+}
+_TS_LEN = len("YYYY-MM-DD HH:MM:SS")
+
+
+def _is_canonical_ts(s: str) -> bool:
+    try:
+        datetime.strptime(s, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return False
+    return len(s) == _TS_LEN
+
+
+def plan(header, rows, renumber=False):
+    """표준화된 (헤더, 행 목록, 통계). 행은 모두 5열 (연번은 int)."""
+    idx = {}
+    for i, h in enumerate(header):
+        j = _ALIASES.get(str(h).strip())
+        if j is not None:
+            idx.setdefault(j, i)
+    if 1 not in idx or 3 not in idx:
+        raise RuntimeError(f"헤더에 이름/근무시간 열이 없습니다: {header}")
+
+    def cell(r, j):
+        i = idx.get(j)
+        return str(r[i]).strip() if i is not None and i < len(r) else ""
+
+    stats = {"rows": 0, "ts_fixed": 0, "ts_bad": 0, "seq_fixed": 0, "blank": 0}
+    out = []
+    for r in rows:
+        vals = [cell(r, j) for j in range(len(CANONICAL_HEADER))]
+        if not any(vals):
+            stats["blank"] += 1
+            out.append(None)  # 빈 행은 건드리지 않음
+            continue
+        stats["rows"] += 1
+        ts = normalize_ts(vals[3])
+        if ts != vals[3]:
+            stats["ts_fixed"] += 1
+        elif vals[3] and not _is_canonical_ts(ts):
+            stats["ts_bad"] += 1
+        vals[3] = ts
+        out.append(vals)
+
+    # 연번
+    filled = [v for v in out if v is not None]
+    if renumber:
+        for n, v in enumerate(filled, start=1):
+            if v[0] != str(n):
+                stats["seq_fixed"] += 1
+            v[0] = n
+    else:
+        nums = [int(v[0]) for v in filled if v[0].isdigit()]
+        hwm = max(nums, default=0)
+        seen = set()
+        for v in filled:
+            if v[0].isdigit() and int(v[0]) not in seen:
+                v[0] = int(v[0])
+                seen.add(v[0])
+            else:
+                hwm += 1
+                v[0] = hwm
+                stats["seq_fixed"] += 1
+    return list(CANONICAL_HEADER), out, stats
+
+
+def _changed(old, new):
+    if new is None:
+        return False
+    old = [str(x).strip() for x in old[:len(new)]] + [""] * max(0, len(new) - len(old))
+    return old != [str(x) for x in new]
+
+
+def _runs(flags, offset):
+    """바뀐 행 플래그 → 연속 구간 [(시작 행 번호, 끝 행 번호)] (시트 1-base)."""
+    runs, start = [], None
+    for i, f in enumerate(flags):
+        if f and start is None:
+            start = i
+        elif not f and start is not None:
+            runs.append((offset + start, offset + i - 1))
+            start = None
+    if start is not None:
+        runs.append((offset + start, offset + len(flags) - 1))
+    return runs
+
+
+class SchemaStamp:
+    """워크시트 "스키마"의 마이그레이션 기록. 읽기는 ttl초 캐시 (대시보드 rerun마다 API 호출 없음).
+
+    get_spreadsheet: gspread Spreadsheet를 돌려주는 함수
+    worksheet_name: 대상 워크시트
+    """
+
+    def __init__(self, get_spreadsheet, worksheet_name="Sheet1", ttl=60.0):
+        self._get_spreadsheet = get_spreadsheet
+        self.worksheet_name = worksheet_name
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._record = None
+        self._read_at = 0.0
+
+    def invalidate(self):
+        self._record = None
+
+    def record(self) -> dict:
+        """{"version", "cursor", "total", "mode", "updated_at"} (기록 없으면 빈 dict)."""
+        with self._lock:
+            if self._record is None or time.monotonic() - self._read_at >= self.ttl:
+                self._record = self._read()
+                self._read_at = time.monotonic()
+            return dict(self._record)
+
+    def matches(self, version=CANONICAL_VERSION) -> bool:
+        """마이그레이션이 끝났고 버전이 같으면 True (읽기 실패 시 False → 기존 정규화 경로)."""
+        try:
+            return self.record().get("version") == version
+        except Exception:
+            return False
+
+    def _read(self):
+        try:
+            values = self._get_spreadsheet().worksheet(SCHEMA_SHEET).get_all_values()
+        except gspread.WorksheetNotFound:
+            return {}
+        for r in values[1:]:
+            r = list(r) + [""] * (len(SCHEMA_HEADER) - len(r))
+            if r[0] == self.worksheet_name:
+                return {
+                    "version": r[1], "cursor": int(r[2]) if r[2].isdigit() else 0,
+                    "total": int(r[3]) if r[3].isdigit() else 0, "mode": r[4], "updated_at": r[5],
+                }
+        return {}
+
+
+def _write_stamp(sh, worksheet_name, version, cursor, total, mode):
+    """스키마 워크시트의 이 워크시트 행만 갱신 (없으면 워크시트/행 생성)."""
+    try:
+        sws = sh.worksheet(SCHEMA_SHEET)
+        current = sws.get_all_values()[1:]
+    except gspread.WorksheetNotFound:
+        sws = sh.add_worksheet(title=SCHEMA_SHEET, rows=20, cols=len(SCHEMA_HEADER))
+        current = []
+    stamp = datetime.now(KST).strftime("%Y-%m-%d %H:%M:%S")
+    merged = {r[0]: r for r in current if r and r[0]}
+    merged[worksheet_name] = [worksheet_name, version, cursor, total, mode, stamp]
+    sws.update(values=[SCHEMA_HEADER] + sorted(merged.values()), range_name="A1", value_input_option="RAW")
+    return sws
+
+
+def migrate(sh, worksheet_name="Sheet1", renumber=False, dry_run=False, resume=False,
+            chunk_rows=10_000, log=print) -> dict:
+    """워크시트를 표준 5열 스키마로 정리. 통계 dict 반환 (dry_run이면 변경 예정 건수만)."""
+    mode = "renumber" if renumber else "repair"
+    ws = sh.worksheet(worksheet_name)
+    values = ws.get_all_values()
+    if not values:
+        raise RuntimeError(f"{worksheet_name}이 비어 있습니다.")
+    header, new_rows, stats = plan(values[0], values[1:], renumber)
+    old_rows = values[1:]
+    width = col_letter(len(CANONICAL_HEADER))
+
+    header_changed = [h.strip() for h in values[0][:len(header)]] != header
+    flags = [_changed(o, n) for o, n in zip(old_rows, new_rows)]
+    stats["header_changed"] = header_changed
+    stats["changed_rows"] = sum(flags)
+    log(f"🧾 {worksheet_name}: {stats['rows']:,}행 · 변경 {stats['changed_rows']:,}행 "
+        f"(시각 정규화 {stats['ts_fixed']:,} · 연번 {mode} {stats['seq_fixed']:,}) "
+        f"· 시각 해석 불가 {stats['ts_bad']:,} · 헤더 {'변경' if header_changed else '유지'}")
+    if dry_run:
+        log("🔎 dry-run: 시트를 변경하지 않았습니다.")
+        return stats
+
+    start = 0
+    if resume:
+        prev = SchemaStamp(lambda: sh, worksheet_name).record()
+        if prev.get("mode") == mode and not prev.get("version"):
+            start = min(prev.get("cursor", 0), len(new_rows))
+            log(f"↪️ {start:,}행까지 처리된 기록에서 이어서 진행")
+
+    calls = 0
+    if header_changed:
+        ws.update(values=[header], range_name=f"A1:{width}1", value_input_option="RAW")
+        calls += 1
+    for lo in range(start, len(new_rows), chunk_rows):
+        hi = min(lo + chunk_rows, len(new_rows))
+        runs = _runs(flags[lo:hi], lo + 2)  # 1행 헤더 + 1-base
+        if runs:
+            ws.batch_update([
+                {"range": f"A{a}:{width}{b}", "values": new_rows[a - 2:b - 1]} for a, b in runs
+            ], value_input_option="RAW")
+            calls += 1
+        _write_stamp(sh, worksheet_name, "", hi, len(new_rows), mode)
+        log(f"   … {hi:,}/{len(new_rows):,}행")
+
+    _write_stamp(sh, worksheet_name, CANONICAL_VERSION, len(new_rows), len(new_rows), mode)
+    stats["batch_calls"] = calls
+    log(f"✅ 스키마 {CANONICAL_VERSION} 도장 (기록 호출 {calls}회)")
+    return stats
+
+
+# ------------------------------
+# 프로세스 공용 레지스트리
+# ------------------------------
+_STAMPS = {}
+_STAMPS_LOCK = threading.Lock()
+
+
+def get_schema_stamp(key, get_spreadsheet, **kwargs) -> SchemaStamp:
+    """key = (스프레드시트 이름, 워크시트 이름)별 마이그레이션 기록 (프로세스 공용)."""
+    with _STAMPS_LOCK:
+        s = _STAMPS.get(key)
+        if s is None:
+            s = SchemaStamp(get_spreadsheet, worksheet_name=key[1], **kwargs)
+            _STAMPS[key] = s
+        return s
+
+
+def migration_epoch(key, get_spreadsheet):
+    """연번 할당기용 epoch 함수 — 스키마 도장의 (버전, 진행행, 갱신시각). 마이그레이션이 돌면 바뀜."""
+    def epoch():
+        r = get_schema_stamp(key, get_spreadsheet).record()
+        return r.get("version"), r.get("cursor"), r.get("updated_at")
+    return epoch
+
+
+def pending_checkins(path=None) -> int:
+    """이 컴퓨터의 로컬 저널에서 시트 미반영 행 수 (저널 파일이 없으면 0)."""
+    from checkin_journal import DEFAULT_PATH, CheckinJournal
+
+    path = path or DEFAULT_PATH
+    if not os.path.exists(path):
+        return 0
+    return CheckinJournal(path).status()["pending"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="체크인기록 구 행을 5열 표준 스키마로 일괄 정리")
+    parser.add_argument("--spreadsheet", default="체크인기록")
+    parser.add_argument("--worksheet", default="Sheet1")
+    parser.add_argument("--renumber", action="store_true", help="연번을 시트 순서대로 1..N 재부여 (빈 번호 제거)")
+    parser.add_argument("--chunk-rows", type=int, default=10_000, help="batch_update 1회에 다룰 행 수")
+    parser.add_argument("--resume", action="store_true", help="중단된 마이그레이션을 기록된 위치부터 이어서")
+    parser.add_argument("--dry-run", action="store_true", help="바뀔 행만 집계하고 시트는 변경하지 않음")
+    parser.add_argument("--force", action="store_true", help="로컬 저널에 시트 미반영 행이 있어도 실행")
+    args = parser.parse_args(argv)
+
+    pending = 0 if args.dry_run else pending_checkins()
+    if pending and not args.force:
+        raise SystemExit(f"⛔ 시트에 아직 반영되지 않은 체크인 {pending:,}건이 있습니다 — "
+                         "쓰기 큐가 비워진 뒤 다시 실행하세요 (무시하려면 --force).")
+
+    migrate(open_spreadsheet(args.spreadsheet), args.worksheet, args.renumber, args.dry_run,
+            args.resume, args.chunk_rows)
+
+
+if __name__ == "__main__":
+    main()
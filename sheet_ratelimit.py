@@ -0,0 +1,271 @@
+# sheet_ratelimit.py — Sheets API 호출 제한기 (프로세스 공용)
+# - 토큰 버킷: 읽기/쓰기 각각 분당 쿼터(기본 60회/분/사용자)에 맞춰 호출 간격 조절 → 429가 나기 전에 대기
+# - 429 / 5xx: 지터를 준 지수 백오프로 재시도 (Retry-After 헤더가 있으면 우선)
+#   쓰기는 429(요청이 처리되지 않음)만 재시도 — 5xx는 기록됐을 수도 있어 쓰기 큐의 꼬리 확인에 맡김
+# - 단일 비행(single-flight): 같은 워크시트의 같은 읽기(get_all_values 등)가 동시에 여러 세션에서 오면
+#   진행 중인 요청 1건의 결과를 나눠 씀
+# - rate_limited(ws): gspread Worksheet/Spreadsheet를 감싸는 프록시 — 나머지 속성은 그대로 전달
+# - status(): 호출 수, 대기 시간, 재시도/429 횟수, 합쳐진 요청 수 (사이드바 표시용)
+# - 메서드별 호출 시간/결과는 perf_metrics에 기록 (sheets_call_seconds, sheets_calls_total)
+
+import random
+import threading
+import time
+
+import gspread
+import requests
+
+import perf_metrics
+
+# 읽기(단일 비행 대상) / 쓰기 메서드
+READ_METHODS = {"get_all_values", "get_all_records", "get", "batch_get", "col_values", "row_values",
+                "acell", "cell", "worksheet", "worksheets", "fetch_sheet_metadata"}
+WRITE_METHODS = {"append_row", "append_rows", "update", "update_cell", "update_cells", "batch_update",
+                 "clear", "delete_rows", "insert_row", "insert_rows", "add_worksheet", "resize"}
+_WRAP_RESULT = {"worksheet", "add_worksheet"}
+
+
+class TokenBucket:
+    """rate_per_min 속도로 채워지고 burst개까지 쌓이는 토큰 버킷 (예약 방식, 스레드 안전)."""
+
+    def __init__(self, rate_per_min=60, burst=10):
+        self.rate = rate_per_min / 60.0
+        self.burst = burst
+        self._tokens = float(burst)
+        self._at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """토큰 1개 사용. 부족하면 채워질 때까지 대기하고 대기 시간(초) 반환."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._at) * self.rate)
+            self._at = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class _Flight:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def _status_code(e):
+    if isinstance(e, gspread.exceptions.APIError):
+        return getattr(e.response, "status_code", None) or e.code
+    return None
+
+
+def _retry_after(e):
+    resp = getattr(e, "response", None)
+    try:
+        return float(resp.headers.get("Retry-After"))
+    except Exception:
+        return None
+
+
+class SheetsRateLimiter:
+    """Sheets API 호출 제한 + 재시도 + 단일 비행.
+
+    read_per_min / write_per_min: 분당 쿼터 (서비스 계정 1개 기준)
+    burst: 순간적으로 허용할 연속 호출 수
+    max_retries: 429/5xx 재시도 횟수, base_delay / max_delay: 백오프 범위(초)
+    """
+
+    def __init__(self, read_per_min=60, write_per_min=60, burst=10,
+                 max_retries=5, base_delay=1.0, max_delay=32.0):
+        self.read_bucket = TokenBucket(read_per_min, burst)
+        self.write_bucket = TokenBucket(write_per_min, burst)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self._flights = {}
+
+        # 상태 표시용
+        self.calls = 0
+        self.wait_sec = 0.0
+        self.max_wait_sec = 0.0
+        self.retries = 0
+        self.throttled = 0      # 429 응답 수
+        self.coalesced = 0      # 진행 중 요청에 합쳐진 읽기 수
+        self.failures = 0
+        self.last_error = None
+
+    def _retryable(self, e, write):
+        code = _status_code(e)
+        if code == 429:
+            return True
+        if write:
+            return False
+        return (code is not None and code >= 500) or isinstance(
+            e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+    def call(self, fn, *args, write=False, **kwargs):
+        """제한기를 거쳐 fn 호출. 재시도할 수 없는 오류나 재시도 소진 시 마지막 예외를 그대로 올림."""
+        bucket = self.write_bucket if write else self.read_bucket
+        method = getattr(fn, "__name__", "call")
+        attempt = 0
+        while True:
+            waited = bucket.acquire()
+            with self._lock:
+                self.calls += 1
+                self.wait_sec += waited
+                self.max_wait_sec = max(self.max_wait_sec, waited)
+            if waited:
+                perf_metrics.observe("sheets_quota_wait_seconds", waited, method=method)
+            perf_metrics.METRICS.count_api_call()
+            t = time.perf_counter()
+            try:
+                out = fn(*args, **kwargs)
+            except Exception as e:
+                perf_metrics.observe("sheets_call_seconds", time.perf_counter() - t, method=method)
+                perf_metrics.inc("sheets_calls_total", method=method, outcome=str(_status_code(e) or type(e).__name__))
+                if _status_code(e) == 429:
+                    with self._lock:
+                        self.throttled += 1
+                if attempt >= self.max_retries or not self._retryable(e, write):
+                    with self._lock:
+                        self.failures += 1
+                        self.last_error = f"{type(e).__name__}: {e}"
+                    raise
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+                time.sleep(delay)
+            else:
+                perf_metrics.observe("sheets_call_seconds", time.perf_counter() - t, method=method)
+                perf_metrics.inc("sheets_calls_total", method=method, outcome="ok")
+                return out
+
+    def read_shared(self, key, fn, *args, **kwargs):
+        """같은 key의 읽기가 진행 중이면 그 결과를 기다려 공유, 아니면 직접 호출."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+        perf_metrics.cache_result("sheets_read_shared", not leader)
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return _copy(flight.result)
+        try:
+            flight.result = self.call(fn, *args, **kwargs)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "wait_sec": round(self.wait_sec, 2),
+                "max_wait_sec": round(self.max_wait_sec, 2),
+                "avg_wait_ms": round(self.wait_sec / self.calls * 1000, 1) if self.calls else 0.0,
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "coalesced": self.coalesced,
+                "failures": self.failures,
+                "last_error": self.last_error,
+            }
+
+
+def _copy(result):
+    # 나눠 받은 시트 값(list of list, get_all_records의 list of dict)은 행 단위로 복사 → 세션 간 변경이 섞이지 않음
+    if isinstance(result, list):
+        return [list(r) if isinstance(r, list) else dict(r) if isinstance(r, dict) else r for r in result]
+    return result
+
+
+def _hashable(v):
+    if isinstance(v, (list, tuple)):
+        return tuple(_hashable(x) for x in v)
+    if isinstance(v, dict):
+        return tuple(sorted((k, _hashable(x)) for k, x in v.items()))
+    return v
+
+
+class RateLimited:
+    """gspread Worksheet/Spreadsheet 프록시 — API 호출 메서드만 제한기를 거침."""
+
+    def __init__(self, target, limiter):
+        self._target = target
+        self._limiter = limiter
+
+    @property
+    def spreadsheet(self):
+        return RateLimited(self._target.spreadsheet, self._limiter)
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr) or (name not in READ_METHODS and name not in WRITE_METHODS):
+            return attr
+        limiter = self._limiter
+
+        if name in READ_METHODS:
+            def method(*args, **kwargs):
+                key = (id(self._target), name, _hashable(args), _hashable(kwargs))
+                out = limiter.read_shared(key, attr, *args, **kwargs)
+                return RateLimited(out, limiter) if name in _WRAP_RESULT else out
+        else:
+            def method(*args, **kwargs):
+                out = limiter.call(attr, *args, write=True, **kwargs)
+                return RateLimited(out, limiter) if name in _WRAP_RESULT else out
+        method.__name__ = name
+        return method
+
+    def __repr__(self):
+        return f"RateLimited({self._target!r})"
+
+
+# ------------------------------
+# 프로세스 공용 제한기
+# ------------------------------
+_LIMITER = None
+_LIMITER_LOCK = threading.Lock()
+
+
+def get_rate_limiter() -> SheetsRateLimiter:
+    """서비스 계정 쿼터는 프로세스 전체가 나눠 쓰므로 제한기도 1개."""
+    global _LIMITER
+    with _LIMITER_LOCK:
+        if _LIMITER is None:
+            _LIMITER = SheetsRateLimiter()
+            perf_metrics.register(_limiter_gauges)
+        return _LIMITER
+
+
+def _limiter_gauges():
+    s = _LIMITER.status()
+    return [
+        ("sheets_retries", {}, s["retries"]),
+        ("sheets_throttled", {}, s["throttled"]),
+        ("sheets_failures", {}, s["failures"]),
+    ]
+
+
+def rate_limited(target):
+    """gspread 객체를 공용 제한기로 감쌈 (이미 감싼 객체는 그대로)."""
+    if isinstance(target, RateLimited):
+        return target
+    return RateLimited(target, get_rate_limiter())
@@ -0,0 +1,95 @@
+# sheet_schema.py — 1행 헤더 검증/복구 (워크시트 핸들당 1회)
+# - ensure(): 아직 검증 전이면 row_values(1) 1회 조회 → 필요 시 헤더 칸만 update로 복구 → 결과 캐시
+# - 이후 체크인마다 헤더를 다시 읽지 않음
+# - 재검증은 쓰기 실패 후(invalidate) 또는 관리자 요청(revalidate) 때만
+# - 구(4열) / 신(5열) 헤더 공존: 기대 헤더가 실제 헤더의 앞부분과 같으면 통과
+
+import threading
+import zlib
+
+import perf_metrics
+
+
+def col_letter(n: int) -> str:
+    """1 → A, 5 → E, 27 → AA"""
+    s = ""
+    while n:
+        n, r = divmod(n - 1, 26)
+        s = chr(65 + r) + s
+    return s
+
+
+def schema_version(header) -> str:
+    """헤더 목록으로 만든 스키마 버전 문자열. 예) '5col-1a2b3c4d'"""
+    crc = zlib.crc32("|".join(header).encode("utf-8"))
+    return f"{len(header)}col-{crc:08x}"
+
+
+class SchemaGuard:
+    """워크시트 1행이 expected 헤더로 시작하는지 보장."""
+
+    def __init__(self, get_worksheet, expected, repair=True):
+        self._get_worksheet = get_worksheet
+        self.expected = list(expected)
+        self.repair = repair
+        self._lock = threading.Lock()
+        self._version = None
+        self.repaired = 0  # 복구 횟수 (상태 표시용)
+
+    @property
+    def verified(self) -> bool:
+        return self._version is not None
+
+    @property
+    def version(self):
+        return self._version
+
+    def ensure(self) -> str:
+        """검증된 스키마 버전 반환. 캐시가 없을 때만 시트 조회."""
+        v = self._version
+        perf_metrics.cache_result("schema_guard", v is not None)
+        if v is not None:
+            return v
+        with self._lock:
+            if self._version is None:
+                self._version = self._validate()
+            return self._version
+
+    def invalidate(self):
+        """다음 ensure() 때 다시 검증 (쓰기 실패 후 호출)."""
+        self._version = None
+
+    def revalidate(self) -> str:
+        """관리자 요청: 즉시 재검증/복구."""
+        self.invalidate()
+        return self.ensure()
+
+    def _validate(self) -> str:
+        ws = self._get_worksheet()
+        header = ws.row_values(1)
+        n = len(self.expected)
+        if [h.strip() for h in header[:n]] != self.expected:
+            if not self.repair:
+                raise RuntimeError(f"시트 헤더가 예상과 다릅니다: {header}")
+            # 기존 행은 그대로 두고 헤더 칸만 덮어씀 (delete_row/insert_row 없음)
+            ws.update(f"A1:{col_letter(n)}1", [self.expected])
+            self.repaired += 1
+        return schema_version(self.expected)
+
+
+# ------------------------------
+# 프로세스 공용 레지스트리
+# ------------------------------
+_GUARDS = {}
+_GUARDS_LOCK = threading.Lock()
+
+
+def get_schema_guard(key, get_worksheet, expected) -> SchemaGuard:
+    """(워크시트 key, 기대 헤더)별 공용 SchemaGuard."""
+    gkey = (key, tuple(expected))
+    with _GUARDS_LOCK:
+        g = _GUARDS.get(gkey)
+        if g is None:
+            g = SchemaGuard(get_worksheet, expected)
+            _GUARDS[gkey] = g
+        return g
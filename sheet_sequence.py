@@ -0,0 +1,165 @@
+# sheet_sequence.py — 연번(A열) 할당기
+# - 프로세스 시작 후 1회만 A열을 읽어 최고 연번(high-water mark)을 잡고, 이후에는 메모리에서 O(1) 할당
+# - lease(n)로 연속 블록을 잠금 하에 발급 → 동시 세션끼리 같은 연번을 받지 않음
+# - 다른 프로세스가 덧붙인 행은 append 응답(updatedRange)과 HWM 뒤쪽 소량 범위 조회로 따라잡음
+# - 연번 규칙은 기존과 동일: 연번 = 행 번호 - 1 (1행은 헤더)
+#   단, 보관(sheet_archive) 후에는 행이 줄어들므로 행 위치(_rows)와 연번(_hwm)을 따로 추적
+# - epoch(예: sheet_migrate 스키마 도장 갱신시각)가 바뀌면 꼬리 조회 대신 A열을 다시 읽음
+#   → 마이그레이션이 중간 행에 새 연번을 매겨도 재시작 없이 따라잡음
+
+import re
+import threading
+import time
+
+_UPDATED_RANGE_RE = re.compile(r"!?[A-Z]*(\d+)(?::[A-Z]*(\d+))?$")
+
+
+def _to_int(x):
+    try:
+        return int(str(x).strip())
+    except Exception:
+        return None
+
+
+def parse_updated_range(resp):
+    """append 응답의 updates.updatedRange(예: 'Sheet1!A5:E7')에서 (시작행, 끝행) 추출."""
+    try:
+        rng = resp["updates"]["updatedRange"]
+    except (TypeError, KeyError):
+        return None
+    m = _UPDATED_RANGE_RE.search(rng)
+    if not m:
+        return None
+    start = int(m.group(1))
+    end = int(m.group(2) or m.group(1))
+    return start, end
+
+
+class SequenceAllocator:
+    """워크시트 1개에 대한 연번 발급기.
+
+    get_worksheet: gspread Worksheet를 돌려주는 함수
+    probe_rows: 재동기화 시 HWM 뒤로 확인할 행 수 (범위 조회 1회 크기)
+    reconcile_interval: 이 시간(초)이 지나면 다음 lease 전에 범위 조회로 HWM 보정
+    epoch: () → 토큰. 보정 시점에 값이 바뀌었으면 A열 전체를 다시 읽어 HWM을 새로 잡음 (실패 시 무시)
+    """
+
+    def __init__(self, get_worksheet, probe_rows=50, reconcile_interval=30.0, epoch=None):
+        self._get_worksheet = get_worksheet
+        self.probe_rows = probe_rows
+        self.reconcile_interval = reconcile_interval
+        self.epoch = epoch
+        self._epoch_seen = None
+        self._lock = threading.Lock()
+        self._hwm = None          # 마지막으로 발급한 연번
+        self._rows = 0            # 알고 있는 데이터 행 수 (헤더 제외) — 꼬리 조회 위치
+        self._outstanding = 0     # 발급했지만 아직 기록되지 않은 연번 수
+        self._synced_at = 0.0
+
+    # ------------------------------
+    # 공개 API
+    # ------------------------------
+    def lease(self, n=1) -> range:
+        """연속된 연번 n개를 발급. (range 반환)"""
+        with self._lock:
+            if self._hwm is None:
+                self._seed()
+            elif self._outstanding == 0 and time.monotonic() - self._synced_at >= self.reconcile_interval:
+                if self._epoch_changed():
+                    self._seed()
+                else:
+                    self._reconcile()
+            start = self._hwm + 1
+            self._hwm += n
+            self._outstanding += n
+            return range(start, start + n)
+
+    def commit(self, block: range, resp=None):
+        """블록이 시트에 기록됨. append 응답이 있으면 실제 행 번호로 HWM 보정."""
+        with self._lock:
+            self._outstanding = max(0, self._outstanding - len(block))
+            rows = parse_updated_range(resp)
+            if rows:
+                # 다른 프로세스가 끼어들어 행이 더 아래에 붙었다면 그만큼 HWM을 올림
+                foreign = (rows[1] - 1) - (self._rows + len(block))
+                if foreign > 0:
+                    self._hwm += foreign
+                self._rows = rows[1] - 1
+                if self._outstanding == 0:
+                    self._synced_at = time.monotonic()
+
+    def release(self, block: range):
+        """기록 실패한 블록 반납. 마지막 블록이면 재사용, 아니면 빈 번호로 남김."""
+        with self._lock:
+            self._outstanding = max(0, self._outstanding - len(block))
+            if self._hwm is not None and block and self._hwm == block[-1]:
+                self._hwm = block[0] - 1
+
+    def advance_to(self, seq: int, rows=None):
+        """연번 seq까지 이미 사용된 것으로 표시 (실패로 보였던 append가 실제로 기록된 경우 등).
+        rows: 확인된 데이터 행 수 (알면 꼬리 조회 위치도 맞춤)."""
+        with self._lock:
+            if self._hwm is not None:
+                self._rows = max(self._rows, rows if rows is not None else self._rows + seq - self._hwm)
+                self._hwm = max(self._hwm, seq)
+
+    def next_row(self) -> int:
+        """다음 append가 붙을 시트 행 번호 (헤더 포함, 알고 있는 마지막 행 + 1)."""
+        with self._lock:
+            if self._hwm is None:
+                self._seed()
+            return self._rows + 2
+
+    def peek(self) -> int:
+        """다음에 발급될 연번 (발급하지 않음)."""
+        with self._lock:
+            if self._hwm is None:
+                self._seed()
+            return self._hwm + 1
+
+    def invalidate(self):
+        """다음 lease 때 A열을 다시 읽어 HWM을 새로 잡도록 함 (관리자 정리 작업 후 등)."""
+        with self._lock:
+            self._hwm = None
+
+    # ------------------------------
+    # 내부 (lock 보유 상태에서 호출)
+    # ------------------------------
+    def _read_epoch(self):
+        try:
+            return self.epoch() if self.epoch else None
+        except Exception:
+            return self._epoch_seen  # 읽기 실패는 변화 없음으로
+
+    def _epoch_changed(self):
+        e = self._read_epoch()
+        changed = e != self._epoch_seen
+        self._epoch_seen = e
+        return changed
+
+    def _seed(self):
+        self._epoch_seen = self._read_epoch()
+        colA = self._get_worksheet().col_values(1)  # 프로세스당 1회 (epoch가 바뀌면 다시)
+        nums = [v for v in (_to_int(x) for x in colA[1:]) if v is not None]
+        # 행 수 기준(기존 규칙)과 이미 쓰인 최대 연번 중 큰 값 → 과거 행과 충돌 없음
+        self._rows = len(colA) - 1
+        self._hwm = max(self._rows, max(nums, default=0))
+        self._outstanding = 0
+        self._synced_at = time.monotonic()
+
+    def _reconcile(self):
+        """마지막 행 뒤쪽 probe_rows 행만 조회해 다른 곳에서 추가된 행을 반영."""
+        ws = self._get_worksheet()
+        while True:
+            first = self._rows + 2  # 헤더 1행 + 다음 데이터 행
+            last = first + self.probe_rows - 1
+            values = ws.get(f"A{first}:A{last}")
+            filled = [r for r in values if r and str(r[0]).strip()]
+            if not filled:
+                break
+            nums = [v for v in (_to_int(r[0]) for r in filled) if v is not None]
+            self._rows += len(values)
+            self._hwm = max(self._hwm + len(values), max(nums, default=0))
+            if len(values) < self.probe_rows:
+                break
+        self._synced_at = time.monotonic()
@@ -0,0 +1,137 @@
+# sheet_sync.py — 관리자 대시보드용 증분(delta) 동기화
+# - 최초 1회 get_all_values로 전체 로드 → 이후에는 마지막으로 알고 있는 행 뒤쪽만 범위 조회
+# - 범위 조회는 이미 알고 있는 꼬리 overlap 행을 함께 읽어 비교 → 다르면(수정/삭제) 전체 재동기화
+# - 변경이 없고 min_interval 이내면 API 호출 없이 캐시 반환 (필터/날짜 변경 rerun)
+# - 체크인 쓰기 경로가 invalidate(key)를 호출 → 같은 프로세스의 모든 세션이 다음 rerun에 새 행을 가져옴
+# - 대시보드는 refresh() 결과를 로컬 저널(CheckinJournal.sync_from)로 반영하고 저널에서 조회 (DataFrame 캐시 없음)
+
+import threading
+import time
+
+from sheet_schema import col_letter
+
+
+class SheetDeltaSync:
+    """워크시트 1개의 원본 값(header, rows) 캐시.
+
+    get_worksheet: gspread Worksheet를 돌려주는 함수
+    overlap_rows: 증분 조회 때 다시 읽어 비교할 꼬리 행 수
+    min_interval: 이 시간(초) 안의 재조회는 invalidate 되지 않았으면 생략
+    full_resync_interval: 꼬리 밖의 수정까지 잡기 위한 주기적 전체 재동기화(초)
+    """
+
+    def __init__(self, get_worksheet, overlap_rows=5, min_interval=10.0,
+                 full_resync_interval=900.0):
+        self._get_worksheet = get_worksheet
+        self.overlap_rows = overlap_rows
+        self.min_interval = min_interval
+        self.full_resync_interval = full_resync_interval
+
+        self._lock = threading.RLock()
+        self.header = []
+        self.rows = []
+        self.generation = 0      # 전체 재동기화 때마다 +1
+        self._loaded = False
+        self._dirty = True
+        self._checked_at = 0.0
+        self._full_at = 0.0
+
+        # 상태 표시용
+        self.full_syncs = 0
+        self.delta_syncs = 0
+        self.last_new_rows = 0
+
+    @property
+    def version(self):
+        """데이터 버전 (generation, 행 수) — 다른 캐시의 키로 사용."""
+        return (self.generation, len(self.rows))
+
+    def invalidate(self):
+        """새 행이 기록됨 → 다음 refresh()에서 증분 조회."""
+        self._dirty = True
+
+    def refresh(self, force_full=False):
+        """필요할 때만 시트를 조회해 캐시를 최신으로. (header, rows) 반환."""
+        with self._lock:
+            now = time.monotonic()
+            if force_full or not self._loaded or now - self._full_at >= self.full_resync_interval:
+                self._full_sync()
+            elif self._dirty or now - self._checked_at >= self.min_interval:
+                self._delta_sync()
+            return self.header, self.rows
+
+    def status(self) -> dict:
+        return {
+            "rows": len(self.rows),
+            "generation": self.generation,
+            "full_syncs": self.full_syncs,
+            "delta_syncs": self.delta_syncs,
+            "last_new_rows": self.last_new_rows,
+        }
+
+    # ------------------------------
+    # 내부
+    # ------------------------------
+    def _width(self):
+        return max(len(self.header), 1)
+
+    def _pad(self, row):
+        w = self._width()
+        row = [str(x) for x in row[:w]]
+        return row + [""] * (w - len(row))
+
+    def _full_sync(self):
+        values = self._get_worksheet().get_all_values()
+        self.header = [h.strip() for h in values[0]] if values else []
+        self.rows = [self._pad(r) for r in values[1:]]
+        self.generation += 1
+        self._loaded = True
+        self._dirty = False
+        self._checked_at = self._full_at = time.monotonic()
+        self.full_syncs += 1
+        self.last_new_rows = len(self.rows)
+
+    def _delta_sync(self):
+        if not self.header:
+            return self._full_sync()
+        n = len(self.rows)
+        k = min(self.overlap_rows, n)
+        start = n - k + 2  # 1행 헤더 + 1-base
+        values = self._get_worksheet().get(f"A{start}:{col_letter(self._width())}")
+        values = [self._pad(r) for r in values]
+
+        # 꼬리 overlap이 달라졌거나 행이 줄었으면 수정/삭제 → 전체 재동기화
+        if values[:k] != self.rows[n - k:]:
+            return self._full_sync()
+
+        new_rows = values[k:]
+        self.rows.extend(new_rows)
+        self._dirty = False
+        self._checked_at = time.monotonic()
+        self.delta_syncs += 1
+        self.last_new_rows = len(new_rows)
+
+
+# ------------------------------
+# 프로세스 공용 레지스트리
+# ------------------------------
+_SYNCS = {}
+_SYNCS_LOCK = threading.Lock()
+
+
+def get_sheet_sync(key, get_worksheet, **kwargs) -> SheetDeltaSync:
+    """key(예: ("체크인기록", "Sheet1"))별 공용 동기화 엔진."""
+    with _SYNCS_LOCK:
+        s = _SYNCS.get(key)
+        if s is None:
+            s = SheetDeltaSync(get_worksheet, **kwargs)
+            _SYNCS[key] = s
+        return s
+
+
+def invalidate(key):
+    """쓰기 경로에서 호출: key 워크시트에 새 행이 기록됨."""
+    with _SYNCS_LOCK:
+        s = _SYNCS.get(key)
+    if s is not None:
+        s.invalidate()
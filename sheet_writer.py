@@ -0,0 +1,272 @@
+# sheet_writer.py — 체크인 기록 write-behind 큐 (프로세스 공용)
+# - 제출(submit)은 행을 큐에 넣고 즉시 반환 → 대원은 시트 API 응답을 기다리지 않음
+# - 백그라운드 flusher가 flush_interval 초마다(또는 max_batch 도달 시) append_rows 1회로 일괄 기록
+# - 연번은 flush 시점에 SequenceAllocator에서 배치 단위 블록으로 발급 (A열 전체 조회 없음)
+# - 프로세스 종료 시 남은 행을 flush (atexit)
+# - row_key를 주면 기록 실패(응답 유실 포함) 후 재시도 전에 꼬리 행을 확인해 이미 들어간 행은 다시 쓰지 않음
+
+import atexit
+import threading
+import time
+from collections import deque
+
+import perf_metrics
+from sheet_schema import col_letter as _col
+from sheet_sequence import SequenceAllocator
+
+
+class CheckinWriteQueue:
+    """시트 append를 모아서 처리하는 write-behind 큐.
+
+    get_worksheet: gspread Worksheet를 돌려주는 함수 (캐시된 핸들 권장)
+    allocator: 연번 발급기 (없으면 get_worksheet로 새로 만듦)
+    schema_guard: 헤더 검증기 (배치 기록 전 캐시 확인, 기록 실패 시 무효화)
+    on_flushed: 배치 기록 성공 후 호출할 함수 ([(key, 연번), ...] 전달, 예: 저널 반영/대시보드 캐시 무효화)
+    row_key: 행(연번 제외) → 멱등 키 함수. 재시도 시 중복 기록 방지에 사용
+    seq_epoch: 새로 만드는 SequenceAllocator의 epoch (스키마 도장 등이 바뀌면 연번 HWM 다시 읽기)
+    행은 연번을 제외한 값 목록으로 넣는다. 예) [이름, 근무장소, 근무시간, 특이사항]
+    """
+
+    def __init__(self, get_worksheet, flush_interval=2.0, max_batch=50,
+                 max_pending=5000, value_input_option="RAW", allocator=None, schema_guard=None,
+                 on_flushed=None, row_key=None, seq_epoch=None):
+        self._get_worksheet = get_worksheet
+        self.allocator = allocator or SequenceAllocator(get_worksheet, epoch=seq_epoch)
+        self.schema_guard = schema_guard
+        self.on_flushed = on_flushed
+        self.row_key = row_key
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.value_input_option = value_input_option
+
+        self._pending = deque()  # (enqueued_at, row, key)
+        self._uncertain_row = None  # 실패한 append가 들어갔을 수도 있는 시작 행 번호
+        self._cond = threading.Condition()
+        self._inflight = 0
+        self._stopped = False
+        self._flush_requested = False
+
+        # 상태(사이드바 표시용)
+        self._flushed_total = 0
+        self._batches = 0
+        self._failures = 0
+        self._last_error = None
+        self._last_flush_at = None
+        self._last_flush_rows = 0
+        self._last_flush_sec = 0.0
+        self._last_latency_sec = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="checkin-write-queue", daemon=True)
+        self._thread.start()
+
+    # ------------------------------
+    # 공개 API
+    # ------------------------------
+    def submit(self, row, key=None) -> int:
+        """행을 큐에 넣고 현재 대기 건수를 반환. key: 저널 row_key (없으면 row_key 함수로 계산)."""
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("쓰기 큐가 종료되었습니다.")
+            if len(self._pending) >= self.max_pending:
+                raise RuntimeError(f"쓰기 대기열이 가득 찼습니다. ({self.max_pending}건)")
+            if key is None and self.row_key is not None:
+                key = self.row_key(row)
+            self._pending.append((time.monotonic(), list(row), key))
+            depth = len(self._pending)
+            if depth >= self.max_batch:
+                self._cond.notify_all()
+            return depth
+
+    def flush(self, timeout=10.0) -> bool:
+        """대기 중인 행을 즉시 기록하도록 깨우고, 비워질 때까지(최대 timeout초) 기다림."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._pending or self._inflight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._thread.is_alive():
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout=10.0) -> bool:
+        """남은 행을 flush 하고 flusher 종료."""
+        ok = self.flush(timeout)
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join(timeout=1.0)
+        return ok
+
+    def status(self) -> dict:
+        """대기 건수 / 가장 오래된 대기 시간 / 최근 flush 지연 등."""
+        with self._cond:
+            oldest = (time.monotonic() - self._pending[0][0]) if self._pending else 0.0
+            return {
+                "depth": len(self._pending) + self._inflight,
+                "oldest_wait_sec": round(oldest, 3),
+                "flushed_total": self._flushed_total,
+                "batches": self._batches,
+                "failures": self._failures,
+                "last_error": self._last_error,
+                "last_flush_at": self._last_flush_at,
+                "last_flush_rows": self._last_flush_rows,
+                "last_flush_sec": round(self._last_flush_sec, 3),
+                "last_latency_sec": round(self._last_latency_sec, 3),
+            }
+
+    # ------------------------------
+    # flusher
+    # ------------------------------
+    def _run(self):
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                while not self._stopped and not self._flush_requested \
+                        and len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._stopped and not self._pending:
+                    return
+                self._flush_requested = False
+                batch = [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+                self._inflight = len(batch)
+            if batch:
+                with perf_metrics.span("sheet_flush"):
+                    self._write_batch(batch)
+            with self._cond:
+                self._inflight = 0
+                self._cond.notify_all()
+
+    def _write_batch(self, batch):
+        started = time.monotonic()
+        try:
+            ws = self._get_worksheet()
+            if self.schema_guard is not None:
+                self.schema_guard.ensure()  # 검증 캐시가 있으면 API 호출 없음
+            done = []
+            if self._uncertain_row is not None:
+                batch, done = self._drop_already_written(ws, batch)
+            block = self.allocator.lease(len(batch)) if batch else range(0)
+        except Exception as e:
+            self._requeue(batch, e)
+            return
+        flushed = list(done)
+        if batch:
+            try:
+                rows = [[seq] + row for seq, (_, row, _) in zip(block, batch)]
+                resp = ws.append_rows(rows, value_input_option=self.value_input_option)
+            except Exception as e:
+                # 응답만 유실되고 실제로는 기록됐을 수 있음 → 다음 시도 전에 이 위치부터 확인
+                if self._uncertain_row is None:
+                    self._uncertain_row = self.allocator.next_row()
+                self.allocator.release(block)
+                if self.schema_guard is not None:
+                    self.schema_guard.invalidate()  # 다음 배치 전에 헤더 재검증
+                self._requeue(batch, e)
+                return
+            self.allocator.commit(block, resp)
+            flushed += [(key, seq) for seq, (_, _, key) in zip(block, batch)]
+        self._uncertain_row = None
+        if self.on_flushed is not None:
+            try:
+                self.on_flushed(flushed)
+            except Exception:
+                pass
+
+        finished = time.monotonic()
+        with self._cond:
+            self._flushed_total += len(flushed)
+            self._batches += 1
+            self._last_error = None
+            self._last_flush_at = time.time()
+            self._last_flush_rows = len(flushed)
+            self._last_flush_sec = finished - started
+            if batch:
+                self._last_latency_sec = finished - batch[0][0]
+
+    def _drop_already_written(self, ws, batch):
+        """실패 지점 이후 꼬리 행만 읽어 키가 같은 행은 기록 완료로 처리. (남은 배치, [(key, 연번)])"""
+        if self.row_key is None:
+            return batch, []
+        width = max(len(row) for _, row, _ in batch) + 1
+        values = ws.get(f"A{self._uncertain_row}:{_col(width)}")
+        written = {}
+        for r in values:
+            if len(r) > 1:
+                written.setdefault(self.row_key(r[1:]), r[0])
+        rest, done = [], []
+        for entry in batch:
+            seq = written.get(entry[2])
+            if entry[2] is not None and seq is not None:
+                done.append((entry[2], seq))
+            else:
+                rest.append(entry)
+        # 이미 들어간 행까지 HWM을 따라잡음 (반납된 연번 재사용 방지)
+        if values:
+            nums = [int(r[0]) for r in values if r and str(r[0]).strip().isdigit()]
+            if nums:
+                self.allocator.advance_to(max(nums), rows=self._uncertain_row - 2 + len(values))
+        return rest, done
+
+    def _requeue(self, batch, e):
+        # 실패한 배치는 순서를 유지한 채 큐 앞쪽으로 되돌리고 다음 주기에 재시도
+        with self._cond:
+            self._pending.extendleft(reversed(batch))
+            self._inflight = 0
+            self._failures += 1
+            self._last_error = f"{type(e).__name__}: {e}"
+        time.sleep(min(self.flush_interval, 5.0))
+
+
+# ------------------------------
+# 프로세스 공용 레지스트리 (스프레드시트/워크시트별 큐 1개)
+# ------------------------------
+_QUEUES = {}
+_QUEUES_LOCK = threading.Lock()
+
+
+def get_write_queue(key, get_worksheet, **kwargs) -> CheckinWriteQueue:
+    """key(예: ("체크인기록", "Sheet1"))별 공용 큐 반환. 없으면 생성.
+    kwargs는 처음 만들 때만 쓰임 — 워크시트당 큐(연번 할당기)는 1개여야 하므로, 나중 호출이 다른 헤더 기준
+    (schema_guard)을 주면 먼저 만든 진입점의 스키마로 조용히 기록하지 않도록 ValueError."""
+    with _QUEUES_LOCK:
+        q = _QUEUES.get(key)
+        if q is None:
+            q = CheckinWriteQueue(get_worksheet, **kwargs)
+            _QUEUES[key] = q
+            perf_metrics.register(_queue_gauges)
+        elif kwargs.get("schema_guard") is not None and kwargs["schema_guard"] is not q.schema_guard:
+            have = getattr(q.schema_guard, "expected", None)
+            want = getattr(kwargs["schema_guard"], "expected", None)
+            raise ValueError(f"{key} 쓰기 큐가 이미 다른 헤더 기준으로 만들어졌습니다: {have} ≠ {want}")
+        return q
+
+
+def _queue_gauges():
+    with _QUEUES_LOCK:
+        queues = list(_QUEUES.items())
+    out = []
+    for key, q in queues:
+        s = q.status()
+        labels = {"sheet": "/".join(map(str, key))}
+        out += [
+            ("write_queue_depth", labels, s["depth"]),
+            ("write_queue_oldest_wait_seconds", labels, s["oldest_wait_sec"]),
+            ("write_queue_failures", labels, s["failures"]),
+        ]
+    return out
+
+
+def flush_all(timeout=10.0) -> bool:
+    """모든 큐 flush (종료 시 호출)."""
+    with _QUEUES_LOCK:
+        queues = list(_QUEUES.values())
+    return all(q.flush(timeout) for q in queues)
+
+
+atexit.register(flush_all)
@@ -0,0 +1,216 @@
+# sheets_client.py — 공용 gspread 클라이언트 (프로세스당 1개, 첫 사용 시 인증)
+# - streamlit_app / admin_qr_checkin_only / log_to_sheet(checkin_form) 가 같은 클라이언트를 사용
+#   → 서비스 계정 인증·HTTP 세션·액세스 토큰을 워크시트/앱 간에 재사용
+# - import 시점에는 아무것도 하지 않음 (secrets 읽기/인증은 첫 open 때)
+# - 액세스 토큰은 만료 refresh_margin초 전에 백그라운드 스레드가 미리 갱신 → 요청 도중 401 → 재인증 왕복 없음
+# - 스프레드시트는 키로 엽니다 (open_by_key): Drive 이름 검색 왕복이 없음
+#   secrets.toml [gspread] sheet_id가 있으면 그 키를, 없으면 이름으로 한 번 연 뒤 키를 기억해 재사용
+# - 모든 API 호출은 sheet_ratelimit 공용 제한기를 거침
+# - 인증/토큰 갱신/스프레드시트 열기 시간은 perf_metrics에 기록 (sheets_auth, sheets_open)
+
+import threading
+import time
+from datetime import datetime
+
+import gspread
+from google.auth.transport.requests import Request
+from google.oauth2.service_account import Credentials
+
+import perf_metrics
+from sheet_ratelimit import rate_limited
+
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+]
+DEFAULT_SPREADSHEET = "체크인기록"
+
+
+def secrets_service_account():
+    """secrets.toml의 [gcp_service_account] → dict (Cloud secrets의 \\n → 개행 복원)."""
+    import streamlit as st
+
+    if "gcp_service_account" not in st.secrets:
+        raise RuntimeError("secrets.toml에 [gcp_service_account]가 없습니다.")
+    info = dict(st.secrets["gcp_service_account"])
+    if "private_key" in info:
+        info["private_key"] = info["private_key"].replace("\\n", "\n")
+    return info
+
+
+def secrets_sheet_keys():
+    """secrets.toml의 [gspread] sheet_id → {"체크인기록": 키} (없으면 빈 dict)."""
+    import streamlit as st
+
+    try:
+        conf = dict(st.secrets.get("gspread", {}))
+    except Exception:
+        return {}
+    keys = dict(conf.get("sheet_ids", {}))
+    if conf.get("sheet_id"):
+        keys.setdefault(DEFAULT_SPREADSHEET, conf["sheet_id"])
+    return keys
+
+
+class SheetsClient:
+    """지연 인증 gspread 클라이언트 + 스프레드시트 핸들 캐시.
+
+    load_info: 서비스 계정 dict를 돌려주는 함수 (첫 사용 시 1회 호출)
+    load_keys: {스프레드시트 이름: 키}를 돌려주는 함수 (open_by_key용)
+    refresh_margin: 토큰 만료 몇 초 전에 미리 갱신할지
+    client: 이미 만든 gspread 호환 클라이언트 (fake_sheets 부하 테스트 등) — 주면 인증·토큰 갱신 생략
+    """
+
+    def __init__(self, load_info=secrets_service_account, load_keys=secrets_sheet_keys,
+                 scopes=SCOPES, refresh_margin=300.0, client=None):
+        self._load_info = load_info
+        self._load_keys = load_keys
+        self.scopes = scopes
+        self.refresh_margin = refresh_margin
+
+        self._lock = threading.RLock()
+        self._creds = None
+        self._client = client
+        self._keys = None           # 스프레드시트 이름 → 키
+        self._spreadsheets = {}     # 키 → (rate_limited) Spreadsheet
+        self._refresher = None
+
+        # 상태 표시용
+        self.authorized_at = time.time() if client is not None else None
+        self.refreshes = 0
+        self.opens_by_key = 0
+        self.opens_by_name = 0
+        self.last_error = None
+
+    # ------------------------------
+    # 인증 / 토큰
+    # ------------------------------
+    @property
+    def client(self) -> gspread.Client:
+        with self._lock:
+            if self._client is None:
+                with perf_metrics.span("sheets_auth"):
+                    self._creds = Credentials.from_service_account_info(self._load_info(), scopes=self.scopes)
+                    self._client = gspread.authorize(self._creds)
+                    self.authorized_at = time.time()
+                    self._refresh()
+                self._start_refresher()
+            return self._client
+
+    def _expires_in(self):
+        expiry = getattr(self._creds, "expiry", None)  # UTC naive datetime
+        if expiry is None:
+            return None
+        return (expiry - datetime.utcnow()).total_seconds()
+
+    def _refresh(self):
+        """토큰 갱신 (HTTP 세션은 같은 credentials 객체를 보므로 그대로 재사용)."""
+        with self._lock, perf_metrics.span("sheets_token_refresh"):
+            self._creds.refresh(Request())
+            self.refreshes += 1
+
+    def ensure_fresh(self):
+        """만료가 임박했으면 지금 갱신 (백그라운드 갱신이 늦은 경우 대비)."""
+        with self._lock:
+            left = self._expires_in()
+            if left is None or left < self.refresh_margin:
+                self._refresh()
+
+    def _start_refresher(self):
+        if self._refresher is not None:
+            return
+        self._refresher = threading.Thread(target=self._refresh_loop, name="sheets-token-refresh", daemon=True)
+        self._refresher.start()
+
+    def _refresh_loop(self):
+        while True:
+            left = self._expires_in()
+            wait = (left - self.refresh_margin) if left is not None else self.refresh_margin
+            time.sleep(max(wait, 30.0))
+            try:
+                self.ensure_fresh()
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+
+    # ------------------------------
+    # 스프레드시트 / 워크시트
+    # ------------------------------
+    def open(self, name=DEFAULT_SPREADSHEET, key=None):
+        """스프레드시트 열기 (키 우선). 같은 스프레드시트는 핸들을 재사용."""
+        with self._lock:
+            if self._keys is None:
+                try:
+                    self._keys = dict(self._load_keys() or {})
+                except Exception:
+                    self._keys = {}
+            key = key or self._keys.get(name)
+            if key and key in self._spreadsheets:
+                perf_metrics.cache_result("spreadsheet_handle", True)
+                return self._spreadsheets[key]
+        perf_metrics.cache_result("spreadsheet_handle", False)
+        client = self.client
+        if key:
+            with perf_metrics.span("sheets_open", by="key"):
+                sh = client.open_by_key(key)
+            self.opens_by_key += 1
+        else:
+            with perf_metrics.span("sheets_open", by="name"):
+                sh = client.open(name)  # Drive 이름 검색 — 이후에는 기억한 키로
+            self.opens_by_name += 1
+        sh = rate_limited(sh)
+        with self._lock:
+            key = key or sh.id
+            self._keys[name] = key
+            self._spreadsheets.setdefault(key, sh)
+            return self._spreadsheets[key]
+
+    def worksheet(self, spread_name=DEFAULT_SPREADSHEET, worksheet_name="Sheet1", create=False):
+        """워크시트 열기. create=True면 없을 때 새로 만듦."""
+        sh = self.open(spread_name)
+        try:
+            return sh.worksheet(worksheet_name)
+        except gspread.WorksheetNotFound:
+            if not create:
+                raise
+            return sh.add_worksheet(title=worksheet_name, rows=1000, cols=20)
+
+    def status(self) -> dict:
+        left = self._expires_in() if self._creds is not None else None
+        return {
+            "authorized": self._client is not None,
+            "token_expires_in_sec": round(left) if left is not None else None,
+            "refreshes": self.refreshes,
+            "opens_by_key": self.opens_by_key,
+            "opens_by_name": self.opens_by_name,
+            "last_error": self.last_error,
+        }
+
+
+# ------------------------------
+# 프로세스 공용 클라이언트
+# ------------------------------
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_sheets_client() -> SheetsClient:
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = SheetsClient()
+        return _CLIENT
+
+
+def use_sheets_client(client: SheetsClient):
+    """프로세스 공용 클라이언트 교체 (부하 테스트에서 가짜 백엔드 연결용). 첫 open 전에 호출."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        _CLIENT = client
+
+
+def open_spreadsheet(name=DEFAULT_SPREADSHEET):
+    return get_sheets_client().open(name)
+
+
+def open_worksheet(spread_name=DEFAULT_SPREADSHEET, worksheet_name="Sheet1", create=False):
+    return get_sheets_client().worksheet(spread_name, worksheet_name, create=create)
@@ -0,0 +1,134 @@
+# startup_report.py — 체크인 앱 시작 시간 측정 (콜드 스타트 회귀 감시)
+# - 앱 안: run_started() / first_paint(t0, page) → 페이지별 첫 화면 시간, 프로세스 첫 실행(콜드 스타트) 시간,
+#   그 시점에 무거운 모듈(pandas, gspread 등)이 이미 로드됐는지 기록 → 관리자 요약 사이드바에 표시
+# - 명령줄: python startup_report.py [--budget-ms 100]
+#   체크인 경로 모듈(진입점 streamlit_app / checkin_form의 최상위 import에서 자동 추출)을 각각 새 프로세스에서
+#   import(-X importtime, streamlit은 진입점이 어차피 로드하므로 미리 import)해 모듈별 시간 출력,
+#   체크인 경로에 pandas가 섞였거나 합계가 예산을 넘으면 종료 코드 1
+
+import argparse
+import ast
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# QR 스캔 → "대원 체크인" 화면에 필요한 모듈 (여기에 pandas/gspread가 끌려오면 안 됨)
+# = 체크인 진입점(streamlit_app / checkin_form)의 최상위 import 중 이 저장소 모듈 (checkin_path_modules())
+CHECKIN_ENTRY_POINTS = ["streamlit_app.py", "checkin_form.py"]
+# 첫 화면 이후(백그라운드/관리자 화면)에만 로드돼야 하는 무거운 모듈
+HEAVY_MODULES = ["pandas", "gspread", "google.auth", "PIL", "qrcode"]
+
+_LOCK = threading.Lock()
+_COLD = None          # 프로세스 첫 실행의 첫 화면 {"page", "ms", "heavy"}
+_PAGES = {}           # page → 최근 첫 화면 ms
+_IMPORTS = {}         # 지연 로드 모듈 → 로드 시간(ms)
+
+
+def run_started() -> float:
+    """스크립트 실행 시작 시각 (perf_counter)."""
+    return time.perf_counter()
+
+
+def loaded_heavy():
+    """현재 프로세스에 이미 로드된 무거운 모듈 목록."""
+    return [m for m in HEAVY_MODULES if m in sys.modules]
+
+
+def first_paint(t0, page):
+    """첫 화면(폼) 렌더링 완료 시점 기록. 소요 시간(ms) 반환."""
+    global _COLD
+    ms = (time.perf_counter() - t0) * 1000
+    with _LOCK:
+        _PAGES[page] = round(ms, 1)
+        if _COLD is None:
+            _COLD = {"page": page, "ms": round(ms, 1), "heavy": loaded_heavy()}
+    return ms
+
+
+@contextmanager
+def timed(label):
+    """지연 로드 구간 시간 측정 (with timed("관리자 요약"): import ...). 첫 측정값만 유지."""
+    t = time.perf_counter()
+    yield
+    with _LOCK:
+        _IMPORTS.setdefault(label, round((time.perf_counter() - t) * 1000, 1))
+
+
+def report() -> dict:
+    with _LOCK:
+        return {"cold": dict(_COLD) if _COLD else None, "pages": dict(_PAGES), "imports": dict(_IMPORTS)}
+
+
+# ------------------------------
+# 명령줄: 모듈별 import 시간
+# ------------------------------
+def checkin_path_modules(entry_points=CHECKIN_ENTRY_POINTS, root=None):
+    """진입점 파일의 최상위(함수/페이지 분기 밖) import 중 저장소 안 모듈 이름 — 새로 추가된 import도 자동 포함.
+    명령줄에서만 호출 (앱 시작 시 파일을 파싱하지 않도록)."""
+    root = root or os.path.dirname(os.path.abspath(__file__))
+    found = []
+    for entry in entry_points:
+        with open(os.path.join(root, entry), encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=entry)
+        for node in tree.body:
+            if isinstance(node, ast.Import):
+                names = [a.name for a in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                top = name.split(".")[0]
+                if os.path.exists(os.path.join(root, f"{top}.py")) and top not in found:
+                    found.append(top)
+    return sorted(found)
+
+
+def import_ms(module, preload=()):
+    """새 프로세스에서 module import 누적 시간(ms) 및 함께 로드된 무거운 모듈.
+    preload: 먼저 import해 둘 모듈 (시간에서 제외)."""
+    code = "".join(f"import {m}; " for m in preload)
+    code += (f"import sys; import {module}; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                         capture_output=True, text=True, check=True)
+    total = 0
+    for line in out.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            total = int(parts[1])
+    heavy = [m for m in out.stdout.strip().split(",") if m]
+    return total / 1000, heavy
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="체크인 경로 import 시간 보고")
+    parser.add_argument("--budget-ms", type=float, default=100.0, help="체크인 경로 모듈 import 합계 예산")
+    parser.add_argument("--modules", nargs="*", help="측정할 모듈 (기본: 체크인 진입점의 최상위 import)")
+    args = parser.parse_args(argv)
+    args.modules = args.modules or checkin_path_modules()
+
+    ok = True
+    total = 0.0
+    for m in args.modules:
+        ms, heavy = import_ms(m, preload=("streamlit",))
+        total += ms
+        flag = f"  ⚠️ {', '.join(heavy)} 로드됨" if heavy else ""
+        print(f"{m:24s} {ms:8.1f} ms{flag}")
+        ok = ok and not heavy
+    for m in ["streamlit", "pandas", "gspread"]:
+        ms, _ = import_ms(m)
+        print(f"{'(참고) ' + m:24s} {ms:8.1f} ms")
+    print(f"체크인 경로 합계 {total:.1f} ms / 예산 {args.budget_ms:.0f} ms")
+    if total > args.budget_ms:
+        ok = False
+    print("✅ 통과" if ok else "❌ 회귀: 체크인 경로가 무거워졌습니다")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,27 @@
 # streamlit_app.py — 아동안전지킴이 전용 (수서경찰서 관내 초등학교 26개)
+# 콜드 스타트: QR 스캔이 여는 "대원 체크인" 화면은 가벼운 모듈만 import
+#   - pandas / 대시보드 모듈은 "관리자 요약" 선택 시, QR 렌더러는 "QR 생성" 선택 시 로드
+#   - gspread 인증/워크시트 열기는 폼을 그리는 동안 백그라운드 스레드에서 미리 수행
+#   - 시작 시간 보고: startup_report.py (앱 안 첫 화면 시간 + 명령줄 import 시간 예산)
+# 계측: perf_metrics (Sheets 호출·DataFrame 로드·QR 렌더링 시간, rerun당 API 호출 수) → 관리자 요약 사이드바
+from startup_report import first_paint, run_started
+_RUN_T0 = run_started()
+
+import perf_metrics
+perf_metrics.begin_rerun()
+perf_metrics.start_exporter()  # CHECKIN_METRICS_FILE이 있을 때만
+
+import threading
 import streamlit as st
-from datetime import datetime
+from datetime import datetime, date
 import pytz
-import pandas as pd
 
-# gspread + oauth2client (Cloud secrets의 \\n → \n 변환)
-from oauth2client.service_account import ServiceAccountCredentials
-import gspread
+from checkin_codes import resolve_params
+from checkin_dedup import get_suppressor
+from checkin_journal import COLUMNS as JOURNAL_COLUMNS, get_journal, row_key, start_replication
+from sheet_schema import get_schema_guard
+from sheet_sync import get_sheet_sync, invalidate as invalidate_sheet_sync
+from sheet_writer import get_write_queue
 
 APP_VERSION = "seq-5cols-note-2025-10-02"  # 버전 확인용(사이드바 표시)
 SEOUL_TZ = pytz.timezone("Asia/Seoul")
@@ -26,78 +41,135 @@ SCHOOL_OPTIONS = [
 # ------------------------------
 # GSpread 연결 + 헤더 강제 + 연번 자동
 # ------------------------------
-SCOPE = [
-    "https://spreadsheets.google.com/feeds",
-    "https://www.googleapis.com/auth/drive"
-]
 EXPECTED_HEADER = ["연번", "이름", "근무장소", "근무시간", "특이사항"]  # ★ 특이사항 포함
+SHEET_KEY = ("체크인기록", "Sheet1")
 
 @st.cache_resource(show_spinner=False)
 def get_worksheet():
-    # 1) 시크릿 읽기 + private_key 개행 복원
-    sa_dict = dict(st.secrets["gcp_service_account"])
-    sa_dict["private_key"] = sa_dict["private_key"].replace("\\n", "\n")
+    # 공용 클라이언트: 첫 사용 시 인증, 토큰 미리 갱신, open_by_key([gspread] sheet_id), 공용 호출 제한기
+    from sheets_client import open_worksheet  # gspread/google-auth는 여기서 처음 로드
 
-    # 2) 인증/클라이언트
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(sa_dict, SCOPE)
-    client = gspread.authorize(creds)
+    return open_worksheet("체크인기록", "Sheet1", create=True)
 
-    # 3) 스프레드시트/워크시트 열기
-    #    필요 시 open_by_key로: sh = client.open_by_key(st.secrets["gspread"]["sheet_id"])
-    sh = client.open("체크인기록")
-    try:
-        ws = sh.worksheet("Sheet1")
-    except gspread.WorksheetNotFound:
-        ws = sh.add_worksheet(title="Sheet1", rows=1000, cols=20)
+@st.cache_resource(show_spinner=False)
+def warm_sheets_client():
+    """프로세스당 1회: 인증 + 워크시트 열기 + 헤더 검증을 백그라운드에서 미리 (첫 제출 대기 단축)."""
+    def _warm():
+        try:
+            get_worksheet()
+            get_header_guard().ensure()
+            get_checkin_journal()  # 재시작 직후 미반영 행 재전송도 여기서 시작
+        except Exception:
+            pass  # 실패해도 첫 복제 때 다시 시도
+    t = threading.Thread(target=_warm, name="sheets-warmup", daemon=True)
+    t.start()
+    return t
+
+def get_header_guard():
+    """1행 헤더 검증기 — 워크시트당 1회 검증 후 캐시 (5열로 통일)."""
+    return get_schema_guard(SHEET_KEY, get_worksheet, EXPECTED_HEADER)
+
+def _on_checkins_flushed(flushed):
+    """시트 반영 완료 → 저널에 복제 완료 표시 + 모든 세션의 대시보드 캐시 갱신."""
+    get_journal().mark_replicated(flushed)
+    invalidate_sheet_sync(SHEET_KEY)
 
-    # 4) 헤더 강제(1행) — 5열로 통일
-    header = ws.row_values(1)
-    if header[:5] != EXPECTED_HEADER:
-        ws.update("A1:E1", [EXPECTED_HEADER])
-    return ws
+def _seq_epoch():
+    """연번 할당기 epoch — sheet_migrate 스키마 도장이 바뀌면 A열을 다시 읽음 (복제 스레드에서만 호출)."""
+    from sheet_migrate import migration_epoch
 
-def append_checkin_ordered(name: str, school: str, ts_kst: str, note: str):
+    return migration_epoch(SHEET_KEY, lambda: get_worksheet().spreadsheet)()
+
+def get_checkin_queue():
+    """체크인 기록용 write-behind 큐 = 저널 → 시트 복제기 (프로세스 공용)."""
+    return get_write_queue(
+        SHEET_KEY, get_worksheet,
+        schema_guard=get_header_guard(),
+        on_flushed=_on_checkins_flushed,
+        row_key=lambda r: row_key(*r[:3]),
+        seq_epoch=_seq_epoch,
+    )
+
+@st.cache_resource(show_spinner=False)
+def get_checkin_journal():
+    """로컬 저널(SQLite WAL). 프로세스 시작 시 1회 미반영 행을 복제 큐에 다시 넣음."""
+    journal = get_journal()
+    start_replication(journal, get_checkin_queue(), get_records_sync())
+    return journal
+
+def append_checkin_ordered(name: str, school: str, ts_kst: str, note: str, nonce=None):
     """
     시트에 [연번, 이름, 근무장소, 근무시간, 특이사항] 순서로 기록.
-    연번 = 현재 A열(연번) 값 개수  (헤더 포함이므로 다음 인덱스)
+    먼저 로컬 저널에 커밋(시트 장애와 무관하게 기록 보존) → 쓰기 큐가 시트로 비동기 복제.
+    연번 = flush 시점에 공용 할당기가 블록 단위로 발급 (A열 전체 조회 없음)
+    헤더 검증은 복제 시점에 1회(캐시)만 수행
+    같은 대원·학교(nonce가 있으면 같은 nonce)의 재제출은 중복 억제 창 안이면 기록하지 않고 이전 기록 시각 반환
     """
-    ws = get_worksheet()
-    # 헤더 보장
-    header = ws.row_values(1)
-    if header[:5] != EXPECTED_HEADER:
-        ws.update("A1:E1", [EXPECTED_HEADER])
-
-    # 현재 연번 계산 (A열 값 개수)
-    colA = ws.col_values(1)   # 예: ["연번","1","2",...]
-    next_seq = len(colA)      # 헤더 포함 길이 = 다음 연번
-
-    row = [next_seq, name.strip(), school, ts_kst, note.strip()]
-    ws.append_row(row)
-
-def fetch_all_records_df():
-    ws = get_worksheet()
-    records = ws.get_all_records()  # 1행을 헤더로 인식
-    df = pd.DataFrame(records)
-
-    # 새/구 헤더 모두 대응 (과거 잘못 들어간 행 섞여있을 대비)
-    rename_map = {
-        "연번": "seq",
-        "이름": "name",
-        "근무장소": "school",
-        "근무시간": "timestamp_kst",
-        "특이사항": "note",
-        # 구 포맷 대응 키들
-        "timestamp_kst": "timestamp_kst",
-        "name": "name",
-        "school": "school",
-        "seq": "seq",
-        "note": "note",
-    }
-    df = df.rename(columns={k: v for k, v in rename_map.items() if k in df.columns})
-
-    if "timestamp_kst" in df.columns:
-        df["timestamp_kst"] = pd.to_datetime(df["timestamp_kst"], errors="coerce")
-    return df
+    dedup = get_suppressor()
+    prev = dedup.claim(name, school, nonce, ack=ts_kst)
+    if prev is not None:
+        perf_metrics.inc("checkins_suppressed_total", entry="streamlit_app")
+        return prev
+    row = [name.strip(), school, ts_kst, note.strip()]
+    try:
+        with perf_metrics.span("checkin_submit", entry="streamlit_app"):
+            key = get_checkin_journal().append(*row)
+            get_checkin_queue().submit(row, key=key)
+    except Exception:
+        dedup.release(name, school, nonce)
+        raise
+    return None
+
+def _build_records_df(header, rows):
+    """원본 값 → 대시보드용 DataFrame (공용 변환 1회 + 영문 열 이름, 구/신 헤더 모두 대응)."""
+    from checkin_ingest import to_english, to_frame
+
+    return to_english(to_frame(header, rows))
+
+def get_records_sync():
+    """관리자 요약용 증분 동기화 엔진 (프로세스 공용)."""
+    return get_sheet_sync(SHEET_KEY, get_worksheet)
+
+def sheet_is_canonical():
+    """sheet_migrate로 5열 표준 스키마 정리가 끝난 시트인지 (1분 캐시) — 맞으면 행별 시각 정규화 생략."""
+    from sheet_migrate import get_schema_stamp
+
+    return get_schema_stamp(SHEET_KEY, lambda: get_worksheet().spreadsheet).matches()
+
+def sync_local_index():
+    """시트의 새 행만 가져와 로컬 색인에 반영 (실패해도 로컬 기록은 조회 가능).
+    전체 재동기화가 보관된 달의 행을 지우지 않도록 현재 파티션 시작일을 먼저 설정."""
+    from sheet_archive import attach_hot_start
+
+    try:
+        get_header_guard().ensure()
+        attach_hot_start(get_checkin_journal(), get_archive_manifest())
+        get_checkin_journal().sync_from(get_records_sync(), canonical=sheet_is_canonical())
+        return True
+    except Exception:
+        return False
+
+def get_archive_manifest():
+    """월별 보관 파티션 목록 (프로세스 공용, 10분 캐시)."""
+    from sheet_archive import get_manifest
+
+    return get_manifest(SHEET_KEY, lambda: get_worksheet().spreadsheet)
+
+def load_archived_range(start_d=None, end_d=None):
+    """조회 범위와 겹치는 보관 파티션만 로컬 색인에 적재 (최근 기간 조회는 Sheet1만 사용)."""
+    from sheet_archive import load_partitions
+
+    try:
+        load_partitions(get_checkin_journal(), get_archive_manifest(), start_d, end_d)
+        return True
+    except Exception:
+        return False
+
+def fetch_all_records_df(start_d=None, end_d=None):
+    """로컬 색인에서 근무시간 범위 조회 → 대시보드용 DataFrame."""
+    with perf_metrics.span("df_load", app="summary"):
+        rows = get_checkin_journal().query(start_d, end_d)
+        return _build_records_df(JOURNAL_COLUMNS, rows)
 
 # ------------------------------
 # 기본 UI
@@ -107,18 +179,53 @@ st.title("아동안전지킴이 QR 체크인")
 st.caption("수서경찰서 관내 초등학교 전용 시스템")
 st.sidebar.info(f"VERSION: {APP_VERSION}")
 
+def render_queue_status():
+    """사이드바: 시트 복제 지연(저널 미반영 건수) / 쓰기 대기 건수 표시."""
+    js = get_checkin_journal().status()
+    qs = get_checkin_queue().status()
+    st.sidebar.caption(
+        f"시트 미반영: {js['pending']}건 · 복제 지연 {js['lag_sec']:.0f}초 · "
+        f"기록 대기: {qs['depth']}건 · 최근 반영 지연 {qs['last_latency_sec']:.1f}초"
+    )
+    if qs["last_error"]:
+        st.sidebar.warning(f"시트 기록 재시도 중: {qs['last_error']}")
+    from sheet_ratelimit import get_rate_limiter
+
+    ls = get_rate_limiter().status()
+    st.sidebar.caption(
+        f"Sheets API: {ls['calls']}회 · 평균 대기 {ls['avg_wait_ms']:.0f}ms · "
+        f"재시도 {ls['retries']}회(429 {ls['throttled']}회) · 합쳐진 읽기 {ls['coalesced']}회"
+    )
+    ds = get_suppressor().status()
+    st.sidebar.caption(f"중복 제출 억제: {ds['suppressed']}건 (기준 {ds['window_sec'] / 60:g}분)")
+
+def render_startup_report():
+    """사이드바: 콜드 스타트 / 페이지별 첫 화면 시간, 지연 로드 시간."""
+    from startup_report import report
+
+    rep = report()
+    with st.sidebar.expander("시작 시간"):
+        if rep["cold"]:
+            cold = rep["cold"]
+            heavy = ", ".join(cold["heavy"]) or "없음"
+            st.caption(f"콜드 스타트 첫 화면({cold['page']}): {cold['ms']:.0f}ms · 그 시점 로드된 무거운 모듈: {heavy}")
+        for p, ms in rep["pages"].items():
+            st.caption(f"{p} 첫 화면: {ms:.0f}ms")
+        for label, ms in rep["imports"].items():
+            st.caption(f"지연 로드 {label}: {ms:.0f}ms")
+
 # ------------------------------
-# 쿼리파라미터 (name/school/note 프리필)
+# 쿼리파라미터 (name/school/note 프리필, 압축 QR의 s/g 코드 해석)
 # ------------------------------
 def get_query_params():
     try:
         qp = dict(st.query_params)
-        return {k: (v[0] if isinstance(v, list) else v) for k, v in qp.items()}
     except Exception:
         qp = st.experimental_get_query_params()
-        return {k: (v[0] if isinstance(v, list) else v) for k, v in qp.items()}
+    qp = {k: (v[0] if isinstance(v, list) else v) for k, v in qp.items()}
+    return resolve_params(qp)
 
-PAGES = ["대원 체크인", "관리자 요약"]  # QR 생성기 제거
+PAGES = ["대원 체크인", "관리자 요약", "QR 생성"]  # QR 생성: 앱 안에서 즉석 렌더링(PNG 캐시)
 qp = get_query_params()
 default_index = PAGES.index(qp["page"]) if "page" in qp and qp["page"] in PAGES else 0
 page = st.sidebar.radio("페이지 선택", PAGES, index=default_index)
@@ -145,6 +252,8 @@ if page == "대원 체크인":
             now_kst = datetime.now(SEOUL_TZ)
             st.info(f"기록 시각(KST): {now_kst.strftime('%Y-%m-%d %H:%M:%S')}")
         submitted = st.form_submit_button("체크인 기록")
+        first_paint(_RUN_T0, page)   # 폼이 그려진 시점
+        warm_sheets_client()
 
         if submitted:
             if not name.strip():
@@ -153,10 +262,17 @@ if page == "대원 체크인":
             ts_kst = datetime.now(SEOUL_TZ).strftime("%Y-%m-%d %H:%M:%S")
             try:
                 # ★ [연번, 이름, 근무장소, 근무시간, 특이사항] 순서로 저장
-                append_checkin_ordered(name=name.strip(), school=school, ts_kst=ts_kst, note=note)
-                # 성공 문구(‘아동안전지킴이’ 문구 제거)
-                st.success(f"체크인 완료: {name} · {school}")
-                st.toast("기록되었습니다.", icon="✅")
+                # nonce: 클라이언트가 쿼리파라미터로 보낸 값 (없으면 대원·학교 기준으로 중복 판단)
+                prev = append_checkin_ordered(
+                    name=name.strip(), school=school, ts_kst=ts_kst, note=note, nonce=qp.get("nonce")
+                )
+                if prev is not None:
+                    # 연타/재스캔 — 새로 쓰지 않고 이전 기록으로 응답
+                    st.success(f"이미 체크인되었습니다: {name} · {school} ({prev})")
+                else:
+                    # 성공 문구(‘아동안전지킴이’ 문구 제거)
+                    st.success(f"체크인 완료: {name} · {school}")
+                    st.toast("기록되었습니다.", icon="✅")
             except Exception as e:
                 st.error("기록 중 오류가 발생했습니다. (관리자 확인 필요)")
                 # 필요 시 디버그:
@@ -166,34 +282,43 @@ if page == "대원 체크인":
 # 페이지 2: 관리자 요약
 # ------------------------------
 elif page == "관리자 요약":
+    from startup_report import timed
+    with timed("관리자 요약 (pandas·집계)"):
+        import pandas as pd
+        import checkin_rollup
+
     st.subheader("관리자 요약")
-    df = fetch_all_records_df()
-    if df.empty:
+    render_queue_status()
+    render_startup_report()
+    perf_metrics.render_panel(st.sidebar)
+    if st.sidebar.button("시트 헤더 재검증"):
+        get_header_guard().revalidate()
+        st.sidebar.success("헤더 확인 완료")
+    if not sync_local_index():
+        st.warning("시트 동기화 실패 — 로컬 기록 기준으로 표시합니다.")
+    lo, hi = get_checkin_journal().date_bounds()
+    try:
+        archived_lo = get_archive_manifest().first_date()
+    except Exception:
+        archived_lo = None
+    if archived_lo and (lo is None or archived_lo < lo):
+        lo, hi = archived_lo, hi or archived_lo
+    if lo is None:
         st.info("아직 기록이 없습니다.")
     else:
-        # 시간 컬럼 잡기
-        time_col = "timestamp_kst" if "timestamp_kst" in df.columns else (
-            "근무시간" if "근무시간" in df.columns else None
-        )
-        if time_col and df[time_col].dtype == "O":
-            df[time_col] = pd.to_datetime(df[time_col], errors="coerce")
-
         with st.expander("필터", expanded=True):
             c1, c2 = st.columns(2)
-            if time_col:
-                with c1:
-                    start_d = st.date_input("시작일", value=pd.to_datetime(df[time_col]).min().date())
-                with c2:
-                    end_d = st.date_input("종료일", value=pd.to_datetime(df[time_col]).max().date())
-            else:
-                start_d = st.date_input("시작일")
-                end_d = st.date_input("종료일")
-
-        if time_col:
-            fdf = df[(pd.to_datetime(df[time_col]).dt.date >= start_d) &
-                     (pd.to_datetime(df[time_col]).dt.date <= end_d)]
-        else:
-            fdf = df.copy()
+            with c1:
+                start_d = st.date_input("시작일", value=date.fromisoformat(lo))
+            with c2:
+                end_d = st.date_input("종료일", value=date.fromisoformat(hi))
+
+        # 범위에 걸친 보관 파티션만 적재 → 로컬 색인에서 날짜 범위만 조회
+        if not load_archived_range(start_d, end_d):
+            st.warning("보관 파티션을 읽지 못했습니다 — 현재 시트 기록만 표시합니다.")
+        # 조회 전에 읽은 쓰기 버전 = 표/내보내기 캐시 키 (연번만 채워져도 바뀜, 조회 중 복제가 끼어도 안전한 쪽)
+        data_ver = get_checkin_journal().data_version()
+        fdf = fetch_all_records_df(start_d, end_d)
 
         # 보기 좋게 컬럼 순서 통일
         for old, new in [("연번","seq"),("이름","name"),("근무장소","school"),("근무시간","timestamp_kst"),("특이사항","note")]:
@@ -204,11 +329,84 @@ elif page == "관리자 요약":
         ordered = [c for c in show_cols if c in fdf.columns]
         sort_key = "timestamp_kst" if "timestamp_kst" in fdf.columns else (ordered[-1] if ordered else None)
 
-        st.metric("총 체크인 수", len(fdf))
-        if sort_key:
-            st.dataframe(fdf.sort_values(sort_key, ascending=False)[ordered], use_container_width=True)
-        else:
-            st.dataframe(fdf[ordered] if ordered else fdf, use_container_width=True)
+        # 기간 합계/근무장소별 첫·마지막 체크인은 사전 집계 테이블에서
+        journal = get_checkin_journal()
+        st.metric("총 체크인 수", checkin_rollup.summary(journal, start_d, end_d)["count"])
+        with st.expander("근무장소별 첫·마지막 체크인"):
+            st.dataframe(
+                pd.DataFrame(
+                    checkin_rollup.school_times(journal, start_d, end_d),
+                    columns=["school", "checkins", "days", "first_kst", "last_kst"],
+                ),
+                use_container_width=True,
+            )
+        # 학교 × 날짜 × 등하교 시간대 공백 — (데이터 버전, 기간, 설정)당 1회 계산
+        with st.expander("학교별 등하교 시간대 공백"):
+            from checkin_coverage import render_coverage
+            render_coverage(journal, SCHOOL_OPTIONS, start_d, end_d)
+        # 페이지 단위 표: 정렬 순서는 (데이터 버전, 기간)당 1회, 현재 페이지 행만 브라우저로
+        from checkin_export import render_export
+        from checkin_table import render_paged_table
+        table_key = (data_ver, start_d, end_d)
+        render_paged_table(fdf, key=table_key, sort_by=sort_key, columns=ordered or None,
+                           st_key="summary_table", use_container_width=True)
+
+        # 내보내기: 버튼을 눌렀을 때만 생성 (CSV/Parquet/Excel), 같은 기간·데이터 버전(연번 채움 포함)이면 캐시 재사용
+        render_export(lambda: fdf, key=table_key, base_name="checkins_kids")
+
+# ------------------------------
+# 페이지 3: QR 생성 (관리자) — 메모리에서 렌더링, PNG 바이트는 LRU 캐시
+# ------------------------------
+elif page == "QR 생성":
+    from startup_report import timed
+    from checkin_codes import get_guard_registry
+    with timed("QR 생성 (qrcode·Pillow)"):
+        from qr_generator_with_labels import PNG_CACHE, plan_job, qr_png_bytes, zip_png_bytes
+
+    st.subheader("QR 생성")
+    with st.form("qr_form"):
+        schools = st.multiselect("학교", SCHOOL_OPTIONS, default=SCHOOL_OPTIONS)
+        c1, c2 = st.columns(2)
+        with c1:
+            qr_name = st.text_input("이름(선택)", placeholder="홍길동")
+            qr_note = st.text_input("특이사항(선택)")
+        with c2:
+            compact = st.checkbox("짧은 코드 URL (?s=..&g=..)", value=True)
+            box_size = st.slider("모듈 크기(box_size)", 4, 16, 10)
+            border = st.slider("여백(border)", 1, 8, 4)
+        st.form_submit_button("QR 만들기")
+
+    # 대원 코드는 배포된 guard_codes.csv에 이미 있는 대원만 사용 (앱에서 발급하면 재시작 시 사라져 인쇄된 QR이 깨짐)
+    # → 미등록 대원은 전체 파라미터 URL. 새 코드는 qr_generator_with_labels.py --compact로 발급 후 함께 배포
+    registry = get_guard_registry() if compact else None
+    name, note = qr_name.strip(), qr_note.strip()
+    jobs, full_url = [], []
+    for sc in schools:
+        use_codes = registry is not None and (not name or registry.known(sc, name, note))
+        if registry is not None and not use_codes:
+            full_url.append(sc)
+        jobs.append(plan_job(sc, name, note, box_size, border, registry if use_codes else None))
+    if full_url:
+        st.info(f"대원 코드가 등록되지 않은 {len(full_url)}개 학교는 전체 주소(이름 포함)로 만들었습니다. "
+                "짧은 코드가 필요하면 명단으로 `python qr_generator_with_labels.py --compact`를 실행해 "
+                "guard_codes.csv를 발급·배포하세요.")
+
+    cols = st.columns(4)
+    for i, job in enumerate(jobs):
+        job["png"] = qr_png_bytes(job["url"], job["label"], box_size, border)
+        with cols[i % 4]:
+            st.image(job["png"], caption=job["label"])
+            st.caption(job["url"])
+
+    if jobs:
+        # 이미 캐시에 있는 PNG 바이트로 ZIP 구성 (재렌더링 없음)
+        st.download_button(
+            "전체 ZIP 다운로드",
+            data=zip_png_bytes((job["file"], job["png"]) for job in jobs),
+            file_name="qr_codes.zip",
+            mime="application/zip",
+        )
+    cs = PNG_CACHE.status()
+    st.sidebar.caption(f"QR 캐시: {cs['items']}개 · {cs['bytes'] / 1024:,.0f}KB · 적중 {cs['hits']}/{cs['hits'] + cs['misses']}")
 
-        csv = fdf.to_csv(index=False).encode("utf-8-sig")
-        st.download_button("CSV 다운로드", data=csv, file_name="checkins_kids.csv", mime="text/csv")
+perf_metrics.end_rerun(page)